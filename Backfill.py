@@ -0,0 +1,196 @@
+# Historical backfill.
+# Parses every dated copy of the database (one directory per scrape,
+# each containing the four CSV files) in parallel, one snapshot per
+# process pool task, and reduces the results into production-progress
+# time series: assembled DCBs, QA'd LVRs by type, good CCMs by type,
+# and QA'd true/mirror backplanes over time.
+# The series are written to a CSV file (one row per snapshot),
+# and optionally drawn as line charts.
+# With --archive, the snapshots are read from a row archive
+# (see Row_Archive.py) instead of snapshot directories.
+
+import argparse
+import concurrent.futures
+import csv
+import datetime
+import functools
+import os
+import re
+import sys
+
+from Database_Parser_and_Analyzer import BOARD_FILES, new_board, parse_board_file
+from Row_Archive import RowArchive
+
+# Date in a snapshot directory's name, i.e. "2020-03-12" or "20200312".
+pattern_date = re.compile('(\\d{4})-?(\\d{2})-?(\\d{2})')
+
+# Series of each board type, in the order of the output columns.
+SERIES = {
+    "DCB": ["DCB_Assembled", "DCB_Initial_QA"],
+    "LVR": ["LVR_12A_Initial_QA", "LVR_25A_Initial_QA", "LVR_15MS_Initial_QA"],
+    "CCM": ["CCM_12A_Good", "CCM_12M_Good", "CCM_12S_Good", "CCM_15M_Good", "CCM_15S_Good", "CCM_25A_Good"],
+    "Backplane": ["Backplane_True_QA", "Backplane_Mirror_QA"],
+}
+
+# Values of the series of one parsed board object.
+def board_summary(board_type, board):
+    if (board_type == "DCB"):
+        return [board.get_num_assembled(), board.process_QA_stage("Initial_QA")["assembled"]]
+
+    if (board_type == "LVR"):
+        passed = board.process_QA_stage("Initial_QA")
+        return [passed["12A"], passed["25A"], passed["15MS"]]
+
+    if (board_type == "CCM"):
+        return board.process_good_count()
+
+    passed = board.process_QA_stage("QA")
+    return [passed["True"], passed["Mirror"]]
+
+# Process pool task. Parses one snapshot directory, and returns
+# a dictionary of series name -> value. Board types whose CSV file
+# is missing from the snapshot are left out.
+def snapshot_summary(snapshot_dir):
+    result = {}
+    for board_type, file_name in BOARD_FILES.items():
+        path = os.path.join(snapshot_dir, file_name)
+        if (not os.path.exists(path)):
+            continue
+
+        board = new_board(board_type)
+        parse_board_file(board, board_type, path)
+        result.update(zip(SERIES[board_type], board_summary(board_type, board)))
+    return result
+
+# Process pool task. Same as snapshot_summary(), for a snapshot
+# of a row archive; each task opens its own connection.
+def archived_snapshot_summary(archive_path, name):
+    archive = RowArchive(archive_path)
+    try:
+        boards = archive.load_snapshot(name)
+    finally:
+        archive.close()
+
+    result = {}
+    for board_type, board in boards.items():
+        result.update(zip(SERIES[board_type], board_summary(board_type, board)))
+    return result
+
+# Returns the date in a snapshot directory's name, or None.
+def snapshot_date(snapshot_dir):
+    match = pattern_date.search(os.path.basename(os.path.normpath(snapshot_dir)))
+    if (match is None):
+        return None
+    try:
+        return datetime.date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+    except ValueError:
+        return None
+
+# Returns the snapshot directories under root (the directories containing
+# at least one of the CSV files), sorted by date, then name.
+def find_snapshots(root):
+    snapshots = []
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if (os.path.isdir(path) and any(os.path.exists(os.path.join(path, file_name))
+                                        for file_name in BOARD_FILES.values())):
+            snapshots.append(path)
+
+    snapshots.sort(key=lambda path: (snapshot_date(path) or datetime.date.max, os.path.basename(path)))
+    return snapshots
+
+# Returns the snapshot names of a row archive, sorted by date, then name.
+def find_archived_snapshots(archive_path):
+    archive = RowArchive(archive_path)
+    try:
+        snapshots = archive.snapshots()
+    finally:
+        archive.close()
+
+    snapshots.sort(key=lambda name: (snapshot_date(name) or datetime.date.max, name))
+    return snapshots
+
+# Parses the snapshots over a pool of worker processes.
+# Snapshots are read from the row archive at archive_path if given,
+# and are directories otherwise.
+# Returns a list of (snapshot, summary) pairs, in the order of snapshots.
+def backfill(snapshots, workers=None, archive_path=None):
+    if (archive_path is not None):
+        task = functools.partial(archived_snapshot_summary, archive_path)
+    else:
+        task = snapshot_summary
+
+    if (workers == 1):
+        return [(snapshot, task(snapshot)) for snapshot in snapshots]
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(snapshots) // (4 * (workers or os.cpu_count() or 1)))
+        return list(zip(snapshots, pool.map(task, snapshots, chunksize=chunksize)))
+
+# Writes the time series as a CSV file, one row per snapshot.
+# Values missing from a snapshot are left blank.
+def write_series(results, path):
+    names = [name for board_series in SERIES.values() for name in board_series]
+    with open(path, "w", newline="") as output_file:
+        writer = csv.writer(output_file)
+        writer.writerow(["Snapshot", "Date"] + names)
+        for snapshot, summary in results:
+            date = snapshot_date(snapshot)
+            writer.writerow([os.path.basename(os.path.normpath(snapshot)), date.isoformat() if date else ""] +
+                            [summary.get(name, "") for name in names])
+
+# Draws a line chart per board type into output_dir (Progress_DCB.png, ...).
+# The x axis is the snapshot date when every snapshot has one,
+# and the snapshot number otherwise.
+def plot_series(results, output_dir):
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+
+    dates = [snapshot_date(snapshot) for snapshot, summary in results]
+    dated = all(date is not None for date in dates)
+
+    for board_type, names in SERIES.items():
+        figure = Figure(figsize=(14, 10))
+        axes = figure.subplots()
+        for name in names:
+            points = [(dates[number] if dated else number, summary[name])
+                      for number, (snapshot, summary) in enumerate(results) if name in summary]
+            if (points):
+                axes.plot([x for x, y in points], [y for x, y in points], marker="o", label=name)
+
+        axes.set_title(board_type + " Production Progress")
+        axes.set_xlabel("Date" if dated else "Snapshot")
+        axes.set_ylabel("Number of boards" if board_type != "CCM" else "Number of good CCMs")
+        axes.legend(loc="upper left")
+        if (dated):
+            figure.autofmt_xdate()
+        figure.savefig(os.path.join(output_dir, "Progress_" + board_type + ".png"), bbox_inches="tight")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Builds production-progress time series from dated copies of the database.")
+    parser.add_argument("root", help="directory containing one sub-directory per snapshot (or the archive file, with --archive)")
+    parser.add_argument("--archive", action="store_true", help="read the snapshots from a row archive (see Row_Archive.py)")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: one per CPU)")
+    parser.add_argument("--output", default="Progress.csv", help="time series CSV file (default: Progress.csv)")
+    parser.add_argument("--no-plots", action="store_true", help="skip the line charts")
+    parser.add_argument("--output-dir", default=".", help="directory for the line charts (default: current directory)")
+    args = parser.parse_args(argv)
+
+    if (args.archive):
+        if (not os.path.isfile(args.root)):
+            sys.exit("No archive file " + args.root)
+        snapshots = find_archived_snapshots(args.root)
+    else:
+        snapshots = find_snapshots(args.root)
+    if (not snapshots):
+        sys.exit("No snapshots found in " + args.root)
+
+    results = backfill(snapshots, args.workers, args.root if args.archive else None)
+    write_series(results, args.output)
+    if (not args.no_plots):
+        plot_series(results, args.output_dir)
+    return results
+
+if (__name__ == "__main__"):
+    main()
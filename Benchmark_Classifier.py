@@ -0,0 +1,126 @@
+# Benchmark for the board classifiers.
+# Compares the rows/sec of the original per-row regex chains
+# with the BoardClassifier compiled from BOARD_SPECS,
+# on the four CSV files in the local directory.
+
+import csv
+import re
+import sys
+import time
+
+from Database_Parser_and_Analyzer import BoardClassifier, BOARD_SPECS, new_board
+
+# The original regex chains, kept here as the "before" reference.
+pattern_DCB = re.compile('^(WVJCE-)[\\d\\d\\d]')
+
+pattern_LVR_CZ = re.compile('^(WVJCZ-)[\\d\\d\\d]')
+pattern_LVR_EN = re.compile('^(WVJEN-)[\\d\\d\\d]')
+pattern_LVR_ER = re.compile('^(WVJER-)[\\d\\d\\d]')
+pattern_LVR_ES = re.compile('^(WVJES-)[\\d\\d\\d]')
+
+pattern_CCM_12A = re.compile('^(12A)[\\d|(\\d\\d)]')
+pattern_CCM_12M = re.compile('^(12M)[\\d|(\\d\\d)]')
+pattern_CCM_12S = re.compile('^(12S)[\\d|(\\d\\d)]')
+pattern_CCM_15M = re.compile('^(15M)[\\d|(\\d\\d)]')
+pattern_CCM_15S = re.compile('^(15S)[\\d|(\\d\\d)]')
+pattern_CCM_25A = re.compile('^(25A)[\\d|(\\d\\d)]')
+
+# Each legacy classifier returns the name of the dictionary
+# update method the original driver would have called, or None.
+def legacy_DCB(board, line):
+    if re.match(pattern_DCB, line[board.DCB_columns["Serial"]]):
+        assembled = board.process_line(line)
+        if (assembled == 1):
+            return "assembled_dict_update"
+        elif (assembled == 2):
+            return "unassembled_dict_update"
+        else:
+            return "other_dict_update"
+    return None
+
+def legacy_LVR(board, line):
+    idx_serial = board.get_idx("Serial", 4)
+    if (re.match(pattern_LVR_CZ, line[idx_serial])
+    or re.match(pattern_LVR_EN, line[idx_serial])
+    or re.match(pattern_LVR_ER, line[idx_serial])
+    or re.match(pattern_LVR_ES, line[idx_serial])):
+        subtype_code = board.process_line(line)
+        if (subtype_code == 1):
+            return "dict_update_LVR_12A"
+        elif (subtype_code == 2):
+            return "dict_update_LVR_25A"
+        elif (subtype_code == 3):
+            return "dict_update_LVR_15MS"
+        else:
+            return "dict_update_LVR_other"
+    return None
+
+def legacy_CCM(board, line):
+    idx_roll = board.get_idx("Good_Count")
+    idx_id = board.get_idx("Roll_ID")
+    if (line[idx_roll] != ''):
+        if (re.match(pattern_CCM_12A, line[idx_id])):
+            return "dict_update_12A"
+        elif(re.match(pattern_CCM_12M, line[idx_id])):
+            return "dict_update_12M"
+        elif(re.match(pattern_CCM_12S, line[idx_id])):
+            return "dict_update_12S"
+        elif(re.match(pattern_CCM_15M, line[idx_id])):
+            return "dict_update_15M"
+        elif(re.match(pattern_CCM_15S, line[idx_id])):
+            return "dict_update_15S"
+        elif(re.match(pattern_CCM_25A, line[idx_id])):
+            return "dict_update_25A"
+    return None
+
+def legacy_backplane(board, line):
+    idx_type = board.get_idx("Type")
+    if (line[idx_type] == "True"):
+        return "update_true_backplanes"
+    elif (line[idx_type] == "Mirror"):
+        return "update_mirror_backplanes"
+    return None
+
+BENCHMARKS = [
+    ("DCB", 'CSV_DCB.csv', legacy_DCB),
+    ("LVR", 'CSV_LVR.csv', legacy_LVR),
+    ("CCM", 'CSV_CCM.csv', legacy_CCM),
+    ("Backplane", 'CSV_Backplane.csv', legacy_backplane),
+]
+
+# Returns the rows/sec of classify_row over the lines,
+# repeated until at least min_time seconds have passed.
+def rows_per_sec(classify_row, lines, min_time):
+    rows = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while (elapsed < min_time):
+        for line in lines:
+            classify_row(line)
+        rows += len(lines)
+        elapsed = time.perf_counter() - start
+    return rows / elapsed
+
+def main(min_time):
+    print("Board       Rows   Before (rows/s)   After (rows/s)   Speedup")
+    for name, file_name, legacy in BENCHMARKS:
+        with open(file_name, 'r') as csv_file:
+            lines = list(csv.reader(csv_file))
+
+        # The board object with its columns set, the same way the drivers do.
+        board = new_board(name)
+        classifier = BoardClassifier(board, BOARD_SPECS[name])
+
+        # Both classifiers have to agree before their speed means anything.
+        for line in lines:
+            route = classifier.classify(line)
+            after = route[0].__name__ if route else None
+            if (after != legacy(board, line)):
+                sys.exit("Classifiers disagree on " + name + " row: " + str(line))
+
+        before = rows_per_sec(lambda line: legacy(board, line), lines, min_time)
+        after = rows_per_sec(classifier.classify, lines, min_time)
+        print("%-10s %5d   %15.0f   %14.0f   %6.2fx" % (name, len(lines), before, after, after / before))
+
+if (__name__ == "__main__"):
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 1.0)
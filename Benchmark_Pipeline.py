@@ -0,0 +1,239 @@
+# Benchmark of the board pipelines, stage by stage.
+# Times each stage of every board type separately:
+# - read           - decoding the CSV file into rows (csv.reader).
+# - classify       - checking every row against the board's spec (BoardClassifier.classify).
+# - dict_update    - the dictionary update and counter methods of the classified rows.
+# - QA_aggregation - the process_* summaries of every QA stage (the good counts, for the CCM).
+# - text_output    - writing the board's text report (DCB and LVR only).
+# - plotting       - rendering the board's charts.
+# The data is generated at the requested scale (see Synthetic_Database.py),
+# or read from an existing directory of CSV files. Each stage is run
+# --repeat times, and its fastest time is kept. The results are written
+# as JSON, and can be compared against a saved baseline, flagging the
+# stages that got slower.
+# With --memory, the memory held by the parsed boards is also measured
+# (with tracemalloc), with the compact records (see make_record())
+# and with plain list rows.
+
+import argparse
+import csv
+import datetime
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from Database_Parser_and_Analyzer import (BOARD_FILES, BOARD_SPECS, QA_RULES, BoardClassifier, apply_layout,
+                                          new_board, open_report, parse_board_file, parse_board_types, render_charts)
+from Synthetic_Database import generate_database
+
+# Increment if the layout of the results changes.
+RESULTS_FORMAT = 1
+
+STAGES = ["read", "classify", "dict_update", "QA_aggregation", "text_output", "plotting"]
+
+# Stages that got slower by less than this many seconds aren't flagged
+# as regressions, whatever the ratio (timer noise on the small stages).
+MIN_REGRESSION_SECONDS = 0.005
+
+# Text report of each board type, as in the drivers.
+REPORTS = {
+    "DCB": lambda board: board.stream_report(),
+    "LVR": lambda board: itertools.chain(board.stream_general_stats(), ["\n"], board.stream_individual_stats()),
+}
+
+# Support function. Runs function(), returning (seconds, result).
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+# Support function. Runs the QA summaries of a parsed board object.
+def aggregate_QA(board_type, board):
+    if (board_type == "CCM"):
+        return board.process_good_count()
+    return {stage: board.process_QA_stage(stage) for stage in QA_RULES[board_type]}
+
+# Support function. Calls the routes of the classified rows (see BoardClassifier.update()).
+def update_rows(routes, lines):
+    for route, line in zip(routes, lines):
+        if (route is not None):
+            dict_update, increment = route
+            dict_update(line)
+            increment()
+
+# Runs every stage of one board type's pipeline once on the CSV file at path.
+# The report and charts are written into output_dir.
+# Returns (dictionary of stage -> seconds, number of rows, number of boards recorded).
+def run_stages(board_type, path, output_dir, plots=True):
+    times = {}
+    with open(path, 'r') as csv_file:
+        times["read"], lines = timed(lambda: list(csv.reader(csv_file)))
+
+    board = apply_layout(new_board(board_type), board_type, path)
+    classifier = BoardClassifier(board, BOARD_SPECS[board_type])
+    times["classify"], routes = timed(lambda: [classifier.classify(line) for line in lines])
+    times["dict_update"], result = timed(lambda: update_rows(routes, lines))
+    times["QA_aggregation"], result = timed(lambda: aggregate_QA(board_type, board))
+
+    if (board_type in REPORTS):
+        def write_report():
+            with open_report(os.path.join(output_dir, "Text_Output_" + board_type + ".txt")) as report:
+                report.write_all(REPORTS[board_type](board))
+        times["text_output"], result = timed(write_report)
+
+    if (plots):
+        charts = [dict(chart, file_name=os.path.join(output_dir, chart["file_name"])) for chart in board.charts()]
+        times["plotting"], result = timed(lambda: render_charts(charts))
+
+    num_recorded = sum(len(dictionary) for group, dictionary in board.get_groups())
+    return times, len(lines), num_recorded
+
+# Measures the memory held by a board object parsed from the CSV file at path,
+# with compact records or list rows.
+# Returns (bytes, number of boards recorded).
+def measure_memory(board_type, path, compact):
+    tracemalloc.start()
+    try:
+        board = new_board(board_type)
+        board.compact = compact
+        parse_board_file(board, board_type, path)
+        num_bytes = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return num_bytes, sum(len(dictionary) for group, dictionary in board.get_groups())
+
+# Benchmarks the board types' pipelines on the CSV files of input_dir,
+# keeping the fastest of repeat runs of each stage.
+# Returns the results (see RESULTS_FORMAT) as a dictionary.
+def run_benchmark(input_dir, board_types=None, repeat=3, plots=True, memory=False):
+    results = {"format": RESULTS_FORMAT,
+               "created": datetime.datetime.now().isoformat(timespec="seconds"),
+               "python": platform.python_version(),
+               "repeat": repeat,
+               "boards": {}}
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        for board_type in (board_types or BOARD_FILES):
+            path = os.path.join(input_dir, BOARD_FILES[board_type])
+            if (not os.path.exists(path)):
+                continue
+
+            best = {}
+            for run in range(repeat):
+                times, num_rows, num_recorded = run_stages(board_type, path, output_dir, plots)
+                for stage, seconds in times.items():
+                    best[stage] = min(seconds, best.get(stage, seconds))
+
+            results["boards"][board_type] = {"bytes": os.path.getsize(path), "rows": num_rows,
+                                             "records": num_recorded,
+                                             "stages": {stage: best[stage] for stage in STAGES if stage in best}}
+            if (memory):
+                list_bytes, num_boards = measure_memory(board_type, path, False)
+                compact_bytes, num_boards = measure_memory(board_type, path, True)
+                results["boards"][board_type]["memory"] = {"list_bytes": list_bytes, "compact_bytes": compact_bytes,
+                                                           "boards": num_boards}
+    return results
+
+# Compares results against a baseline (both as returned by run_benchmark()).
+# A stage is a regression if it's slower than the baseline by more than
+# threshold (a fraction, i.e. 0.1 for 10%) and MIN_REGRESSION_SECONDS.
+# Returns a list of (board type, stage, baseline seconds, seconds, is regression)
+# for the stages in both.
+def compare_results(baseline, results, threshold):
+    comparison = []
+    for board_type, board_results in results["boards"].items():
+        baseline_stages = baseline["boards"].get(board_type, {}).get("stages", {})
+        for stage, seconds in board_results["stages"].items():
+            if (stage not in baseline_stages):
+                continue
+            before = baseline_stages[stage]
+            regression = (seconds > before * (1 + threshold) and seconds - before > MIN_REGRESSION_SECONDS)
+            comparison.append((board_type, stage, before, seconds, regression))
+    return comparison
+
+# Formats the results as a table, one row per board type and stage.
+def results_report(results):
+    lines = ["Board      Stage                Seconds       Rows/s"]
+    for board_type, board_results in results["boards"].items():
+        for stage, seconds in board_results["stages"].items():
+            rate = board_results["rows"] / seconds if (seconds > 0) else float("inf")
+            lines.append("%-10s %-15s %12.6f %12.0f" % (board_type, stage, seconds, rate))
+
+    memory = [(board_type, board_results["memory"]) for board_type, board_results in results["boards"].items()
+              if "memory" in board_results]
+    if (memory):
+        lines.append("")
+        lines.append("Board      Bytes/board (list)  Bytes/board (compact)  Reduction")
+        for board_type, usage in memory:
+            num_boards = max(1, usage["boards"])
+            reduction = (1 - usage["compact_bytes"] / usage["list_bytes"]) * 100 if (usage["list_bytes"] > 0) else 0.0
+            lines.append("%-10s %19.0f %22.0f %9.1f%%" % (board_type, usage["list_bytes"] / num_boards,
+                                                         usage["compact_bytes"] / num_boards, reduction))
+    return "\n".join(lines) + "\n"
+
+# Formats the comparison against a baseline as a table.
+def comparison_report(comparison):
+    lines = ["Board      Stage               Baseline      Current    Change"]
+    for board_type, stage, before, seconds, regression in comparison:
+        change = (seconds / before - 1) * 100 if (before > 0) else 0.0
+        lines.append("%-10s %-15s %12.6f %12.6f %+8.1f%%%s" % (board_type, stage, before, seconds, change,
+                                                              "  REGRESSION" if regression else ""))
+    return "\n".join(lines) + "\n"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks each stage of the board pipelines.")
+    source_group = parser.add_mutually_exclusive_group()
+    source_group.add_argument("--input-dir", default=None,
+                              help="benchmark the CSV_*.csv files in this directory instead of generated ones")
+    source_group.add_argument("--rows", type=int, default=10000,
+                              help="rows of each generated CSV file (default: 10000)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated CSV files (default: 0)")
+    parser.add_argument("--boards", type=parse_board_types, default=list(BOARD_FILES),
+                        help="comma separated board types to benchmark (default: " + ",".join(BOARD_FILES) + ")")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of each stage, the fastest is kept (default: 3)")
+    parser.add_argument("--no-plots", action="store_true", help="skip the plotting stage")
+    parser.add_argument("--memory", action="store_true",
+                        help="also measure the memory per board, with compact records and with list rows")
+    parser.add_argument("--output", default="Benchmark_Results.json",
+                        help="JSON file the results are written to (default: Benchmark_Results.json)")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against the results saved in PATH")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="slowdown flagged as a regression, as a fraction of the baseline (default: 0.1)")
+    args = parser.parse_args(argv)
+
+    board_types = args.boards
+    if (args.repeat < 1):
+        parser.error("--repeat has to be at least 1")
+
+    if (args.input_dir is not None):
+        results = run_benchmark(args.input_dir, board_types, args.repeat, not args.no_plots, args.memory)
+        results["data"] = {"input_dir": os.path.abspath(args.input_dir)}
+    else:
+        with tempfile.TemporaryDirectory() as data_dir:
+            generate_database(data_dir, args.rows, args.seed, board_types)
+            results = run_benchmark(data_dir, board_types, args.repeat, not args.no_plots, args.memory)
+        results["data"] = {"rows": args.rows, "seed": args.seed}
+
+    with open(args.output, "w") as output_file:
+        json.dump(results, output_file, indent=1)
+    print(results_report(results), end="")
+
+    if (args.baseline):
+        with open(args.baseline, "r") as baseline_file:
+            baseline = json.load(baseline_file)
+        if (baseline.get("data") != results["data"]):
+            print("Warning: the baseline was run on different data (" + json.dumps(baseline.get("data")) + ")")
+        comparison = compare_results(baseline, results, args.threshold)
+        print()
+        print(comparison_report(comparison), end="")
+        if (any(regression for board_type, stage, before, seconds, regression in comparison)):
+            sys.exit(1)
+    return results
+
+if (__name__ == "__main__"):
+    main()
@@ -0,0 +1,302 @@
+# Local JSON API over the parsed boards.
+# A small asyncio HTTP/1.1 server (standard library only) that holds the
+# parsed board objects in memory and serves them as JSON:
+#
+# /                       - the endpoints, and when each board was loaded.
+# /dcb/summary            - number of DCBs per dictionary, and passing each QA stage.
+# /lvr/summary            - number of LVRs per type, and passing each QA stage.
+# /lvr/{id}               - one LVR: its type, columns and QA stages.
+# /ccm/rolls[?type=15M]   - the CCM rolls (of one type), with their good counts.
+# /backplane/qa           - number of backplanes per type, and passing each QA stage.
+#
+# Every response is serialized once, when the boards are loaded, along with
+# its ETag (a hash of the body), so a request is a dictionary lookup; clients
+# sending the ETag back in If-None-Match get a 304 with no body.
+# The CSV files are polled for changes (see CSVWatcher). A changed file is
+# parsed in a worker thread, and the new responses replace the old ones in a
+# single assignment once they're all built, so requests in flight finish
+# with the state they started with, and never see a mix of the two.
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import io
+import itertools
+import json
+import os
+import sys
+import time
+import urllib.parse
+
+from Database_Parser_and_Analyzer import (BOARD_FILES, HEADER_SCAN_ROWS, QA_RULES, CSVWatcher, LayoutError,
+                                          board_records, file_signature, get_QA_rule, infer_layout,
+                                          is_complete_csv, new_board, parse_board)
+
+# Longest request head (request line and headers) accepted, in bytes.
+MAX_REQUEST_HEAD = 16384
+
+# Idle keep-alive connections are closed after this many seconds.
+KEEP_ALIVE_TIMEOUT = 30
+
+STATUS_TEXT = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    431: "Request Header Fields Too Large",
+}
+
+# Support function. Serializes a JSON response body, returning (body, ETag).
+def serialize(value):
+    body = json.dumps(value, indent=1).encode("utf-8") + b"\n"
+    return body, '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+# Support function. A row as a dictionary of column -> value, in column order.
+def row_fields(row, columns):
+    return {column: row[idx] if idx < len(row) else "" for column, idx in sorted(columns.items(), key=lambda item: item[1])}
+
+# Support function. QA stages a row passes, as a dictionary of stage -> bool.
+def row_QA(board_type, row, columns):
+    return {stage: bool(get_QA_rule(board_type, stage).check(row, columns)) for stage in QA_RULES.get(board_type, {})}
+
+# Support function. Number of boards per dictionary, and passing each QA stage.
+def QA_summary(board_type, board):
+    return {"boards": {group: len(dictionary) for group, dictionary in board.get_groups()},
+            "QA": {stage: board.process_QA_stage(stage) for stage in QA_RULES[board_type]}}
+
+# Responses of a parsed board object, as a dictionary of request target -> response value.
+def board_responses(board_type, board):
+    if (board_type == "DCB"):
+        return {"/dcb/summary": QA_summary("DCB", board)}
+
+    if (board_type == "LVR"):
+        columns = board.get_columns()
+        responses = {"/lvr/summary": QA_summary("LVR", board)}
+        for LVR_id, (group, row) in board_records(board, "LVR").items():
+            responses["/lvr/" + LVR_id] = {"ID": LVR_id, "type": group, "columns": row_fields(row, columns),
+                                           "QA": row_QA("LVR", row, columns)}
+        return responses
+
+    if (board_type == "CCM"):
+        columns = board.get_columns()
+        good_counts = dict(zip((group for group, dictionary in board.get_groups()), board.process_good_count()))
+        rolls = {}
+        for group, dictionary in board.get_groups():
+            rolls[group] = [{"Roll_ID": row[columns["Roll_ID"]], "columns": row_fields(row, columns)}
+                            for row in dictionary.values()]
+        responses = {"/ccm/rolls": {"good_count": good_counts, "rolls": list(itertools.chain(*rolls.values()))}}
+        for group, group_rolls in rolls.items():
+            responses["/ccm/rolls?type=" + group.upper()] = {"type": group, "good_count": good_counts[group],
+                                                             "rolls": group_rolls}
+        return responses
+
+    return {"/backplane/qa": QA_summary("Backplane", board)}
+
+# Parses a board's CSV file for the API.
+# The text that is checked for completeness (see is_complete_csv()) is the
+# text that is parsed, so a file rewritten in between can't be half read.
+# Returns the board object, or None if the file isn't completely written.
+def load_board(board_type, path):
+    with open(path, 'r') as csv_file:
+        text = csv_file.read()
+    if (not is_complete_csv(text)):
+        return None
+
+    board = new_board(board_type)
+    rows = csv.reader(io.StringIO(text, newline=None))
+    head = list(itertools.islice(rows, HEADER_SCAN_ROWS))
+    board.set_columns(infer_layout(board_type, head)[2])
+    return parse_board(board, board_type, itertools.chain(head, rows))
+
+# The responses served at one time: a dictionary of request target ->
+# (body, ETag), built from the board objects. Never modified once built.
+class APIState:
+
+    # boards is a dictionary of board type -> (board object, time it was loaded).
+    def __init__(self, boards):
+        self.boards = boards
+        values = {}
+        for board_type, (board, loaded) in boards.items():
+            values.update(board_responses(board_type, board))
+
+        values["/"] = {"endpoints": sorted(target for target in values if not target.startswith("/lvr/") or
+                                           target == "/lvr/summary") + ["/lvr/{id}"],
+                       "loaded": {board_type: time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(loaded))
+                                  for board_type, (board, loaded) in boards.items()}}
+        self.responses = {target: serialize(value) for target, value in values.items()}
+
+class BoardAPI:
+
+    def __init__(self, input_dir=".", poll_interval=2.0, settle=5.0):
+        self.input_dir = input_dir
+        self.poll_interval = poll_interval
+        self.paths = {board_type: os.path.join(input_dir, file_name) for board_type, file_name in BOARD_FILES.items()}
+        self.watcher = CSVWatcher(self.paths, settle)
+        self.state = APIState({})
+        self.num_requests = 0
+
+    # Parses the board types' files (in a worker thread), and swaps in the new state.
+    # Board types whose file is missing, incomplete or unparseable keep their
+    # previous board object. Returns the board types that were loaded.
+    async def reload(self, board_types):
+        loaded = {}
+        for board_type in board_types:
+            signature = file_signature(self.paths[board_type])
+            if (signature is None):
+                continue
+            try:
+                board = await asyncio.to_thread(load_board, board_type, self.paths[board_type])
+            except (OSError, UnicodeDecodeError, LayoutError) as error:
+                print(time.strftime("%H:%M:%S") + " Can't load " + self.paths[board_type] + ": " + str(error), flush=True)
+                self.watcher.done(board_type, signature)
+                continue
+            if (board is None):
+                print(time.strftime("%H:%M:%S") + " " + self.paths[board_type] + " is still being written, waiting",
+                      flush=True)
+                self.watcher.defer(board_type, time.monotonic())
+                continue
+            loaded[board_type] = (board, time.time())
+            self.watcher.done(board_type, signature)
+
+        if (loaded):
+            boards = dict(self.state.boards)
+            boards.update(loaded)
+            self.state = await asyncio.to_thread(APIState, boards)
+        return list(loaded)
+
+    # Polls the CSV files, reloading the ones that changed.
+    async def watch(self):
+        while (True):
+            await asyncio.sleep(self.poll_interval)
+            changed = [board_type for board_type, signature in self.watcher.poll(time.monotonic())]
+            if (changed):
+                for board_type in await self.reload(changed):
+                    print(time.strftime("%H:%M:%S") + " Reloaded " + self.paths[board_type], flush=True)
+
+    # Support function. Writes one response.
+    async def respond(self, writer, status, body=b"", etag=None, keep_alive=True, head_only=False):
+        lines = ["HTTP/1.1 " + str(status) + " " + STATUS_TEXT[status]]
+        if (etag is not None):
+            lines.append("ETag: " + etag)
+            lines.append("Cache-Control: no-cache")
+        if (status != 304):
+            lines.append("Content-Type: application/json")
+            lines.append("Content-Length: " + str(len(body)))
+        lines.append("Connection: " + ("keep-alive" if keep_alive else "close"))
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if (status != 304 and not head_only):
+            writer.write(body)
+        await writer.drain()
+
+    # Support function. Answers one request, given its request line and headers.
+    # Returns whether the connection can be kept open.
+    async def answer(self, writer, request_line, headers):
+        parts = request_line.split()
+        if (len(parts) != 3 or not parts[2].startswith("HTTP/")):
+            body, etag = serialize({"error": "bad request line"})
+            await self.respond(writer, 400, body, keep_alive=False)
+            return False
+
+        method, target, version = parts
+        connection = headers.get("connection", "").lower()
+        keep_alive = (connection != "close") if (version == "HTTP/1.1") else (connection == "keep-alive")
+        if (method not in ("GET", "HEAD")):
+            body, etag = serialize({"error": "only GET and HEAD are supported"})
+            await self.respond(writer, 405, body, keep_alive=keep_alive)
+            return keep_alive
+
+        # Requests in flight keep the state they started with.
+        state = self.state
+        url = urllib.parse.urlsplit(target)
+        path = urllib.parse.unquote(url.path).rstrip("/") or "/"
+        query = urllib.parse.parse_qs(url.query)
+        if ("type" in query):
+            path += "?type=" + query["type"][-1].strip().upper()
+
+        self.num_requests += 1
+        response = state.responses.get(path)
+        if (response is None):
+            body, etag = serialize({"error": "not found", "path": path})
+            await self.respond(writer, 404, body, keep_alive=keep_alive, head_only=(method == "HEAD"))
+            return keep_alive
+
+        body, etag = response
+        if_none_match = headers.get("if-none-match")
+        if (if_none_match is not None and (if_none_match.strip() == "*" or
+                                           etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")))):
+            await self.respond(writer, 304, etag=etag, keep_alive=keep_alive)
+        else:
+            await self.respond(writer, 200, body, etag, keep_alive, head_only=(method == "HEAD"))
+        return keep_alive
+
+    # Serves the requests of one connection, until the client closes it
+    # (or asks to), or it has been idle for KEEP_ALIVE_TIMEOUT seconds.
+    async def handle_connection(self, reader, writer):
+        try:
+            while (True):
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT)
+                except asyncio.LimitOverrunError:
+                    body, etag = serialize({"error": "request head too large"})
+                    await self.respond(writer, 431, body, keep_alive=False)
+                    break
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+                    break
+
+                lines = head.decode("latin-1").split("\r\n")
+                headers = {}
+                for line in lines[1:]:
+                    name, separator, value = line.partition(":")
+                    if (separator):
+                        headers[name.strip().lower()] = value.strip()
+                if (not await self.answer(writer, lines[0], headers)):
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    # Loads the boards, then serves them on host:port until cancelled.
+    # ready, if given, is a future that is set to the address listened on
+    # (with port 0, the port picked by the system) once requests are accepted.
+    async def serve(self, host="127.0.0.1", port=8080, ready=None):
+        await self.reload([board_type for board_type, path in self.paths.items() if os.path.exists(path)])
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_REQUEST_HEAD)
+        watch_task = asyncio.create_task(self.watch())
+        try:
+            address = server.sockets[0].getsockname()
+            print("Serving " + ", ".join(sorted(self.state.boards)) + " on http://" + address[0] + ":" +
+                  str(address[1]) + "/", flush=True)
+            if (ready is not None):
+                ready.set_result(address)
+            async with server:
+                await server.serve_forever()
+        finally:
+            watch_task.cancel()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serves the parsed boards as a JSON API, reloading them when the CSV files change.")
+    parser.add_argument("--input-dir", default=".", help="directory containing the CSV_*.csv files (default: current directory)")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="port to listen on (default: 8080, 0 for any free port)")
+    parser.add_argument("--poll-interval", type=float, default=2.0, metavar="SECONDS",
+                        help="seconds between the polls of the CSV files (default: 2)")
+    parser.add_argument("--settle", type=float, default=5.0, metavar="SECONDS",
+                        help="seconds a changed file's size and modification time have to stay the same "
+                             "before it's reloaded (default: 5)")
+    args = parser.parse_args(argv)
+
+    if (not any(os.path.exists(os.path.join(args.input_dir, file_name)) for file_name in BOARD_FILES.values())):
+        sys.exit("No CSV files found in " + args.input_dir)
+
+    api = BoardAPI(args.input_dir, args.poll_interval, args.settle)
+    try:
+        asyncio.run(api.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return api
+
+if (__name__ == "__main__"):
+    main()
@@ -0,0 +1,447 @@
+# Burn-in analytics.
+# Reads the burn-in columns of the LVR CSV (SBC_Crate, Start_Time and
+# End_Time), to find where the LVR production line is held up:
+# - the burn-in duration of each LVR,
+# - the occupancy timeline and utilization of each burn-in crate,
+# - the number of burn-ins started and finished per day (throughput),
+# - the queue between initial QA and burn-in: the LVRs that passed
+#   Initial_QA but haven't started burn-in, and with --snapshots (dated
+#   copies of the database, see Backfill.py), how long each LVR waited
+#   between passing Initial_QA and starting burn-in.
+# The results are written as JSON, and drawn as charts.
+#
+# The times are written as "3:00:00 PM 03/10", without a year (see --year).
+# They're parsed in one batch: a single regular expression pass over all
+# the values of a column, then NumPy arithmetic on the resulting fields.
+#
+# The CSV has no crate number (SBC_Crate only says whether the LVR is in
+# its crate), so each Location's SBC crate is treated as one burn-in station.
+
+import argparse
+import concurrent.futures
+import datetime
+import json
+import os
+import re
+import sys
+
+import numpy as np
+
+from Backfill import find_snapshots, snapshot_date
+from Database_Parser_and_Analyzer import (BOARD_FILES, board_records, check_yes, get_QA_rule, new_board,
+                                          parse_board_file, render_charts)
+
+# One value of Start_Time/End_Time per line: hour, minute, second,
+# AM/PM, month, day and year (the year and seconds are optional).
+# Lines that aren't a time match the second alternative, so findall()
+# returns exactly one tuple per line, all blank for those lines.
+pattern_burn_in_time = re.compile('^[ \\t]*(?:(\\d{1,2}):(\\d{2})(?::(\\d{2}))?[ \\t]*([AaPp])[Mm][ \\t]+'
+                                  '(\\d{1,2})/(\\d{1,2})(?:/(\\d{4}|\\d{2}))?[ \\t]*$|[^\\n]*$)', re.MULTILINE)
+
+# An End_Time before its Start_Time is taken to be in the next year
+# if the burn-in then lasted at most this many days (i.e. 11:00 PM 12/31
+# to 9:00 AM 01/02); otherwise it's reported as an issue.
+MAX_WRAPPED_DAYS = 31
+
+# Bins of the burn-in duration chart, in hours.
+DURATION_BINS = [0, 12, 24, 36, 48, 72, 96, 144]
+
+# A station whose crate was full for at least this fraction of the time
+# while LVRs were queued is reported as the bottleneck.
+BOTTLENECK_UTILIZATION = 0.85
+
+STATION_COLORS = ['gold', 'yellowgreen', 'lightcoral', 'lightskyblue', 'violet', 'orange', 'tan']
+
+# Parses Start_Time/End_Time values in one batch.
+# year is used for the values that don't have one.
+# Returns (array of numpy.datetime64[s], NaT for the values that aren't a valid time,
+#          boolean array, True for the values that aren't blank but aren't a valid time).
+def parse_burn_in_times(values, year):
+    if (not values):
+        return np.array([], dtype='datetime64[s]'), np.array([], dtype=bool)
+
+    text = "\n".join(value.replace("\n", " ").replace("\r", " ") for value in values)
+    fields = np.array(pattern_burn_in_time.findall(text), dtype=str).reshape(len(values), 7)
+    matched = fields[:, 0] != ""
+
+    numbers = np.where(fields == "", "0", fields)
+    hour, minute, second, month, day, years = (numbers[:, column].astype(np.int64) for column in (0, 1, 2, 4, 5, 6))
+    years = np.where(fields[:, 6] == "", year, np.where(years < 100, years + 2000, years))
+
+    valid = matched & (hour >= 1) & (hour <= 12) & (minute < 60) & (second < 60) & (month >= 1) & (month <= 12)
+    valid &= (day >= 1)
+    hour = hour % 12 + np.where(np.char.upper(fields[:, 3]) == "P", 12, 0)
+    months = ((years - 1970) * 12 + np.clip(month, 1, 12) - 1).astype('datetime64[M]')
+    month_length = ((months + 1).astype('datetime64[D]') - months.astype('datetime64[D]')).astype(np.int64)
+    valid &= (day <= month_length)
+
+    times = (months.astype('datetime64[D]') + (day - 1)).astype('datetime64[s]') + (hour * 3600 + minute * 60 + second)
+    times[~valid] = np.datetime64('NaT')
+    blank = np.char.strip(np.array(values, dtype=str)) == ""
+    return times, ~valid & ~blank
+
+# Support function. Hours between two arrays of times.
+def hours_between(starts, ends):
+    return (ends - starts).astype('timedelta64[s]').astype(np.int64) / 3600.0
+
+# Support function. Converts a numpy.datetime64 to an ISO string (for JSON).
+def iso(time):
+    return str(time.astype('datetime64[s]')).replace("T", " ")
+
+# Returns the burn-in columns of a parsed LVR board object as a dictionary of arrays,
+# one entry per LVR (sorted by ID): ID, Location, in_crate (SBC_Crate),
+# passed_QA (Initial_QA), start and end (numpy.datetime64, NaT if blank),
+# and a list of issues.
+def burn_in_table(board, year):
+    columns = board.get_columns()
+    rule = get_QA_rule("LVR", "Initial_QA")
+    records = sorted(board_records(board, "LVR").items(), key=lambda item: (len(item[0]), item[0]))
+    rows = [row for key, (group, row) in records]
+
+    table = {
+        "ID": [key for key, record in records],
+        "Location": np.array([row[columns["Location"]].strip() or "(none)" for row in rows], dtype=object),
+        "in_crate": np.array([check_yes(row[columns["SBC_Crate"]].strip()) for row in rows], dtype=bool),
+        "passed_QA": np.array([bool(rule.check(row, columns)) for row in rows], dtype=bool),
+        "issues": [],
+    }
+
+    start_values = [row[columns["Start_Time"]] for row in rows]
+    end_values = [row[columns["End_Time"]] for row in rows]
+    starts, bad_starts = parse_burn_in_times(start_values, year)
+    ends, bad_ends = parse_burn_in_times(end_values, year)
+
+    # End times that only make sense in the next year.
+    next_ends, bad_next_ends = parse_burn_in_times(end_values, year + 1)
+    wrapped = (ends < starts) & (next_ends - starts <= np.timedelta64(MAX_WRAPPED_DAYS, 'D'))
+    ends = np.where(wrapped, next_ends, ends)
+
+    for index in np.flatnonzero(bad_starts):
+        table["issues"].append({"issue": "bad_start_time", "LVR": table["ID"][index], "value": start_values[index]})
+    for index in np.flatnonzero(bad_ends):
+        table["issues"].append({"issue": "bad_end_time", "LVR": table["ID"][index], "value": end_values[index]})
+    for index in np.flatnonzero(ends < starts):
+        table["issues"].append({"issue": "end_before_start", "LVR": table["ID"][index],
+                                "start": start_values[index], "end": end_values[index]})
+    for index in np.flatnonzero(np.isnat(starts) & ~np.isnat(ends)):
+        table["issues"].append({"issue": "end_without_start", "LVR": table["ID"][index], "end": end_values[index]})
+
+    # Burn-ins that can't be placed on a timeline are left out.
+    dropped = (ends < starts) | np.isnat(starts)
+    table["start"] = np.where(dropped, np.datetime64('NaT'), starts)
+    table["end"] = np.where(dropped, np.datetime64('NaT'), ends)
+    return table
+
+# Occupancy of a burn-in station over time, from the start and end times of
+# its burn-ins (end NaT for the ones still running, which are counted until as_of).
+# Returns (array of times, array of the number of LVRs burning in from each time on).
+def occupancy_timeline(starts, ends, as_of):
+    ends = np.where(np.isnat(ends), np.maximum(starts, as_of), ends)
+    times = np.concatenate([starts, ends])
+    steps = np.concatenate([np.ones(len(starts), dtype=np.int64), -np.ones(len(ends), dtype=np.int64)])
+
+    # At equal times, burn-ins ending are counted before the ones starting.
+    order = np.lexsort((steps, times))
+    times = times[order]
+    occupancy = np.cumsum(steps[order])
+
+    # Keeps the last step at each time.
+    last = np.append(times[1:] != times[:-1], True)
+    return times[last], occupancy[last]
+
+# Statistics of one burn-in station. slots is the number of LVRs its crate
+# holds (None to use the most it held at once).
+def station_stats(starts, ends, in_crate, waiting, as_of, slots=None):
+    times, occupancy = occupancy_timeline(starts, ends, as_of)
+    durations = hours_between(times[:-1], times[1:])
+    span = float(durations.sum())
+    LVR_hours = float((durations * occupancy[:-1]).sum())
+    idle = durations[occupancy[:-1] == 0]
+    capacity = slots or int(occupancy.max())
+
+    return {
+        "LVRs": int(len(starts)),
+        "running": int(np.isnat(ends).sum()),
+        "in_crate": int(in_crate),
+        "waiting": int(waiting),
+        "first_start": iso(times[0]),
+        "last_event": iso(times[-1]),
+        "span_hours": span,
+        "LVR_hours": LVR_hours,
+        "busy_hours": span - float(idle.sum()),
+        "idle_hours": float(idle.sum()),
+        "idle_gaps": int(len(idle)),
+        "longest_idle_hours": float(idle.max()) if len(idle) else 0.0,
+        "mean_occupancy": LVR_hours / span if (span > 0) else 0.0,
+        "max_occupancy": int(occupancy.max()),
+        "slots": capacity,
+        "full_fraction": float(durations[occupancy[:-1] >= capacity].sum()) / span if (span > 0) else 0.0,
+        "utilization": LVR_hours / (capacity * span) if (span > 0) else 0.0,
+        "timeline": [[iso(time), int(count)] for time, count in zip(times, occupancy)],
+    }
+
+# Support function. Counts of an array of times per day, from the first day to the last.
+def per_day(times, first, last):
+    days = np.arange(first, last + 1)
+    counts = np.bincount((times.astype('datetime64[D]') - first).astype(np.int64), minlength=len(days))
+    return {str(day): int(count) for day, count in zip(days, counts)}
+
+# Process pool task. IDs of the LVRs passing Initial_QA in one snapshot directory.
+def snapshot_passed_QA(snapshot_dir):
+    path = os.path.join(snapshot_dir, BOARD_FILES["LVR"])
+    if (not os.path.exists(path)):
+        return set()
+
+    board = new_board("LVR")
+    parse_board_file(board, "LVR", path)
+    columns = board.get_columns()
+    rule = get_QA_rule("LVR", "Initial_QA")
+    return {key for key, (group, row) in board_records(board, "LVR").items() if rule.check(row, columns)}
+
+# Dates the LVRs passed Initial_QA, from the dated snapshot directories under
+# root (see Backfill.find_snapshots()): the date of the first snapshot each
+# LVR passes in. Snapshots without a date in their name are skipped.
+# Returns a dictionary of LVR ID -> numpy.datetime64[s] (midnight of that date).
+def initial_QA_dates(root, workers=None):
+    snapshots = [path for path in find_snapshots(root) if snapshot_date(path) is not None]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        passed = list(pool.map(snapshot_passed_QA, snapshots))
+
+    dates = {}
+    for snapshot, LVR_ids in zip(snapshots, passed):
+        for LVR_id in LVR_ids:
+            dates.setdefault(LVR_id, np.datetime64(snapshot_date(snapshot), 's'))
+    return dates
+
+# Support function. Summary statistics of an array of hours.
+def describe_hours(hours):
+    if (len(hours) == 0):
+        return {"count": 0}
+    return {"count": int(len(hours)), "mean": float(hours.mean()), "median": float(np.median(hours)),
+            "p90": float(np.percentile(hours, 90)), "min": float(hours.min()), "max": float(hours.max())}
+
+# Analyzes the burn-ins of a parsed LVR board object.
+# year      - year of the times that don't have one.
+# as_of     - numpy.datetime64 the running burn-ins are counted until
+#             (default: the latest time in the CSV).
+# slots     - LVRs a crate holds (default: the most each held at once).
+# QA_dates  - dictionary of LVR ID -> date it passed Initial_QA (see initial_QA_dates()).
+# Returns the results as a dictionary.
+def analyze_burn_in(board, year, as_of=None, slots=None, QA_dates=None):
+    table = burn_in_table(board, year)
+    starts = table["start"]
+    ends = table["end"]
+    started = ~np.isnat(starts)
+    finished = started & ~np.isnat(ends)
+    waiting = table["passed_QA"] & ~started
+
+    if (as_of is None):
+        known = np.concatenate([starts[started], ends[finished]])
+        as_of = known.max() if len(known) else np.datetime64(datetime.datetime.now().replace(microsecond=0), 's')
+
+    durations = hours_between(starts[finished], ends[finished])
+    result = {
+        "year": year,
+        "as_of": iso(as_of),
+        "LVRs": [{"ID": table["ID"][index], "Location": table["Location"][index],
+                  "start": iso(starts[index]), "end": None if np.isnat(ends[index]) else iso(ends[index]),
+                  "hours": None if np.isnat(ends[index]) else float(hours_between(starts[index], ends[index]))}
+                 for index in np.flatnonzero(started)],
+        "durations": describe_hours(durations),
+        "stations": {},
+        "throughput": {},
+        "queue": {"waiting": [table["ID"][index] for index in np.flatnonzero(waiting)]},
+        "issues": table["issues"],
+    }
+
+    for station in sorted(set(table["Location"])):
+        at_station = table["Location"] == station
+        if (not (started & at_station).any()):
+            continue
+        result["stations"][station] = station_stats(starts[started & at_station], ends[started & at_station],
+                                                    (table["in_crate"] & at_station).sum(),
+                                                    (waiting & at_station).sum(), as_of, slots)
+
+    if (started.any()):
+        first = starts[started].min().astype('datetime64[D]')
+        last = max(as_of, ends[finished].max() if finished.any() else as_of).astype('datetime64[D]')
+        finished_per_day = per_day(ends[finished], first, last)
+        result["throughput"] = {"started": per_day(starts[started], first, last), "finished": finished_per_day,
+                                "mean_finished_per_day": sum(finished_per_day.values()) / len(finished_per_day)}
+
+    if (QA_dates is not None):
+        QA_times = np.array([QA_dates.get(LVR_id, np.datetime64('NaT')) for LVR_id in table["ID"]],
+                            dtype='datetime64[s]')
+        known = started & ~np.isnat(QA_times)
+        # The snapshots only bound the QA date from above, so a burn-in can appear to start before it.
+        waits = np.maximum(hours_between(QA_times[known], starts[known]), 0.0)
+        ages = hours_between(QA_times[waiting & ~np.isnat(QA_times)], as_of)
+        result["queue"]["wait_hours"] = describe_hours(waits)
+        result["queue"]["waiting_hours"] = describe_hours(ages)
+        result["queue"]["waits"] = {table["ID"][index]: float(wait) for index, wait in zip(np.flatnonzero(known), waits)}
+
+    result["bottleneck"] = find_bottleneck(result)
+    return result
+
+# Names the likely bottleneck of the line from the results of analyze_burn_in():
+# the burn-in stations if their crates were full most of the time while LVRs
+# were queued for them, and the steps before burn-in if the crates sat idle
+# with no LVRs queued.
+def find_bottleneck(result):
+    stations = result["stations"]
+    if (not stations):
+        return "No burn-ins recorded"
+
+    full = [station for station, stats in stations.items()
+            if stats["full_fraction"] >= BOTTLENECK_UTILIZATION and stats["waiting"] > 0]
+    if (full):
+        return "Burn-in: the crates at " + ", ".join(full) + " were full most of the time with LVRs waiting"
+
+    starved = [station for station, stats in stations.items() if stats["waiting"] == 0 and stats["idle_hours"] > 0]
+    if (starved):
+        return ("Before burn-in: the crates at " + ", ".join(starved) +
+                " sat idle with no LVRs waiting after Initial_QA")
+    return "Burn-in handling: LVRs are waiting while the crates have free slots"
+
+# Charts of the results of analyze_burn_in(), saved into output_dir.
+def burn_in_charts(result, output_dir="."):
+    charts = []
+    hours = np.array([LVR["hours"] for LVR in result["LVRs"] if LVR["hours"] is not None])
+    if (len(hours)):
+        bins = DURATION_BINS + ([float(hours.max()) + 1] if hours.max() >= DURATION_BINS[-1] else [])
+        counts, edges = np.histogram(hours, bins=bins)
+        labels = ["%d-%d" % (low, high) for low, high in zip(DURATION_BINS, DURATION_BINS[1:])]
+        labels += ["%d+" % DURATION_BINS[-1]] * (len(counts) - len(labels))
+        charts.append({
+            "file_name": os.path.join(output_dir, "Burn_In_Durations.png"),
+            "kind": "bar",
+            "figsize": (16, 9),
+            "labels": labels,
+            "sizes": [int(count) for count in counts],
+            "colors": [STATION_COLORS[index % len(STATION_COLORS)] for index in range(len(counts))],
+            "title": "LVR Burn-In Duration",
+            "xlabel": "Hours",
+            "ylabel": "LVRs",
+        })
+
+    if (result["stations"]):
+        charts.append({
+            "file_name": os.path.join(output_dir, "Burn_In_Occupancy.png"),
+            "kind": "timeline",
+            "figsize": (16, 9),
+            "series": [{"label": station,
+                        "x": [datetime.datetime.fromisoformat(time) for time, count in stats["timeline"]],
+                        "y": [count for time, count in stats["timeline"]]}
+                       for station, stats in result["stations"].items()],
+            "title": "SBC Crate Occupancy",
+            "xlabel": "Time",
+            "ylabel": "LVRs burning in",
+        })
+
+    if (result["throughput"]):
+        days = [datetime.datetime.fromisoformat(day) for day in result["throughput"]["finished"]]
+        charts.append({
+            "file_name": os.path.join(output_dir, "Burn_In_Throughput.png"),
+            "kind": "timeline",
+            "figsize": (16, 9),
+            "series": [{"label": name.capitalize(), "x": days, "y": list(result["throughput"][name].values())}
+                       for name in ["started", "finished"]],
+            "title": "LVR Burn-Ins per Day",
+            "xlabel": "Day",
+            "ylabel": "LVRs",
+        })
+    return charts
+
+# Formats the results of analyze_burn_in() as text.
+def text_report(result):
+    lines = []
+    durations = result["durations"]
+    lines.append("Burn-ins: " + str(len(result["LVRs"])) + " started, " + str(durations["count"]) + " finished (as of " +
+                 result["as_of"] + ")")
+    if (durations["count"]):
+        lines.append("Duration (hours): mean %.1f, median %.1f, 90th percentile %.1f, max %.1f" %
+                     (durations["mean"], durations["median"], durations["p90"], durations["max"]))
+    if (result["throughput"]):
+        lines.append("Throughput: %.2f LVRs finished per day" % result["throughput"]["mean_finished_per_day"])
+
+    lines.append("")
+    lines.append("Station       LVRs  Running  Waiting  Slots  Utilization  Full  Idle (h)  Longest idle (h)")
+    for station, stats in result["stations"].items():
+        lines.append("%-12s %5d %8d %8d %6d %11.1f%% %4.0f%% %9.1f %17.1f" %
+                     (station, stats["LVRs"], stats["running"], stats["waiting"], stats["slots"],
+                      stats["utilization"] * 100, stats["full_fraction"] * 100, stats["idle_hours"],
+                      stats["longest_idle_hours"]))
+
+    lines.append("")
+    queue = result["queue"]
+    lines.append("Queue: " + str(len(queue["waiting"])) + " LVRs passed Initial_QA and are waiting for burn-in")
+    if (queue.get("wait_hours", {}).get("count")):
+        lines.append("Wait from Initial_QA to burn-in (hours): mean %.1f, median %.1f, 90th percentile %.1f" %
+                     (queue["wait_hours"]["mean"], queue["wait_hours"]["median"], queue["wait_hours"]["p90"]))
+    if (queue.get("waiting_hours", {}).get("count")):
+        lines.append("Waiting since Initial_QA (hours): mean %.1f, median %.1f, longest %.1f" %
+                     (queue["waiting_hours"]["mean"], queue["waiting_hours"]["median"], queue["waiting_hours"]["max"]))
+    lines.append("Bottleneck: " + result["bottleneck"])
+
+    if (result["issues"]):
+        lines.append("")
+        lines.append(str(len(result["issues"])) + " issues")
+        for issue in result["issues"]:
+            lines.append("- LVR " + issue["LVR"] + ": " + issue["issue"] + " (" +
+                         ", ".join(str(value) for name, value in issue.items() if name not in ("issue", "LVR")) + ")")
+    return "\n".join(lines) + "\n"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyzes the LVR burn-in times: durations, crate occupancy, "
+                                                 "throughput and the queue before burn-in.")
+    parser.add_argument("--input-dir", default=".", help="directory containing CSV_LVR.csv (default: current directory)")
+    parser.add_argument("--year", type=int, default=None,
+                        help="year of the times, which don't have one (default: the year CSV_LVR.csv was last modified)")
+    parser.add_argument("--as-of", default=None, metavar="TIME",
+                        help="time the running burn-ins are counted until, i.e. 2020-03-12T17:00 "
+                             "(default: the latest time in the CSV)")
+    parser.add_argument("--slots", type=int, default=None,
+                        help="LVRs an SBC crate holds (default: the most each crate held at once)")
+    parser.add_argument("--snapshots", metavar="ROOT",
+                        help="directory of dated snapshots (see Backfill.py), to measure the wait after Initial_QA")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes parsing the snapshots (default: one per CPU)")
+    parser.add_argument("--json", default="Burn_In_Analytics.json", metavar="PATH",
+                        help="JSON file the results are written to ('-' for stdout, default: Burn_In_Analytics.json)")
+    parser.add_argument("--output-dir", default=".", help="directory the charts are saved to (default: current directory)")
+    parser.add_argument("--no-plots", action="store_true", help="don't draw the charts")
+    args = parser.parse_args(argv)
+
+    path = os.path.join(args.input_dir, BOARD_FILES["LVR"])
+    if (not os.path.exists(path)):
+        sys.exit("No " + BOARD_FILES["LVR"] + " in " + args.input_dir)
+    if (args.slots is not None and args.slots < 1):
+        parser.error("--slots has to be at least 1")
+
+    as_of = None
+    if (args.as_of is not None):
+        try:
+            as_of = np.datetime64(datetime.datetime.fromisoformat(args.as_of), 's')
+        except ValueError:
+            parser.error("can't parse --as-of '" + args.as_of + "'")
+    year = args.year or datetime.date.fromtimestamp(os.path.getmtime(path)).year
+
+    board = new_board("LVR")
+    parse_board_file(board, "LVR", path)
+    QA_dates = initial_QA_dates(args.snapshots, args.workers) if args.snapshots else None
+    result = analyze_burn_in(board, year, as_of, args.slots, QA_dates)
+
+    if (args.json == "-"):
+        json.dump(result, sys.stdout, indent=1)
+        sys.stdout.write("\n")
+    else:
+        with open(args.json, "w") as json_file:
+            json.dump(result, json_file, indent=1)
+        print(text_report(result), end="")
+
+    if (not args.no_plots):
+        render_charts(burn_in_charts(result, args.output_dir))
+    return result
+
+if (__name__ == "__main__"):
+    main()
@@ -0,0 +1,72 @@
+# Check of the header-driven column layouts (see infer_layout()).
+# Copies the CSV files of a directory with extra leading columns inserted
+# before the first one, parses both versions, and compares the parsed
+# records, QA masks and counters of each board type. Any difference means
+# some column is read at its absolute CSV index instead of relative to the
+# board's key column (see the set_columns() methods).
+# i.e.
+#   python Check_Layouts.py
+#   python Check_Layouts.py --input-dir path/to/generated/csvs --leading-columns 3   (see Synthetic_Database.py)
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+
+from Database_Parser_and_Analyzer import BOARD_FILES, board_records, load_snapshot
+
+# Counters of the boards, compared along with the records.
+COUNTERS = ["num_12A", "num_12M", "num_12S", "num_15M", "num_15S", "num_25A"]
+
+# Copies a CSV file, with num_columns filler columns inserted before the first one.
+def insert_leading_columns(path, output_path, num_columns):
+    with open(path, newline="") as csv_file, open(output_path, "w", newline="") as output:
+        writer = csv.writer(output)
+        for row in csv.reader(csv_file):
+            writer.writerow(["Yes"] * num_columns + row)
+
+# Support function. What is compared of a parsed board object.
+def parsed_summary(board, board_type):
+    return {
+        "records": board_records(board, board_type),
+        "QA_masks": dict(getattr(board, "QA_masks", {})),
+        "counters": {counter: getattr(board, counter) for counter in COUNTERS if hasattr(board, counter)},
+    }
+
+# Parses the CSV files of input_dir as they are and with leading columns inserted.
+# Returns a list of (board type, part that differs) pairs, empty if the layouts agree.
+def check_layouts(input_dir, num_columns=1, board_types=None):
+    board_types = board_types or list(BOARD_FILES)
+    with tempfile.TemporaryDirectory() as shifted_dir:
+        for board_type in board_types:
+            insert_leading_columns(os.path.join(input_dir, BOARD_FILES[board_type]),
+                                   os.path.join(shifted_dir, BOARD_FILES[board_type]), num_columns)
+        boards = load_snapshot(input_dir, board_types)
+        shifted_boards = load_snapshot(shifted_dir, board_types)
+
+    differences = []
+    for board_type in board_types:
+        summary = parsed_summary(boards[board_type], board_type)
+        shifted_summary = parsed_summary(shifted_boards[board_type], board_type)
+        for part in summary:
+            if (summary[part] != shifted_summary[part]):
+                differences.append((board_type, part))
+    return differences
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Checks that inserting leading CSV columns doesn't change the parsed boards.")
+    parser.add_argument("--input-dir", default=".", help="directory containing the CSV_*.csv files (default: current directory)")
+    parser.add_argument("--leading-columns", type=int, default=1, metavar="N",
+                        help="columns inserted before the first one (default: 1)")
+    args = parser.parse_args(argv)
+
+    differences = check_layouts(args.input_dir, args.leading_columns)
+    for board_type, part in differences:
+        print(board_type + ": " + part + " differ with " + str(args.leading_columns) + " leading column(s)")
+    if (differences):
+        sys.exit(1)
+    print("The parsed boards are the same with " + str(args.leading_columns) + " leading column(s)")
+
+if (__name__ == "__main__"):
+    main()
@@ -1,26 +1,196 @@
 # Raymond's database parser.
 
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import copy
 import csv
+import hashlib
+import io
+import itertools
+import json
+import mmap
+import operator
+import os
+import pickle
 import re as re
-import matplotlib.pyplot as plt
-import numpy as np
-
-# regex pattern for DCB
-pattern_DCB = re.compile('^(WVJCE-)[\\d\\d\\d]')
-
-# regex patterns for LVR
-pattern_LVR_CZ = re.compile('^(WVJCZ-)[\\d\\d\\d]')
-pattern_LVR_EN = re.compile('^(WVJEN-)[\\d\\d\\d]')
-pattern_LVR_ER = re.compile('^(WVJER-)[\\d\\d\\d]')
-pattern_LVR_ES = re.compile('^(WVJES-)[\\d\\d\\d]')
-
-# regex patterns for CCM
-pattern_CCM_12A = re.compile('^(12A)[\\d|(\\d\\d)]')
-pattern_CCM_12M = re.compile('^(12M)[\\d|(\\d\\d)]')
-pattern_CCM_12S = re.compile('^(12S)[\\d|(\\d\\d)]')
-pattern_CCM_15M = re.compile('^(15M)[\\d|(\\d\\d)]')
-pattern_CCM_15S = re.compile('^(15S)[\\d|(\\d\\d)]')
-pattern_CCM_25A = re.compile('^(25A)[\\d|(\\d\\d)]')
+import sys
+import time
+
+# matplotlib and NumPy are only needed for the plots,
+# so they are imported inside the pyplot() methods instead of here.
+# Importing this module (or running it with --no-plots) then
+# doesn't pay for their start-up time.
+
+# Board-spec registry.
+# Each board type declares which column identifies a valid row,
+# the prefixes accepted in that column, and how a valid row
+# is routed to the update methods of the board's class.
+# The specs are compiled by BoardClassifier into a single regex
+# (one named group per prefix) and a routing dictionary,
+# so each row of a CSV is classified with one lookup.
+#
+# key_column      - column (see the *_columns dictionaries) holding the identifier.
+# column_offset   - attribute of the board holding the offset passed to get_idx(),
+#                   for boards whose column indices are relative to the key column.
+# prefixes        - accepted prefixes of the identifier.
+# key_suffix      - regex that has to follow the prefix.
+# exact_match     - the identifier has to equal one of the prefixes (no regex needed).
+# positional_keys - the dictionaries are keyed by position, not by identifier (see ParseCache).
+# record_key      - columns identifying a board across snapshots (see board_records()).
+# record_fallback - columns used instead, numbered, for boards with a blank record_key.
+# required_column - column that has to be filled in for the row to count.
+# prefix_routes   - prefix -> update methods, for boards split by identifier.
+# subtype_column  - column whose value picks the route, for boards split by a status.
+# subtype_routes  - value of subtype_column -> update methods.
+# default_route   - update methods for values not listed in subtype_routes.
+# header          - [column, header text] pairs, in the order of the columns in the CSV,
+#                   used to find the header row and build the columns dictionary from it
+#                   (see infer_layout()). A header cell matches if it starts with the text
+#                   (case and whitespace insensitive). A column with no header text (None)
+#                   is the one just before the next column.
+#
+# A route is a pair of method names, [dictionary update, counter]:
+# the dictionary update method is passed the line,
+# the counter method is called without arguments.
+BOARD_SPECS = {
+    "DCB": {
+        "key_column": "Serial",
+        "column_offset": "row_offset",
+        "prefixes": ["WVJCE-"],
+        "key_suffix": "\\d",
+        "subtype_column": "Assembled",
+        "subtype_routes": {
+            "Yes": ["assembled_dict_update", "increment_total"],
+            "yes": ["assembled_dict_update", "increment_total"],
+            "": ["unassembled_dict_update", "increment_total"],
+        },
+        "default_route": ["other_dict_update", "increment_total"],
+        "record_key": ["Serial"],
+        "header": [["Serial", None], ["ID", "id"], ["Location", "location"], ["Assembled", "assembled"],
+                   ["Fused", "fused"], ["PRBS", "prbs"], ["1.5V", "1.5v"], ["2.5V", "2.5v"],
+                   ["Burned_In", "burned in"], ["Stave_Test_JD10", "stave test slot jd10"],
+                   ["Stave_Test_JD11", "stave test slot jd11"], ["Comments", "comments"]],
+    },
+    "LVR": {
+        "key_column": "Serial",
+        "column_offset": "row_offset",
+        "prefixes": ["WVJCZ-", "WVJEN-", "WVJER-", "WVJES-"],
+        "key_suffix": "\\d",
+        "subtype_column": "LVR_Type",
+        "subtype_routes": {
+            "12A": ["dict_update_LVR_12A", "increment_total"],
+            "25A": ["dict_update_LVR_25A", "increment_total"],
+            "15MS": ["dict_update_LVR_15MS", "increment_total"],
+        },
+        "default_route": ["dict_update_LVR_other", "increment_total"],
+        "record_key": ["ID"],
+        "header": [["ID", "id"], ["Location", "location"], ["Serial", "serial - lvr"], ["CCM", "serial - ccms"],
+                   ["LVR_Type", "lvr type"], ["Voltage_Check", "1v5"], ["FPGA", "fpga"],
+                   ["Undervolt_Overtemp_Config", "undervolt + overtemp"], ["Undervolt_Test", "undervolt test"],
+                   ["Overtemp_Test", "overtemp test"], ["Output_Config", "output standby"],
+                   ["Sense_Line_Test", "sense line"], ["SPI_Test", "spi test"], ["QA_OK", "qa ok"],
+                   ["Assembled", "assembled"], ["SBC_Crate", "in sbc crate"], ["Start_Time", "start time"],
+                   ["End_Time", "end time"], ["Final_QA", "final qa"], ["Subtype", "subtype"], ["Comment", "comments"]],
+    },
+    "CCM": {
+        "key_column": "Roll_ID",
+        "column_offset": "row_offset",
+        "prefixes": ["12A", "12M", "12S", "15M", "15S", "25A"],
+        "key_suffix": "[\\d|(\\d\\d)]",
+        "required_column": "Good_Count",
+        "prefix_routes": {
+            "12A": ["dict_update_12A", "increment_total"],
+            "12M": ["dict_update_12M", "increment_total"],
+            "12S": ["dict_update_12S", "increment_total"],
+            "15M": ["dict_update_15M", "increment_total"],
+            "15S": ["dict_update_15S", "increment_total"],
+            "25A": ["dict_update_25A", "increment_total"],
+        },
+        "record_key": ["Roll_ID"],
+        # Comment is the "CCM Usage (what CCMs being used for)" column.
+        "header": [["Roll_ID", "roll id"], ["Location", "location"], ["CCM_Type", "ccm type"],
+                   ["Master_or_Slave", "master or slave"], ["Original_Count", "original"],
+                   ["Good_Count", "good ccms"], ["Usage", "ccms being used"], ["Comment", "ccm usage"]],
+    },
+    "Backplane": {
+        "key_column": "Type",
+        "column_offset": "row_offset",
+        "prefixes": ["True", "Mirror"],
+        "exact_match": True,
+        "positional_keys": True,
+        "prefix_routes": {
+            "True": ["update_true_backplanes", "increment_num_true_backplanes"],
+            "Mirror": ["update_mirror_backplanes", "increment_num_mirror_backplanes"],
+        },
+        "record_key": ["Type", "SN"],
+        "record_fallback": ["Type", "Variant"],
+        "header": [["Type", "type"], ["Variant", "variant"], ["SN", "sn"], ["ID", "id"], ["Location", "location"],
+                   ["Visual_Inspection", "visual inspection"], ["Burn_In", "burn-in"], ["QA", "qa"],
+                   ["Assembly", "assembly"], ["Note", "notes"]],
+    },
+}
+
+# The 8 steps of the LVR initial QA, as named in LVR_columns.
+# An LVR is initial QA'd if every one of them is "Yes".
+LVR_INITIAL_QA_STEPS = [
+    "Voltage_Check",
+    "FPGA",
+    "Undervolt_Overtemp_Config",
+    "Undervolt_Test",
+    "Overtemp_Test",
+    "Output_Config",
+    "Sense_Line_Test",
+    "SPI_Test",
+]
+
+# QA checklists, as (step, check) pairs in bit order:
+# bit 0 is the first step, bit 1 the second, and so on.
+# check "yes"    - the step passed if the column is "Yes" or "yes".
+# check "filled" - the step passed if the column isn't blank (i.e. a recorded measurement).
+DCB_QA_CHECKLIST = [
+    ("Fused", "yes"),
+    ("PRBS", "yes"),
+    ("1.5V", "filled"),
+    ("2.5V", "filled"),
+    ("Burned_In", "yes"),
+    ("Stave_Test_JD10", "yes"),
+    ("Stave_Test_JD11", "yes"),
+]
+
+LVR_QA_CHECKLIST = [(step, "yes") for step in LVR_INITIAL_QA_STEPS]
+
+# QA definitions, per board type and stage.
+# Each stage is a rule expression, compiled once by get_QA_rule()
+# into a predicate that is evaluated over every board of the type.
+# A rule is made of:
+# - yes(Column)           - the column is "Yes" or "yes" (see check_yes).
+# - filled(Column)        - the column isn't blank.
+# - equals(Column, Value) - the column is exactly Value.
+# - the name of another stage of the same board type.
+# - and, or, not, and parentheses.
+# Columns are named as in the board's columns dictionary.
+QA_RULES = {
+    "DCB": {
+        "Fused": "yes(Fused)",
+        "Initial_QA": "yes(Fused) and yes(PRBS) and filled(1.5V) and filled(2.5V)",
+        "Burned_In": "Initial_QA and yes(Burned_In)",
+        "Final_QA": "Burned_In and yes(Stave_Test_JD10) and yes(Stave_Test_JD11)",
+    },
+    "LVR": {
+        "Initial_QA": "yes(Voltage_Check) and yes(FPGA) and yes(Undervolt_Overtemp_Config)"
+                      " and yes(Undervolt_Test) and yes(Overtemp_Test) and yes(Output_Config)"
+                      " and yes(Sense_Line_Test) and yes(SPI_Test)",
+        "Burned_In": "Initial_QA and filled(Start_Time) and filled(End_Time)",
+        "Final_QA": "Initial_QA and yes(Final_QA)",
+    },
+    "Backplane": {
+        "Burned_In": "yes(Burn_In)",
+        "QA": "yes(QA)",
+        "Assembled": "yes(Assembly)",
+    },
+}
 
 # Support function. Checks if string is equal to "Yes" or "yes",
 # returning boolean True if so. Returns False otherwise.
@@ -30,6 +200,496 @@ def check_yes(target):
     else:
         return False
 
+# Compiles an entry of BOARD_SPECS against a board object
+# (which has to have its columns dictionary set already),
+# and classifies/routes the rows of the board's CSV file.
+class BoardClassifier:
+
+    def __init__(self, board, spec):
+        self.board = board
+        self.spec = spec
+
+        # Column indices, resolved once instead of once per row.
+        self.key_idx = self.column_idx(spec["key_column"])
+        self.required_idx = None
+        self.subtype_idx = None
+        if ("required_column" in spec):
+            self.required_idx = self.column_idx(spec["required_column"])
+        if ("subtype_column" in spec):
+            self.subtype_idx = self.column_idx(spec["subtype_column"])
+
+        # All prefixes are compiled into one alternation.
+        # Prefixes aren't valid group names ("12A"), so each
+        # prefix gets a group named after its position instead.
+        # Exact matches skip the regex, and use a dictionary lookup.
+        self.group_prefix = {}
+        self.exact_groups = None
+        alternatives = []
+        for number, prefix in enumerate(spec["prefixes"]):
+            group = "p" + str(number)
+            self.group_prefix[group] = prefix
+            alternatives.append("(?P<" + group + ">" + re.escape(prefix) + ")")
+
+        if (spec.get("exact_match")):
+            self.pattern = None
+            self.exact_groups = {prefix: group for group, prefix in self.group_prefix.items()}
+        else:
+            self.pattern = re.compile("^(?:" + "|".join(alternatives) + ")" + spec["key_suffix"])
+
+        # Routes are stored as bound methods of the board.
+        self.prefix_routes = {}
+        for group, prefix in self.group_prefix.items():
+            if (prefix in spec.get("prefix_routes", {})):
+                self.prefix_routes[group] = self.bind(spec["prefix_routes"][prefix])
+
+        self.subtype_routes = {}
+        for value, route in spec.get("subtype_routes", {}).items():
+            self.subtype_routes[value] = self.bind(route)
+        self.default_route = self.bind(spec.get("default_route"))
+
+    # Returns the array index of the named column,
+    # applying the board's column_offset if the spec has one.
+    def column_idx(self, column):
+        if ("column_offset" in self.spec):
+            return self.board.get_idx(column, getattr(self.board, self.spec["column_offset"]))
+        return self.board.get_idx(column)
+
+    # Turns a [dictionary update, counter] pair of method names
+    # into a tuple of bound methods. Returns None for an empty route.
+    def bind(self, route):
+        if (not route):
+            return None
+        return tuple(getattr(self.board, name) for name in route)
+
+    # Returns the (dictionary update, counter) methods the line is routed to,
+    # or None if the line isn't a valid row for this board.
+    def classify(self, line):
+        if (self.required_idx is not None and line[self.required_idx] == ''):
+            return None
+
+        if (self.exact_groups is not None):
+            group = self.exact_groups.get(line[self.key_idx])
+            if (group is None):
+                return None
+        else:
+            match = self.pattern.match(line[self.key_idx])
+            if (match is None):
+                return None
+            group = match.lastgroup
+
+        if (self.subtype_idx is not None):
+            return self.subtype_routes.get(line[self.subtype_idx], self.default_route)
+        return self.prefix_routes.get(group)
+
+    # Classifies the line, passes it to the dictionary update method
+    # it's routed to and calls the counter method.
+    # Returns True if the line was recorded.
+    def update(self, line):
+        route = self.classify(line)
+        if (route is None):
+            return False
+
+        dict_update, increment = route
+        dict_update(line)
+        increment()
+        return True
+
+# Support function. Resolves a QA checklist against a columns dictionary,
+# returning a list of (bit, column index, check) tuples for checklist_mask().
+def checklist_indices(checklist, columns):
+    return [(1 << number, columns[step], check) for number, (step, check) in enumerate(checklist)]
+
+# Support function. Returns the QA checklist of a row as an integer,
+# with the bit of each passed step set.
+def checklist_mask(row, indices):
+    mask = 0
+    for bit, idx, check in indices:
+        if (check == "yes"):
+            if (check_yes(row[idx])):
+                mask |= bit
+        elif (row[idx] != ''):
+            mask |= bit
+    return mask
+
+# Population-wide queries over the QA checklist bitmasks of a board type.
+# Every board is one entry of a NumPy array of masks, so each query
+# is a handful of bitwise operations over the whole array,
+# instead of a Python loop over the dictionaries.
+class ChecklistMasks:
+
+    # checklist - the board type's QA checklist (i.e. LVR_QA_CHECKLIST).
+    # groups    - list of (group name, dictionary of rows) pairs.
+    # masks     - dictionary of board key -> bitmask, recorded at ingest.
+    def __init__(self, checklist, groups, masks):
+        import numpy as np
+
+        self.steps = [step for step, check in checklist]
+        self.full = (1 << len(self.steps)) - 1
+
+        keys = []
+        group_labels = []
+        for group, dictionary in groups:
+            keys.extend(dictionary.keys())
+            group_labels.extend([group] * len(dictionary))
+
+        self.keys = np.array(keys, dtype=object)
+        self.groups = np.array(group_labels, dtype=object)
+        self.masks = np.array([masks[key] for key in keys], dtype=np.uint32)
+
+        # missing has the bit of each step that wasn't passed.
+        self.missing = self.full & ~self.masks
+
+        # Lookup tables over every possible mask:
+        # number of set bits, and position of the lowest set bit (-1 for none).
+        self.popcount = np.array([bin(value).count("1") for value in range(self.full + 1)], dtype=np.int32)
+        self.lowest_bit = np.array([(value & -value).bit_length() - 1 for value in range(self.full + 1)], dtype=np.int32)
+
+    # Returns the bits of the named steps, OR'ed together.
+    def bits(self, steps):
+        result = 0
+        for step in steps:
+            result |= 1 << self.steps.index(step)
+        return result
+
+    # Boolean array, True for the boards of the named group
+    # (or for every board if group is None).
+    def in_group(self, group):
+        import numpy as np
+
+        if (group is None):
+            return np.ones(len(self.keys), dtype=bool)
+        return self.groups == group
+
+    # Keys of the boards that passed every step.
+    def passed_all(self, group=None):
+        return list(self.keys[(self.missing == 0) & self.in_group(group)])
+
+    # Keys of the boards that passed every step except exactly the named ones,
+    # i.e. passed_all_except("SPI_Test") for the LVRs that only failed the SPI test.
+    def passed_all_except(self, *steps, group=None):
+        return list(self.keys[(self.missing == self.bits(steps)) & self.in_group(group)])
+
+    # Keys of the boards that didn't pass the named step.
+    def failed(self, step, group=None):
+        return list(self.keys[((self.missing & self.bits([step])) != 0) & self.in_group(group)])
+
+    # Keys of the boards that are missing exactly one step.
+    def missing_exactly_one(self, group=None):
+        return list(self.keys[(self.popcount[self.missing] == 1) & self.in_group(group)])
+
+    # Array with the position (in the checklist) of each board's
+    # first failing step, or -1 if it passed every step.
+    def first_failing_step(self):
+        return self.lowest_bit[self.missing]
+
+    # Returns a dictionary of group -> {step: number of boards whose first failing step it is}.
+    # Boards that passed every step are counted under "None".
+    def first_failure_histogram(self):
+        import numpy as np
+
+        first = self.first_failing_step()
+        result = {}
+        for group in dict.fromkeys(self.groups):
+            counts = np.bincount(first[self.groups == group] + 1, minlength=len(self.steps) + 1)
+            result[group] = {"None": int(counts[0])}
+            for number, step in enumerate(self.steps):
+                result[group][step] = int(counts[number + 1])
+        return result
+
+    def __len__(self):
+        return len(self.keys)
+
+# Optional columnar view of a board type's parsed dictionaries.
+# Holds one NumPy array per entry of the board's columns dictionary,
+# plus a "Group" column naming the dictionary each row came from
+# (i.e. "assembled" for a row of assembled_DCB).
+# Categorical (status) columns are stored as integer codes into
+# a list of categories, so that checks like "is Yes" become
+# a single vectorized comparison over every board at once.
+# The dictionaries remain the primary storage; see get_store()
+# in each board class for how the store is built and kept in sync.
+class ColumnarStore:
+
+    # columns     - the board's columns dictionary (name -> index in a row).
+    # groups      - list of (group name, dictionary of rows) pairs.
+    # categorical - names of the columns stored as categorical codes.
+    # numeric     - names of the columns stored as integers (blank/invalid -> 0).
+    def __init__(self, columns, groups, categorical, numeric=()):
+        import numpy as np
+
+        rows = []
+        group_labels = []
+        for group, dictionary in groups:
+            rows.extend(dictionary.values())
+            group_labels.extend([group] * len(dictionary))
+
+        self.num_rows = len(rows)
+        self.arrays = {}
+        self.categories = {}
+
+        for name, idx in columns.items():
+            values = [row[idx] if idx < len(row) else '' for row in rows]
+
+            if (name in numeric):
+                self.arrays[name] = np.array([to_int(value) for value in values], dtype=np.int64)
+            elif (name in categorical):
+                self.set_categorical(name, values)
+            else:
+                self.arrays[name] = np.array(values, dtype=object)
+
+        self.set_categorical("Group", group_labels)
+
+    # Stores a column as codes into its sorted list of categories.
+    def set_categorical(self, name, values):
+        import numpy as np
+
+        categories, codes = np.unique(np.array(values, dtype=str), return_inverse=True)
+        self.categories[name] = [str(category) for category in categories]
+        self.arrays[name] = codes.astype(np.int32).reshape(-1)
+
+    # Returns the array of the named column.
+    # For categorical columns, these are the codes.
+    def column(self, name):
+        return self.arrays[name]
+
+    # Returns a boolean array, True for the rows where
+    # the categorical column holds one of the given values.
+    def is_in(self, name, values):
+        import numpy as np
+
+        codes = [code for code, category in enumerate(self.categories[name]) if category in values]
+        return np.isin(self.arrays[name], codes)
+
+    # Boolean array, True where the column is "Yes" or "yes" (see check_yes).
+    def is_yes(self, name):
+        return self.is_in(name, ("Yes", "yes"))
+
+    # Boolean array, True where the column isn't blank.
+    def is_filled(self, name):
+        if (name in self.categories):
+            return ~self.is_in(name, ("",))
+        return self.arrays[name] != ''
+
+    # Boolean array, True for the rows from the named group.
+    def in_group(self, group):
+        return self.is_in("Group", (group,))
+
+    # Number of True entries of a boolean array.
+    def count(self, mask):
+        import numpy as np
+
+        return int(np.count_nonzero(mask))
+
+    def __len__(self):
+        return self.num_rows
+
+# A QA rule from QA_RULES, compiled into a pair of predicates:
+# mask(store)          - boolean array over every board of a ColumnarStore.
+# check(row, columns)  - boolean for a single row of a parsing dictionary.
+# Throws a ValueError if the rule can't be parsed.
+class QARule:
+
+    # Splits a rule into names, parentheses and commas.
+    token_pattern = re.compile("\\s*([(),]|[^\\s(),]+)")
+
+    # rules  - the board type's dictionary of stage -> rule expression.
+    # stage  - the stage to compile.
+    # parents - stages being compiled above this one, to catch circular rules.
+    def __init__(self, rules, stage, parents=()):
+        if (stage in parents):
+            raise ValueError("QA rule '" + stage + "' refers to itself")
+
+        self.rules = rules
+        self.stage = stage
+        self.parents = parents + (stage,)
+        self.tokens = self.token_pattern.findall(rules[stage])
+        self.pos = 0
+
+        self.mask_fn, self.check_fn = self.parse_or()
+        if (self.pos != len(self.tokens)):
+            self.error("unexpected '" + self.tokens[self.pos] + "'")
+
+    def mask(self, store):
+        return self.mask_fn(store)
+
+    def check(self, row, columns):
+        return self.check_fn(row, columns)
+
+    def error(self, message):
+        raise ValueError("QA rule '" + self.stage + "' (" + self.rules[self.stage] + "): " + message)
+
+    # Returns the next token, or "" at the end of the rule.
+    def peek(self):
+        if (self.pos < len(self.tokens)):
+            return self.tokens[self.pos]
+        return ""
+
+    def take(self, expected=None):
+        token = self.peek()
+        if (token == "" or (expected is not None and token != expected)):
+            self.error("expected '" + (expected or "a name") + "'")
+        self.pos += 1
+        return token
+
+    # expression := term ("or" term)*
+    def parse_or(self):
+        mask_fn, check_fn = self.parse_and()
+        while (self.peek() == "or"):
+            self.take()
+            right_mask, right_check = self.parse_and()
+            mask_fn = (lambda a, b: lambda store: a(store) | b(store))(mask_fn, right_mask)
+            check_fn = (lambda a, b: lambda row, columns: a(row, columns) or b(row, columns))(check_fn, right_check)
+        return mask_fn, check_fn
+
+    # term := factor ("and" factor)*
+    def parse_and(self):
+        mask_fn, check_fn = self.parse_not()
+        while (self.peek() == "and"):
+            self.take()
+            right_mask, right_check = self.parse_not()
+            mask_fn = (lambda a, b: lambda store: a(store) & b(store))(mask_fn, right_mask)
+            check_fn = (lambda a, b: lambda row, columns: a(row, columns) and b(row, columns))(check_fn, right_check)
+        return mask_fn, check_fn
+
+    # factor := "not" factor | "(" expression ")" | call | stage
+    def parse_not(self):
+        token = self.take()
+
+        if (token == "not"):
+            mask_fn, check_fn = self.parse_not()
+            return (lambda store: ~mask_fn(store)), (lambda row, columns: not check_fn(row, columns))
+
+        if (token == "("):
+            result = self.parse_or()
+            self.take(")")
+            return result
+
+        if (token in ("yes", "filled", "equals")):
+            self.take("(")
+            column = self.take()
+            value = None
+            if (token == "equals"):
+                self.take(",")
+                value = self.take()
+            self.take(")")
+            return self.compile_call(token, column, value)
+
+        if (token in self.rules):
+            stage = QARule(self.rules, token, self.parents)
+            return stage.mask_fn, stage.check_fn
+
+        self.error("unknown name '" + token + "'")
+
+    def compile_call(self, function, column, value):
+        if (function == "yes"):
+            return ((lambda store: store.is_yes(column)),
+                    (lambda row, columns: check_yes(row[columns[column]])))
+        if (function == "filled"):
+            return ((lambda store: store.is_filled(column)),
+                    (lambda row, columns: row[columns[column]] != ''))
+        return ((lambda store: store.is_in(column, (value,)) if column in store.categories
+                 else store.column(column) == value),
+                (lambda row, columns: row[columns[column]] == value))
+
+# Compiled QA rules, keyed by (board type, stage, rules of the board type),
+# so a rule is only recompiled if its definition in QA_RULES changes.
+QA_RULE_CACHE = {}
+
+# Returns the compiled QARule of a board type's stage (i.e. get_QA_rule("LVR", "Final_QA")).
+def get_QA_rule(board_type, stage):
+    rules = QA_RULES[board_type]
+    key = (board_type, stage, tuple(sorted(rules.items())))
+    if (key not in QA_RULE_CACHE):
+        QA_RULE_CACHE[key] = QARule(rules, stage)
+    return QA_RULE_CACHE[key]
+
+# Support function for the process_QA_stage methods.
+# Counts the boards of each group that pass a stage's QA rule,
+# over the columnar store if the board has it enabled,
+# or over the parsing dictionaries otherwise.
+# Returns a dictionary of group -> number of boards passed.
+def count_QA_stage(board, board_type, stage, columns):
+    with stage_timer(board_type, "QA_aggregation"):
+        rule = get_QA_rule(board_type, stage)
+        result = {}
+
+        if (board.columnar):
+            store = board.get_store()
+            passed = rule.mask(store)
+            for group, dictionary in board.get_groups():
+                result[group] = store.count(passed & store.in_group(group))
+            return result
+
+        for group, dictionary in board.get_groups():
+            number_passed = 0
+            for value in dictionary.values():
+                if (rule.check(value, columns)):
+                    number_passed += 1
+            result[group] = number_passed
+        return result
+
+# Support function. Converts a database entry into an integer,
+# returning 0 for blank or non-numeric entries.
+def to_int(target):
+    try:
+        return int(target)
+    except ValueError:
+        return 0
+
+# Compact board records.
+# The dictionaries store each board's row as a record: a tuple subclass
+# without a per-instance __dict__ (__slots__ = ()), with a named field for
+# each column of the board's columns dictionary (i.e. record.Location), so
+# a field can be read without a get_idx() lookup. Records index like the
+# list slices they replace (row[columns["Location"]]). The short cells
+# (Yes/yes, locations, types, Master/Slave, blanks) are interned as the
+# rows are recorded, so each distinct value is stored once instead of once
+# per board. Setting a board's compact variable to False before parsing
+# stores plain list slices instead (see Benchmark_Pipeline.py --memory).
+
+# Cells up to this length are interned.
+INTERN_MAX_LENGTH = 16
+
+# Record classes, by (board type, columns).
+RECORD_TYPES = {}
+
+class BoardRecord(tuple):
+    __slots__ = ()
+
+    # Set on the subclasses made by record_type().
+    record_name = None
+    record_columns = ()
+
+    # Records are pickled (by the parse caches) as their board type,
+    # columns and values, since their classes are made at run time.
+    def __reduce__(self):
+        return (rebuild_record, (self.record_name, self.record_columns, tuple(self)))
+
+# Returns the record class of a board type for a columns dictionary,
+# with a read-only field per column whose name is a valid identifier.
+def record_type(board_type, columns):
+    key = (board_type, tuple(sorted(columns.items())))
+    if (key not in RECORD_TYPES):
+        fields = {"__slots__": (), "record_name": board_type, "record_columns": key[1]}
+        for column, idx in columns.items():
+            if (column.isidentifier()):
+                fields[column] = property(operator.itemgetter(idx))
+        RECORD_TYPES[key] = type(board_type + "Record", (BoardRecord,), fields)
+    return RECORD_TYPES[key]
+
+# Support function. Unpickles a record.
+def rebuild_record(board_type, columns, values):
+    return record_type(board_type, dict(columns))(values)
+
+# Builds the record stored in a board's dictionaries from a slice of a row.
+def make_record(board, board_type, cells):
+    if (not board.compact):
+        return cells
+    if (board.record_class is None):
+        board.record_class = record_type(board_type, board.get_columns())
+    intern = sys.intern
+    return board.record_class([intern(cell) if len(cell) <= INTERN_MAX_LENGTH else cell for cell in cells])
+
 # Contains the data and methods used to parse and process
 # data from the CSV_DCB file. Performs relevant output
 # operations as well.
@@ -52,6 +712,12 @@ class DCB:
         self.assembled_DCB = {}
         self.other_DCB = {}
 
+        # QA checklist bitmask of each board (see checklist_mask()),
+        # keyed like the dictionaries above and recorded as the board is parsed.
+        # IMPORTANT - the checklist column indices are set with the columns dictionary.
+        self.QA_masks = {}
+        self.QA_checklist_idx = []
+
         # Dictionary for identifying which columns in each
         # row of the CSV file (and later dictionaries)
         # correspond to which categories.
@@ -59,6 +725,10 @@ class DCB:
         # for more details.
         self.DCB_columns = {} 
 
+        # Index of the "Serial" column in the CSV, which the
+        # DCB_columns indices are relative to (see get_idx()).
+        self.row_offset = 0
+
         # Counter variables to do some 
         # basic tracking and processing
         # as the CSV is iterated through.
@@ -67,6 +737,19 @@ class DCB:
         self.num_other = 0
         self.num_total = 0
 
+        # Optional columnar store (see ColumnarStore and get_store()).
+        # When columnar is set to True, the process_* methods
+        # use vectorized reductions over the store instead of
+        # looping over the dictionaries.
+        self.columnar = False
+        self.store = None
+        self.store_version = None
+
+        # Compact records (see make_record()). The record class is
+        # made from the columns dictionary when the first board is recorded.
+        self.compact = True
+        self.record_class = None
+
     # Used to initialize the DCB_columns dictionary.
     # Relates a key (string of a column name) to a integer value
     # that represents the keys' corresponding entry in the string array.
@@ -90,12 +773,25 @@ class DCB:
         self.DCB_columns["Stave_Test_JD10"] = reference_idx + 9
         self.DCB_columns["Stave_Test_JD11"] = reference_idx + 10
         self.DCB_columns["Comments"] = reference_idx + 11
+
+        # The checklist is read from the rows stored in the dictionaries.
+        self.QA_checklist_idx = checklist_indices(DCB_QA_CHECKLIST, self.DCB_columns)
+
+    # Sets the DCB_columns dictionary from the CSV column indices
+    # of a layout found in the header row (see infer_layout()).
+    # The indices are stored relative to the "Serial" column, where the
+    # rows stored in the dictionaries start.
+    def set_columns(self, layout):
+        self.row_offset = layout["Serial"]
+        self.DCB_columns = {column: idx - self.row_offset for column, idx in layout.items()}
+        self.record_class = None
+        self.QA_checklist_idx = checklist_indices(DCB_QA_CHECKLIST, self.DCB_columns)
     
     # Support function for the CSV processing. 
     # ID's whether a DCB listed in a row is considered
     # assembled, unassembled, or other.
     def process_line(self, line):
-        assembled_idx = self.get_idx("Assembled")
+        assembled_idx = self.get_idx("Assembled", self.row_offset)
         if (line[assembled_idx] == "Yes" or line[assembled_idx] == 'yes'):
             return 1
         elif(not line[assembled_idx]):
@@ -109,17 +805,26 @@ class DCB:
 
     # Updates the assembled_DCB dictionary.
     def assembled_dict_update(self, line):
-        self.assembled_DCB[line[self.get_idx("Serial")]] = line[self.get_idx("Serial"):self.get_idx("Comments") + 1]
+        serial_idx = self.get_idx("Serial", self.row_offset)
+        value = make_record(self, "DCB", line[serial_idx:self.get_idx("Comments", self.row_offset) + 1])
+        self.assembled_DCB[line[serial_idx]] = value
+        self.QA_masks[line[serial_idx]] = checklist_mask(value, self.QA_checklist_idx)
         self.num_assembled += 1
     
     # Updates the unassembled_DCB dictionary.
     def unassembled_dict_update(self, line):
-        self.unassembled_DCB[line[self.get_idx("Serial")]] = line[self.get_idx("Serial"):self.get_idx("Comments") + 1]
+        serial_idx = self.get_idx("Serial", self.row_offset)
+        value = make_record(self, "DCB", line[serial_idx:self.get_idx("Comments", self.row_offset) + 1])
+        self.unassembled_DCB[line[serial_idx]] = value
+        self.QA_masks[line[serial_idx]] = checklist_mask(value, self.QA_checklist_idx)
         self.num_unassembled += 1
 
     # Updates the other_DCB dictionary.
     def other_dict_update(self, line):
-        self.other_DCB[line[self.get_idx("Serial")]] = line[self.get_idx("Serial"):self.get_idx("Comments") + 1]
+        serial_idx = self.get_idx("Serial", self.row_offset)
+        value = make_record(self, "DCB", line[serial_idx:self.get_idx("Comments", self.row_offset) + 1])
+        self.other_DCB[line[serial_idx]] = value
+        self.QA_masks[line[serial_idx]] = checklist_mask(value, self.QA_checklist_idx)
         self.num_other += 1
 
     # Standard getter method. Returns
@@ -128,8 +833,9 @@ class DCB:
     # Throws an error if there is no key,
     # which is intentional - all relevant
     # columns should be added to DCB_columns!
-    def get_idx(self, key):
-        return self.DCB_columns[key]
+    # offset is added to the index (the row_offset, for a CSV line).
+    def get_idx(self, key, offset=0):
+        return self.DCB_columns[key] + offset
 
     # getter method, returns num_assembled integer.
     def get_num_assembled(self):
@@ -143,18 +849,38 @@ class DCB:
     def get_num_other(self):
         return self.num_other
 
+    # Returns the DCB_columns dictionary.
+    def get_columns(self):
+        return self.DCB_columns
+
+    # Returns the three DCB dictionaries as (group name, dictionary) pairs.
+    def get_groups(self):
+        return [("assembled", self.assembled_DCB),
+                ("unassembled", self.unassembled_DCB),
+                ("other", self.other_DCB)]
+
+    # Returns the columnar store of the three DCB dictionaries,
+    # rebuilding it if a DCB was recorded since it was last built.
+    def get_store(self):
+        if (self.store is None or self.store_version != self.num_total):
+            self.store = ColumnarStore(self.DCB_columns, self.get_groups(),
+                ["Location", "Assembled", "Fused", "PRBS", "Burned_In",
+                 "Stave_Test_JD10", "Stave_Test_JD11"])
+            self.store_version = self.num_total
+        return self.store
+
+    # Returns a ChecklistMasks over the three DCB dictionaries,
+    # for "which step failed" queries on the DCB QA checklist.
+    def get_QA_masks(self):
+        return ChecklistMasks(DCB_QA_CHECKLIST, self.get_groups(), self.QA_masks)
+
     # support function for the pyplot
     # output function. Goes through
     # assembled_DCB dictionary and returns
     # a list [num_fused, num_not_fused].
     # Not required for parsing functionality.
     def process_fused(self):
-        number_fused = 0
-        fused_idx = self.get_idx("Fused")
-
-        for value in self.assembled_DCB.values():
-            if (value[fused_idx] == 'yes' or value[fused_idx] == 'Yes'):
-                number_fused += 1
+        number_fused = self.process_QA_stage("Fused")["assembled"]
 
         result = [number_fused, self.get_num_assembled() - number_fused]
         return result
@@ -165,118 +891,88 @@ class DCB:
     # a list [num_passed_QA, num_not_passed_QA]
     # Not required for parsing functionality. 
     def process_initial_QA(self):
-        number_passed = 0
-        fused_idx = self.get_idx("Fused")
-        PRBS_idx = self.get_idx("PRBS")
-        first_volt_idx = self.get_idx("1.5V")
-        second_volt_idx = self.get_idx("2.5V")
-
-        for value in self.assembled_DCB.values():
-            if ((check_yes(value[fused_idx]))
-            and (check_yes(value[PRBS_idx]))
-            and (value[first_volt_idx] and value[second_volt_idx])):
-                number_passed += 1
+        number_passed = self.process_QA_stage("Initial_QA")["assembled"]
 
         return [number_passed, self.get_num_assembled() - number_passed]
 
-    # Dedicated output function.
-    # Creates plots using the data
-    # and functions of the DCB class,
-    # and saves them to the local directory.
+    # Counts the DCBs passing a stage of QA_RULES["DCB"]
+    # (i.e. "Initial_QA", "Burned_In", "Final_QA").
+    # Returns {"assembled": n, "unassembled": n, "other": n}.
+    # Not required for parsing functionality.
+    def process_QA_stage(self, stage):
+        return count_QA_stage(self, "DCB", stage, self.DCB_columns)
+
+    # Describes the plots of the DCB class (see render_charts()).
     # Not required for parsing functionality.
-    def pyplot(self):
+    def charts(self):
+        charts = []
+
         # Data to plot
-        labels = 'Assembled\nDCBs', 'Unassembled\nand other DCBs'
         sizes = [self.get_num_assembled(), self.get_num_unassembled() + self.get_num_other()]
-        colors = ['blue', 'red']
-        patches, texts = plt.pie(sizes, colors=colors, shadow=True, startangle=90)
-
-        #texts, the output of the above plt.pie call, is required for plt.legend() to function properly.
-        #This suppresses an unnecessary warning on the otherwise only implicitly used texts variable.
-        texts = texts
-
-        # Plot
-        plt.rcParams.update({'font.size': 20})
-        plt.figure(figsize=(14,10))
-        plt.title("Ratio of Assembled DCBs\n(out of a total of " + str(self.num_total) + ')')
-        plt.legend(patches, labels, loc="upper right")
-        plt.axis('equal')
-        plt.xlabel("Assembled DCBs: " + str(self.get_num_assembled()) + 
-        " | Unassembled DCBs: " + str(self.get_num_unassembled()) + 
-        " | Other DCBs: " + str(self.get_num_other()))
-        plt.pie(sizes, labels=labels, colors=colors,
-        autopct='%1.1f%%', shadow=True, startangle=140)
-        plt.tight_layout()
-        plt.savefig('DCB_AssemblyPieChart.png', bbox_inches='tight', pad_inches = 0.2)
+        charts.append({"file_name": 'DCB_AssemblyPieChart.png', "kind": "pie", "figsize": (14, 10), "startangle": 140,
+                       "labels": ('Assembled\nDCBs', 'Unassembled\nand other DCBs'),
+                       "sizes": sizes,
+                       "colors": ['blue', 'red'],
+                       "title": "Ratio of Assembled DCBs\n(out of a total of " + str(self.num_total) + ')',
+                       "xlabel": "Assembled DCBs: " + str(self.get_num_assembled()) +
+                       " | Unassembled DCBs: " + str(self.get_num_unassembled()) +
+                       " | Other DCBs: " + str(self.get_num_other())})
 
         # Bar Plot
-        # plt.style.use('ggplot')
-        colors = ['blue', 'red', 'yellow']
-        labels = ['Assembled DCBs', 'Unassembled DCBs', 'Other DCBs']
-        num_totals = [self.get_num_assembled(), self.get_num_unassembled(), self.get_num_other()]
-        plt.figure(figsize = (14, 10))
-        index = np.arange(len(labels))
-        patches = plt.bar(index, num_totals, color = colors)
-
-        plt.xlabel('DCB Type')
-        plt.ylabel('Number of DCBs')
-        plt.xticks(index, labels)
-        plt.title('DCB By Type')
-        plt.legend(patches, labels, loc="upper right")
-        plt.savefig('DCB_AssemblyBarChart.png')
-
-        # Data to plot
-        labels = 'Fused,\nAssembled DCBs', 'Unfused,\nAssembled DCBs'
+        charts.append({"file_name": 'DCB_AssemblyBarChart.png', "kind": "bar", "figsize": (14, 10),
+                       "labels": ['Assembled DCBs', 'Unassembled DCBs', 'Other DCBs'],
+                       "sizes": [self.get_num_assembled(), self.get_num_unassembled(), self.get_num_other()],
+                       "colors": ['blue', 'red', 'yellow'],
+                       "title": 'DCB By Type',
+                       "xlabel": 'DCB Type',
+                       "ylabel": 'Number of DCBs'})
+
+        # Fused Vs. All Assembled DCBs
         sizes = self.process_fused()
-        colors = ['blue', 'red']
-        patches, texts = plt.pie(sizes, colors=colors, shadow=True, startangle=90)
-        
-        # Plot
-        plt.figure(figsize=(16,12))
-        plt.title("Ratio of Fused DCBs\n(out of a total of " + str(self.get_num_assembled()) + ' Assembled DCBs)')
-        plt.legend(patches, labels, loc="upper right")
-        plt.axis('equal')
-        plt.xlabel("Fused DCBs: " + str(sizes[0]) + 
-        " | Assembled DCBs: " + str(sizes[1]))
-
-        plt.pie(sizes, labels=labels, colors=colors,
-        autopct='%1.1f%%', shadow=True, startangle=45)
-        plt.tight_layout()
-        plt.savefig('DCB_FusedPieChart.png', bbox_inches='tight', pad_inches = 0.2)
+        charts.append({"file_name": 'DCB_FusedPieChart.png', "kind": "pie", "figsize": (16, 12), "startangle": 45,
+                       "labels": ('Fused,\nAssembled DCBs', 'Unfused,\nAssembled DCBs'),
+                       "sizes": sizes,
+                       "colors": ['blue', 'red'],
+                       "title": "Ratio of Fused DCBs\n(out of a total of " + str(self.get_num_assembled()) + ' Assembled DCBs)',
+                       "xlabel": "Fused DCBs: " + str(sizes[0]) + " | Assembled DCBs: " + str(sizes[1])})
 
         # Initial QA Vs. All Assembled DCBs
-        labels = 'Initial QA\'d,\nAssembled DCBs', 'Other Assembled DCBs'
         sizes = self.process_initial_QA()
-        colors = ['blue', 'red']
-        patches, texts = plt.pie(sizes, colors=colors, shadow=True, startangle=90)
-        
-        # Plot
-        plt.figure(figsize=(16,12))
-        plt.title("Ratio of Initial QA\'d DCBs\n(out of a total of " + str(self.get_num_assembled()) + ' Assembled DCBs)')
-        plt.legend(patches, labels, loc="upper right")
-        plt.axis('equal')
-        plt.xlabel("Initial QA'd DCBs: " + str(sizes[0]) + 
-        " | Other Assembled DCBs: " + str(sizes[1]))
-
-        plt.pie(sizes, labels=labels, colors=colors,
-        autopct='%1.1f%%', shadow=True, startangle=120)
-        plt.tight_layout()
-        plt.savefig('DCB_InitialQAPieChart.png', bbox_inches='tight', pad_inches = 0.2)
+        charts.append({"file_name": 'DCB_InitialQAPieChart.png', "kind": "pie", "figsize": (16, 12), "startangle": 120,
+                       "labels": ('Initial QA\'d,\nAssembled DCBs', 'Other Assembled DCBs'),
+                       "sizes": sizes,
+                       "colors": ['blue', 'red'],
+                       "title": "Ratio of Initial QA\'d DCBs\n(out of a total of " + str(self.get_num_assembled()) + ' Assembled DCBs)',
+                       "xlabel": "Initial QA'd DCBs: " + str(sizes[0]) + " | Other Assembled DCBs: " + str(sizes[1])})
 
-    def output_stream(self):
-        result = "DCB General Stats\n"
-        result += "The total number of boards (assembled, unassembled, other): " + str(self.num_total) + "\n"
-        result += "The number of assembled boards: " + str(self.num_assembled) + "\n"
-        result += "The number of unassembled boards: " + str(self.num_unassembled) + "\n"
-        result += "The number of other boards: " + str(self.num_other) + "\n\n"        
-
-        result += "Definitions\n"
-        result += "Assembled - Has serial number, and has 'Yes' or 'yes' recorded in the 'Assembled' column.\n"
-        result += "Unassembled - Has serial number, has a blank entry in the 'Assembled' column.\n"
-        result += "Other - Has serial number, has an entry recorded in the 'Assembled' column that isn't yes and isn't blank. Either special condition or typo.\n"
-        return result
+        return charts
 
-    def output_stream_assembled_individual_stats(self):
+    # Dedicated output function.
+    # Creates plots using the data
+    # and functions of the DCB class,
+    # and saves them to the local directory.
+    # Not required for parsing functionality.
+    def pyplot(self, render_cache=None):
+        render_charts(self.charts(), render_cache)
+
+    # Text output.
+    # The stream_* generators yield the report a piece at a time (one DCB per piece),
+    # so it can be written as it's generated (see ReportWriter);
+    # the output_stream* methods return the same text as a single string.
+    # Not required for parsing functionality.
+    def stream_general_stats(self):
+        yield ("DCB General Stats\n"
+               "The total number of boards (assembled, unassembled, other): " + str(self.num_total) + "\n"
+               "The number of assembled boards: " + str(self.num_assembled) + "\n"
+               "The number of unassembled boards: " + str(self.num_unassembled) + "\n"
+               "The number of other boards: " + str(self.num_other) + "\n\n")
+
+        yield ("Definitions\n"
+               "Assembled - Has serial number, and has 'Yes' or 'yes' recorded in the 'Assembled' column.\n"
+               "Unassembled - Has serial number, has a blank entry in the 'Assembled' column.\n"
+               "Other - Has serial number, has an entry recorded in the 'Assembled' column that isn't yes and isn't blank. Either special condition or typo.\n")
+
+    def stream_assembled_individual_stats(self):
         idx_ID = self.get_idx("ID")
         idx_location = self.get_idx("Location")
         idx_fused = self.get_idx("Fused")
@@ -285,9 +981,8 @@ class DCB:
         idx_two_p_five = self.get_idx("2.5V")
         idx_comment = self.get_idx("Comments")
 
-        result = "Assembled DCB Stats\n"
-        result += "Format: [ DCB ID | Location | Fused | PRBS | 1.5V Test | 2.5V Test ]\nComment: [Text Here]\n\n"
-
+        yield "Assembled DCB Stats\n"
+        yield "Format: [ DCB ID | Location | Fused | PRBS | 1.5V Test | 2.5V Test ]\nComment: [Text Here]\n\n"
 
         for y in self.assembled_DCB.values():
             comment = y[idx_comment]
@@ -303,31 +998,28 @@ class DCB:
             if (second_test == ""):
                 second_test = "N/A"
 
-            result += "[ DCB ID: " +  y[idx_ID] + " | Location: " + y[idx_location]
-            result += " | Fused: " + y[idx_fused] + " | PRBS: " + y[idx_PRBS]
-            result += " | 1.5V Test: " + first_test + " | 2.5V Test: " + second_test + " ]\n"
-            result += "Comment: " + comment + "\n\n"
-        return result
+            yield ("[ DCB ID: " +  y[idx_ID] + " | Location: " + y[idx_location] +
+                   " | Fused: " + y[idx_fused] + " | PRBS: " + y[idx_PRBS] +
+                   " | 1.5V Test: " + first_test + " | 2.5V Test: " + second_test + " ]\n" +
+                   "Comment: " + comment + "\n\n")
 
-    def output_stream_unassembled_individual_stats(self):
+    def stream_unassembled_individual_stats(self):
         idx_ID = self.get_idx("ID")
         idx_location = self.get_idx("Location")
         idx_comment = self.get_idx("Comments")
 
-        result = "Unassembled DCB Stats\n"
-        result += "Format: [ DCB ID | Location ]\nComment: [Text Here]\n\n"
-
+        yield "Unassembled DCB Stats\n"
+        yield "Format: [ DCB ID | Location ]\nComment: [Text Here]\n\n"
 
         for y in self.unassembled_DCB.values():
             comment = y[idx_comment]
             if (comment == ""):
                 comment = "No recorded comment."
-            
-            result += "[ DCB ID: " +  y[idx_ID] + " | Location: " + y[idx_location] + " ]\n"
-            result += "Comment: " + comment + "\n\n"
-        return result
 
-    def output_stream_other_individual_stats(self):
+            yield ("[ DCB ID: " +  y[idx_ID] + " | Location: " + y[idx_location] + " ]\n" +
+                   "Comment: " + comment + "\n\n")
+
+    def stream_other_individual_stats(self):
         idx_ID = self.get_idx("ID")
         idx_assembled = self.get_idx("Assembled")
         idx_location = self.get_idx("Location")
@@ -337,9 +1029,8 @@ class DCB:
         idx_two_p_five = self.get_idx("2.5V")
         idx_comment = self.get_idx("Comments")
 
-        result = "Other DCB Stats\n"
-        result += "Format: [ DCB ID | Assembled Status | Location | Fused | PRBS | 1.5V Test | 2.5V Test ]\nComment: [Text Here]\n\n"
-
+        yield "Other DCB Stats\n"
+        yield "Format: [ DCB ID | Assembled Status | Location | Fused | PRBS | 1.5V Test | 2.5V Test ]\nComment: [Text Here]\n\n"
 
         for y in self.other_DCB.values():
             comment = y[idx_comment]
@@ -355,12 +1046,34 @@ class DCB:
             if (second_test == ""):
                 second_test = "N/A"
 
-            result += "[ DCB ID: " +  y[idx_ID] + " | Status: " + y[idx_assembled] + " | Location: " + y[idx_location]
-            result += " | Fused: " + y[idx_fused] + " | PRBS: " + y[idx_PRBS]
-            result += " | 1.5V Test: " + first_test + " | 2.5V Test: " + second_test + " ]\n"
-            result += "Comment: " + comment + "\n\n"
+            yield ("[ DCB ID: " +  y[idx_ID] + " | Status: " + y[idx_assembled] + " | Location: " + y[idx_location] +
+                   " | Fused: " + y[idx_fused] + " | PRBS: " + y[idx_PRBS] +
+                   " | 1.5V Test: " + first_test + " | 2.5V Test: " + second_test + " ]\n" +
+                   "Comment: " + comment + "\n\n")
+
+    # The full text report: the general stats, then the assembled,
+    # unassembled and other DCBs (what the driver writes to Text_Output_DCB.txt).
+    def stream_report(self):
+        yield from self.stream_general_stats()
+        yield "\n"
+        yield from self.stream_assembled_individual_stats()
+        yield "\n"
+        yield from self.stream_unassembled_individual_stats()
+        yield "\n"
+        yield from self.stream_other_individual_stats()
+
+    def output_stream(self):
+        return "".join(self.stream_general_stats())
+
+    def output_stream_assembled_individual_stats(self):
+        return "".join(self.stream_assembled_individual_stats())
+
+    def output_stream_unassembled_individual_stats(self):
+        return "".join(self.stream_unassembled_individual_stats())
+
+    def output_stream_other_individual_stats(self):
+        return "".join(self.stream_other_individual_stats())
 
-        return result
 # Contains the data and methods used to parse and process
 # data from the CSV_LVR file. Performs relevant output
 # operations as well.
@@ -377,6 +1090,12 @@ class LVR:
         self.LVR_15MS = {}
         self.LVR_other = {}
 
+        # QA checklist bitmask of each board (see checklist_mask()),
+        # keyed like the dictionaries above and recorded as the board is parsed.
+        # IMPORTANT - the checklist column indices are set with the columns dictionary.
+        self.QA_masks = {}
+        self.QA_checklist_idx = []
+
         # Similar to the DCB,
         # this dictionary lists
         # which column in the array of strings
@@ -385,6 +1104,10 @@ class LVR:
         # IMPORTANT: See set_LVR_columns().
         self.LVR_columns = {}
 
+        # Index of the "ID" column in the CSV, which the
+        # LVR_columns indices are relative to (see get_idx()).
+        self.row_offset = 0
+
         # Based counter variables
         # for processing during
         # the CSV parsing.
@@ -394,6 +1117,19 @@ class LVR:
         self.num_LVR_other = 0
         self.num_total = 0
 
+        # Optional columnar store (see ColumnarStore and get_store()).
+        # When columnar is set to True, the process_* methods
+        # use vectorized reductions over the store instead of
+        # looping over the dictionaries.
+        self.columnar = False
+        self.store = None
+        self.store_version = None
+
+        # Compact records (see make_record()). The record class is
+        # made from the columns dictionary when the first board is recorded.
+        self.compact = True
+        self.record_class = None
+
     # Initializes the LVR_columns dictionary.
     def set_LVR_columns(self, serial_idx):
         
@@ -421,20 +1157,37 @@ class LVR:
         self.LVR_columns["Output_Config"] = reference_idx + 8
         self.LVR_columns["Sense_Line_Test"] = reference_idx + 9
         self.LVR_columns["SPI_Test"] = reference_idx + 10
-        self.LVR_columns["Assembled"] = reference_idx + 11
-        self.LVR_columns["SBC_Crate"] = reference_idx + 12
-        self.LVR_columns["Start_Time"] = reference_idx + 13
-        self.LVR_columns["End_Time"] = reference_idx + 14
-        self.LVR_columns["Final_QA"] = reference_idx + 15
-        self.LVR_columns["Subtype"] = reference_idx + 16     
-        self.LVR_columns["Comment"] = reference_idx + 17
+        self.LVR_columns["QA_OK"] = reference_idx + 11
+        self.LVR_columns["Assembled"] = reference_idx + 12
+        self.LVR_columns["SBC_Crate"] = reference_idx + 13
+        self.LVR_columns["Start_Time"] = reference_idx + 14
+        self.LVR_columns["End_Time"] = reference_idx + 15
+        self.LVR_columns["Final_QA"] = reference_idx + 16
+        self.LVR_columns["Subtype"] = reference_idx + 17
+        self.LVR_columns["Comment"] = reference_idx + 18
+
+        # The offset of the rows in the CSV is the index of the "ID" column.
+        self.row_offset = serial_idx - 2
+
+        # The checklist is read from the rows stored in the dictionaries,
+        # which start at the "ID" column (offset 0).
+        self.QA_checklist_idx = checklist_indices(LVR_QA_CHECKLIST, self.LVR_columns)
+
+    # Sets the LVR_columns dictionary from the CSV column indices
+    # of a layout found in the header row (see infer_layout()).
+    # The indices are stored relative to the "ID" column, like set_LVR_columns does.
+    def set_columns(self, layout):
+        self.row_offset = layout["ID"]
+        self.LVR_columns = {column: idx - self.row_offset for column, idx in layout.items()}
+        self.record_class = None
+        self.QA_checklist_idx = checklist_indices(LVR_QA_CHECKLIST, self.LVR_columns)
 
     # After being identified with regex
     # in the CSV processing driver,
     # this function identifies which LVR type 
     # the row corresponds to.
     def process_line(self, line):
-        LVR_Type_idx = self.get_idx("LVR_Type", 4)
+        LVR_Type_idx = self.get_idx("LVR_Type", self.row_offset)
         if (line[LVR_Type_idx] == "12A"):
             return 1
 
@@ -454,34 +1207,42 @@ class LVR:
 
     # updates the LVR_12A dictionary.
     def dict_update_LVR_12A(self, line):
-        start_idx = self.get_idx("ID", 4)
-        end_idx = self.get_idx("Comment", 4) + 1
+        start_idx = self.get_idx("ID", self.row_offset)
+        end_idx = self.get_idx("Comment", self.row_offset) + 1
 
-        self.LVR_12A[line[start_idx]] = line[start_idx:end_idx]
+        value = make_record(self, "LVR", line[start_idx:end_idx])
+        self.LVR_12A[line[start_idx]] = value
+        self.QA_masks[line[start_idx]] = checklist_mask(value, self.QA_checklist_idx)
         self.num_LVR_12A += 1
 
     # updates the LVR_25A dictionary.
     def dict_update_LVR_25A(self, line):
-        start_idx = self.get_idx("ID", 4)
-        end_idx = self.get_idx("Comment", 4) + 1
+        start_idx = self.get_idx("ID", self.row_offset)
+        end_idx = self.get_idx("Comment", self.row_offset) + 1
 
-        self.LVR_25A[line[start_idx]] = line[start_idx:end_idx]
+        value = make_record(self, "LVR", line[start_idx:end_idx])
+        self.LVR_25A[line[start_idx]] = value
+        self.QA_masks[line[start_idx]] = checklist_mask(value, self.QA_checklist_idx)
         self.num_LVR_25A += 1
 
     # updates the 15MS dictionary.
     def dict_update_LVR_15MS(self, line):
-        start_idx = self.get_idx("ID", 4)
-        end_idx = self.get_idx("Comment", 4) + 1
+        start_idx = self.get_idx("ID", self.row_offset)
+        end_idx = self.get_idx("Comment", self.row_offset) + 1
 
-        self.LVR_15MS[line[start_idx]] = line[start_idx:end_idx]
+        value = make_record(self, "LVR", line[start_idx:end_idx])
+        self.LVR_15MS[line[start_idx]] = value
+        self.QA_masks[line[start_idx]] = checklist_mask(value, self.QA_checklist_idx)
         self.num_LVR_15MS += 1
 
     # updates the other dictionary.
     def dict_update_LVR_other(self, line):
-        start_idx = self.get_idx("ID", 4)
-        end_idx = self.get_idx("Comment", 4) + 1
+        start_idx = self.get_idx("ID", self.row_offset)
+        end_idx = self.get_idx("Comment", self.row_offset) + 1
 
-        self.LVR_other[line[start_idx]] = line[start_idx:end_idx]
+        value = make_record(self, "LVR", line[start_idx:end_idx])
+        self.LVR_other[line[start_idx]] = value
+        self.QA_masks[line[start_idx]] = checklist_mask(value, self.QA_checklist_idx)
         self.num_LVR_other += 1
     
     # standard getter method for num_total.
@@ -505,150 +1266,128 @@ class LVR:
     def get_idx(self, target, offset):
         return self.LVR_columns[target] + offset
 
+    # Returns the LVR_columns dictionary. Its indices are those of the
+    # rows stored in the dictionaries (offset 0).
+    def get_columns(self):
+        return self.LVR_columns
+
+    # Returns the four LVR dictionaries as (group name, dictionary) pairs.
+    def get_groups(self):
+        return [("12A", self.LVR_12A),
+                ("25A", self.LVR_25A),
+                ("15MS", self.LVR_15MS),
+                ("other", self.LVR_other)]
+
+    # Returns the columnar store of the four LVR dictionaries,
+    # rebuilding it if an LVR was recorded since it was last built.
+    # The rows in the dictionaries start at the "ID" column,
+    # so the store is built from the offset 0 indices.
+    def get_store(self):
+        if (self.store is None or self.store_version != self.num_total):
+            self.store = ColumnarStore(self.LVR_columns, self.get_groups(),
+                ["Location", "LVR_Type"] + LVR_INITIAL_QA_STEPS +
+                ["QA_OK", "Assembled", "SBC_Crate", "Final_QA", "Subtype"])
+            self.store_version = self.num_total
+        return self.store
+
+    # Returns a ChecklistMasks over the four LVR dictionaries,
+    # for "which step failed" queries on the LVR initial QA checklist
+    # (i.e. get_QA_masks().passed_all_except("SPI_Test")).
+    def get_QA_masks(self):
+        return ChecklistMasks(LVR_QA_CHECKLIST, self.get_groups(), self.QA_masks)
+
     # Support method for the pyplot
     # processing. 
     # returns [num_passed_12A, num_passed_25A, num_passed_15MS,
     # num_not_passed_12A, num_not_passed 25A, num_not_passed 15MS].
     # Not required for parsing functionality.
     def process_initial_QA(self):
-        num_LVR_12A_QA = 0
-        num_LVR_25A_QA = 0
-        num_LVR_15MS_QA = 0
-        idx_voltage = self.get_idx("Voltage_Check", 0)
-        idx_FPGA = self.get_idx("FPGA", 0)
-        idx_undervolt_overtemp_config = self.get_idx("Undervolt_Overtemp_Config", 0)
-        idx_undervolt_test = self.get_idx("Undervolt_Test", 0)
-        idx_overtemp_test = self.get_idx("Overtemp_Test", 0)
-        idx_output_config = self.get_idx("Output_Config", 0)
-        idx_sense_line_test = self.get_idx("Sense_Line_Test", 0)
-        idx_SPI = self.get_idx("SPI_Test", 0)
-
-        for value in self.LVR_12A.values():
-            if ((check_yes(value[idx_voltage]))
-            and (check_yes(value[idx_FPGA]))
-            and (check_yes(value[idx_undervolt_overtemp_config]))
-            and (check_yes(value[idx_undervolt_test]))
-            and (check_yes(value[idx_overtemp_test]))
-            and (check_yes(value[idx_output_config]))
-            and (check_yes(value[idx_sense_line_test]))
-            and (check_yes(value[idx_SPI]))):
-                num_LVR_12A_QA += 1
-
-        for value in self.LVR_25A.values():
-            if ((check_yes(value[idx_voltage]))
-            and (check_yes(value[idx_FPGA]))
-            and (check_yes(value[idx_undervolt_overtemp_config]))
-            and (check_yes(value[idx_undervolt_test]))
-            and (check_yes(value[idx_overtemp_test]))
-            and (check_yes(value[idx_output_config]))
-            and (check_yes(value[idx_sense_line_test]))
-            and (check_yes(value[idx_SPI]))):
-                num_LVR_25A_QA += 1
-
-        for value in self.LVR_15MS.values():
-            if ((check_yes(value[idx_voltage]))
-            and (check_yes(value[idx_FPGA]))
-            and (check_yes(value[idx_undervolt_overtemp_config]))
-            and (check_yes(value[idx_undervolt_test]))
-            and (check_yes(value[idx_overtemp_test]))
-            and (check_yes(value[idx_output_config]))
-            and (check_yes(value[idx_sense_line_test]))
-            and (check_yes(value[idx_SPI]))):
-                num_LVR_15MS_QA += 1
-        
+        passed = self.process_QA_stage("Initial_QA")
+        num_LVR_12A_QA = passed["12A"]
+        num_LVR_25A_QA = passed["25A"]
+        num_LVR_15MS_QA = passed["15MS"]
+
         return [num_LVR_12A_QA, num_LVR_25A_QA, num_LVR_15MS_QA,
                 self.get_num_LVR_12A() - num_LVR_12A_QA,
                 self.get_num_LVR_25A() - num_LVR_25A_QA,
                 self.get_num_LVR_15MS() - num_LVR_15MS_QA]
 
-    # Output function that creates,
-    # saves plots for the LVR.
+    # Counts the LVRs passing a stage of QA_RULES["LVR"]
+    # (i.e. "Initial_QA", "Burned_In", "Final_QA").
+    # Returns {"12A": n, "25A": n, "15MS": n, "other": n}.
     # Not required for parsing functionality.
-    def pyplot(self):
-        # LVR Type Breakdown
-        plt.rcParams.update({'font.size': 20})
-        labels = "12A LVRs", "25A LVRs", "15MS LVRs"
-        sizes = [self.get_num_LVR_12A(), self.get_num_LVR_25A(), self.get_num_LVR_15MS()] 
-        colors = ['blue', 'red', 'yellow']
-        patches, texts = plt.pie(sizes, colors=colors, shadow=True, startangle=90)
-        
-        #texts, the output of the above plt.pie call, is required for plt.legend() to function properly.
-        #This suppresses an unnecessary warning on the otherwise only implicitly used texts variable.
-        texts = texts
-        
-        # Plot
-        plt.figure(figsize=(16,12))
-        plt.title("Relative Ratios of LVR Types\n(out of a total of " + str(self.get_num_total()) + ' Assembled LVRs)')
-        plt.legend(patches, labels, loc="upper right")
-        plt.axis('equal')
-        plt.xlabel("12A LVRs: " + str(sizes[0]) + 
-        " | 25A LVRs: " + str(sizes[1]) + " | 15MS LVRs: " + str(sizes[2]))
-
-        plt.pie(sizes, labels=labels, colors=colors,
-        autopct='%1.1f%%', shadow=True, startangle=45)
-        plt.tight_layout()
-        plt.savefig('LVRs_By_Type.png', bbox_inches='tight', pad_inches = 0.2)
+    def process_QA_stage(self, stage):
+        return count_QA_stage(self, "LVR", stage, self.LVR_columns)
 
+    # Describes the plots for the LVR (see render_charts()).
+    # Not required for parsing functionality.
+    def charts(self):
+        charts = []
+
+        # LVR Type Breakdown
+        sizes = [self.get_num_LVR_12A(), self.get_num_LVR_25A(), self.get_num_LVR_15MS()]
+        charts.append({"file_name": 'LVRs_By_Type.png', "kind": "pie", "figsize": (16, 12), "startangle": 45,
+                       "labels": ("12A LVRs", "25A LVRs", "15MS LVRs"),
+                       "sizes": sizes,
+                       "colors": ['blue', 'red', 'yellow'],
+                       "title": "Relative Ratios of LVR Types\n(out of a total of " + str(self.get_num_total()) + ' Assembled LVRs)',
+                       "xlabel": "12A LVRs: " + str(sizes[0]) +
+                       " | 25A LVRs: " + str(sizes[1]) + " | 15MS LVRs: " + str(sizes[2])})
+
+        # Initial QA'd LVRs by type
         LVR_QA_list = self.process_initial_QA()
         sizes = LVR_QA_list[0:3]
-        labels = "Initial QA'd\n12A LVRs", "Initial QA'd\n25A LVRs", "Initial QA'd\n15MS LVRs" 
-        colors = ['blue', 'red', 'yellow']
-        patches, texts = plt.pie(sizes, colors=colors, shadow=True, startangle=90)
-        
-        # Plot
-        plt.figure(figsize=(16,12))
-        plt.title("Ratios of Initial QA\'d LVRs\n(out of a total of " + 
-        str(LVR_QA_list[0] + LVR_QA_list[1] + LVR_QA_list[2]) + " QA'd LVRs)")
-        plt.legend(patches, labels, loc="upper right")
-        plt.axis('equal')
-        plt.xlabel("Initial QA'd 12A LVRs: " + str(sizes[0]) + 
-        " | Initial QA'd 25A LVRs: " + str(sizes[1]) +
-        " | Initial QA'd 15MS LVRs: " + str(sizes[2]))
-
-        plt.pie(sizes, labels=labels, colors=colors,
-        autopct='%1.1f%%', shadow=True, startangle=120)
-        plt.tight_layout()
-        plt.savefig('LVR_InitialQAPieChart.png', bbox_inches='tight', pad_inches = 0.2)
+        charts.append({"file_name": 'LVR_InitialQAPieChart.png', "kind": "pie", "figsize": (16, 12), "startangle": 120,
+                       "labels": ("Initial QA'd\n12A LVRs", "Initial QA'd\n25A LVRs", "Initial QA'd\n15MS LVRs"),
+                       "sizes": sizes,
+                       "colors": ['blue', 'red', 'yellow'],
+                       "title": "Ratios of Initial QA\'d LVRs\n(out of a total of " +
+                       str(LVR_QA_list[0] + LVR_QA_list[1] + LVR_QA_list[2]) + " QA'd LVRs)",
+                       "xlabel": "Initial QA'd 12A LVRs: " + str(sizes[0]) +
+                       " | Initial QA'd 25A LVRs: " + str(sizes[1]) +
+                       " | Initial QA'd 15MS LVRs: " + str(sizes[2])})
+
+        return charts
 
-    # Text output stream.
+    # Output function that creates,
+    # saves plots for the LVR.
     # Not required for parsing functionality.
-    def output_stream(self):
-        result = "LVR General Stats\n"
-        result += "The total number of boards " + str(self.num_total) + "\n"
-        result += "Number of LVR Type 12A: " + str(self.num_LVR_12A) + "\n"
-        result += "Number of LVR Type 25A: " + str(self.num_LVR_25A) + "\n"
-        result += "Number of LVR Type 15MS: " + str(self.num_LVR_15MS) + "\n"
-        result += "Number of LVR Type Other: " + str(self.num_LVR_other) + "\n"
-        return result
+    def pyplot(self, render_cache=None):
+        render_charts(self.charts(), render_cache)
 
-    # Text output stream.
+    # Text output stream, yielded a piece at a time (see ReportWriter).
     # Not required for parsing functionality.
-    def output_stream_individual_stats(self):
-        result = "LVR Stats\n"
+    def stream_general_stats(self):
+        yield ("LVR General Stats\n"
+               "The total number of boards " + str(self.num_total) + "\n"
+               "Number of LVR Type 12A: " + str(self.num_LVR_12A) + "\n"
+               "Number of LVR Type 25A: " + str(self.num_LVR_25A) + "\n"
+               "Number of LVR Type 15MS: " + str(self.num_LVR_15MS) + "\n"
+               "Number of LVR Type Other: " + str(self.num_LVR_other) + "\n")
+
+    # Text output stream, yielded one LVR at a time.
+    # Not required for parsing functionality.
+    def stream_individual_stats(self):
         serial_num_idx = self.get_idx("Serial", 0)
         CCM_idx = self.get_idx("CCM", 0)
 
-        result += "\nType 12A LVR's\n"
-        for x, y in self.LVR_12A.items():
-            result += "For LVR with ID " + x + ", and serial number " + y[serial_num_idx] + ":"
-            result += "[CCM: " + y[CCM_idx] + "]" + "\n"
-
-        result += "\nType 25A LVR's\n"
-        for x, y in self.LVR_25A.items():
-            result += "For LVR with ID " + x + ", and serial number " + y[serial_num_idx] + ":"
-            result += "[CCM: " + y[CCM_idx] + "]" + "\n"
+        yield "LVR Stats\n"
+        for name, dictionary in [("12A", self.LVR_12A), ("25A", self.LVR_25A),
+                                 ("15MS", self.LVR_15MS), ("Other", self.LVR_other)]:
+            yield "\nType " + name + " LVR's\n"
+            for x, y in dictionary.items():
+                yield ("For LVR with ID " + x + ", and serial number " + y[serial_num_idx] + ":" +
+                       "[CCM: " + y[CCM_idx] + "]" + "\n")
 
-        result += "\nType 15MS LVR's\n"
-        for x, y in self.LVR_15MS.items():
-            result += "For LVR with ID " + x + ", and serial number " + y[serial_num_idx] + ":"
-            result += "[CCM: " + y[CCM_idx] + "]" + "\n"
-
-        result += "\nType Other LVR's\n"
-        for x, y in self.LVR_other.items():
-            result += "For LVR with ID " + x + ", and serial number " + y[serial_num_idx] + ":"
-            result += "[CCM: " + y[CCM_idx] + "]" + "\n"
+    # Text output stream.
+    # Not required for parsing functionality.
+    def output_stream(self):
+        return "".join(self.stream_general_stats())
 
-        return result
+    # Text output stream.
+    # Not required for parsing functionality.
+    def output_stream_individual_stats(self):
+        return "".join(self.stream_individual_stats())
 
 # Contains the data and methods used to parse and process
 # data from the CSV_CCM file. Performs relevant output
@@ -670,6 +1409,10 @@ class CCM:
         # correspond to which categories of the database.
         self.CCM_columns = {}
 
+        # Index of the "Roll_ID" column in the CSV, which the
+        # CCM_columns indices are relative to (see get_idx()).
+        self.row_offset = 0
+
         # Counter variables for basic processing.
         self.num_12A = 0
         self.num_12M = 0
@@ -679,6 +1422,19 @@ class CCM:
         self.num_25A = 0
         self.num_total = 0
 
+        # Optional columnar store (see ColumnarStore and get_store()).
+        # When columnar is set to True, the process_* methods
+        # use vectorized reductions over the store instead of
+        # looping over the dictionaries.
+        self.columnar = False
+        self.store = None
+        self.store_version = None
+
+        # Compact records (see make_record()). The record class is
+        # made from the columns dictionary when the first board is recorded.
+        self.compact = True
+        self.record_class = None
+
     # Sets the CCM_columns variable.
     def set_CCM_columns(self, start_idx):
         self.CCM_columns["Roll_ID"] = start_idx
@@ -692,73 +1448,116 @@ class CCM:
         self.CCM_columns["Usage"] = reference_idx + 6
         self.CCM_columns["Comment"] = reference_idx + 7
 
+    # Sets the CCM_columns dictionary from the CSV column indices
+    # of a layout found in the header row (see infer_layout()).
+    # The indices are stored relative to the "Roll_ID" column, where the
+    # rows stored in the dictionaries start.
+    def set_columns(self, layout):
+        self.row_offset = layout["Roll_ID"]
+        self.CCM_columns = {column: idx - self.row_offset for column, idx in layout.items()}
+        self.record_class = None
+
     # Increments the num_total.
     def increment_total(self):
         self.num_total += 1
     
     # Updates the dictionary and count for 12A CCMs.
     def dict_update_12A(self, line):
-        idx_start = self.get_idx("Roll_ID")
-        idx_end = self.get_idx("Comment") + 1
-        self.CCM_12A[line[idx_start]] = line[idx_start:idx_end]
-        self.num_12A += int(line[self.get_idx("Good_Count")]) 
+        idx_start = self.get_idx("Roll_ID", self.row_offset)
+        idx_end = self.get_idx("Comment", self.row_offset) + 1
+        self.CCM_12A[line[idx_start]] = make_record(self, "CCM", line[idx_start:idx_end])
+        self.num_12A += int(line[self.get_idx("Good_Count", self.row_offset)]) 
 
     # Updates the dictionary and count for 12M CCMs.
     def dict_update_12M(self, line):
-        idx_start = self.get_idx("Roll_ID")
-        idx_end = self.get_idx("Comment") + 1
-        self.CCM_12M[line[idx_start]] = line[idx_start:idx_end]
-        self.num_12M += int(line[self.get_idx("Good_Count")]) 
+        idx_start = self.get_idx("Roll_ID", self.row_offset)
+        idx_end = self.get_idx("Comment", self.row_offset) + 1
+        self.CCM_12M[line[idx_start]] = make_record(self, "CCM", line[idx_start:idx_end])
+        self.num_12M += int(line[self.get_idx("Good_Count", self.row_offset)]) 
 
     # Updates the dictionary and count for 12S CCMs.
     def dict_update_12S(self, line):
-        idx_start = self.get_idx("Roll_ID")
-        idx_end = self.get_idx("Comment") + 1
-        self.CCM_12S[line[idx_start]] = line[idx_start:idx_end]
-        self.num_12S += int(line[self.get_idx("Good_Count")]) 
+        idx_start = self.get_idx("Roll_ID", self.row_offset)
+        idx_end = self.get_idx("Comment", self.row_offset) + 1
+        self.CCM_12S[line[idx_start]] = make_record(self, "CCM", line[idx_start:idx_end])
+        self.num_12S += int(line[self.get_idx("Good_Count", self.row_offset)]) 
 
     # Updates the dictionary and count for 15M CCMs.
     def dict_update_15M(self, line):
-        idx_start = self.get_idx("Roll_ID")
-        idx_end = self.get_idx("Comment") + 1
-        self.CCM_15M[line[idx_start]] = line[idx_start:idx_end]
-        self.num_15M += int(line[self.get_idx("Good_Count")]) 
+        idx_start = self.get_idx("Roll_ID", self.row_offset)
+        idx_end = self.get_idx("Comment", self.row_offset) + 1
+        self.CCM_15M[line[idx_start]] = make_record(self, "CCM", line[idx_start:idx_end])
+        self.num_15M += int(line[self.get_idx("Good_Count", self.row_offset)]) 
 
     # Updates the dictionary and count for 15S CCMs.
     def dict_update_15S(self, line):
-        idx_start = self.get_idx("Roll_ID")
-        idx_end = self.get_idx("Comment") + 1
-        self.CCM_15S[line[idx_start]] = line[idx_start:idx_end]
-        self.num_15S += int(line[self.get_idx("Good_Count")]) 
+        idx_start = self.get_idx("Roll_ID", self.row_offset)
+        idx_end = self.get_idx("Comment", self.row_offset) + 1
+        self.CCM_15S[line[idx_start]] = make_record(self, "CCM", line[idx_start:idx_end])
+        self.num_15S += int(line[self.get_idx("Good_Count", self.row_offset)]) 
 
     # Updates the dictionary and count for 25A CCMs.
     def dict_update_25A(self, line):
-        idx_start = self.get_idx("Roll_ID")
-        idx_end = self.get_idx("Comment") + 1
-        self.CCM_25A[line[idx_start]] = line[idx_start:idx_end]
-        self.num_25A += int(line[self.get_idx("Good_Count")]) 
+        idx_start = self.get_idx("Roll_ID", self.row_offset)
+        idx_end = self.get_idx("Comment", self.row_offset) + 1
+        self.CCM_25A[line[idx_start]] = make_record(self, "CCM", line[idx_start:idx_end])
+        self.num_25A += int(line[self.get_idx("Good_Count", self.row_offset)]) 
 
     # Updates the dictionary and count for 12A CCMs.
-    def get_idx(self, target):
-        return self.CCM_columns[target]
+    # offset is added to the index (the row_offset, for a CSV line).
+    def get_idx(self, target, offset=0):
+        return self.CCM_columns[target] + offset
+
+    # Returns the CCM_columns dictionary.
+    def get_columns(self):
+        return self.CCM_columns
+
+    # Returns the six CCM dictionaries as (group name, dictionary) pairs.
+    def get_groups(self):
+        return [("12A", self.CCM_12A), ("12M", self.CCM_12M), ("12S", self.CCM_12S),
+                ("15M", self.CCM_15M), ("15S", self.CCM_15S), ("25A", self.CCM_25A)]
+
+    # Returns the columnar store of the six CCM dictionaries,
+    # rebuilding it if a roll was recorded since it was last built.
+    def get_store(self):
+        if (self.store is None or self.store_version != self.num_total):
+            self.store = ColumnarStore(self.CCM_columns, self.get_groups(),
+                ["Location", "CCM_Type", "Master_or_Slave", "Usage"],
+                ["Original_Count", "Good_Count"])
+            self.store_version = self.num_total
+        return self.store
+
+    # Returns the number of good CCMs of each type, in the order
+    # [12A, 12M, 12S, 15M, 15S, 25A].
+    # Not required for parsing functionality.
+    def process_good_count(self):
+        with stage_timer("CCM", "QA_aggregation"):
+            if (self.columnar):
+                store = self.get_store()
+                good_count = store.column("Good_Count")
+                return [int(good_count[store.in_group(CCM_type)].sum())
+                        for CCM_type in ["12A", "12M", "12S", "15M", "15S", "25A"]]
 
-    # Output stream. Creates, save pyplots to local directory.
+            return [self.num_12A, self.num_12M, self.num_12S, self.num_15M, self.num_15S, self.num_25A]
+
+    # Describes the CCM plots (see render_charts()).
     # Not necessary for parsing functionality.
-    def pyplot(self):
+    def charts(self):
         # Bar Plot
-        colors = ['blue', 'red', 'yellow', 'purple', 'orange', 'pink']
-        labels = ['12A', '12M', '12S', '15M', '15S', '25A']
-        num_totals = [self.num_12A, self.num_12M, self.num_12S, self.num_15M, self.num_15S, self.num_25A]
-        plt.figure(figsize = (14, 10))
-        index = np.arange(len(labels))
-        patches = plt.bar(index, num_totals, color = colors)
-
-        plt.xlabel('CCM Type')
-        plt.ylabel("Number of QA'd CCMs")
-        plt.xticks(index, labels)
-        plt.title("QA'd CCMs By Type")
-        plt.legend(patches, labels, loc="upper right")
-        plt.savefig('CCM_QABarChart.png')
+        charts = [{"file_name": 'CCM_QABarChart.png', "kind": "bar", "figsize": (14, 10),
+                   "labels": ['12A', '12M', '12S', '15M', '15S', '25A'],
+                   "sizes": self.process_good_count(),
+                   "colors": ['blue', 'red', 'yellow', 'purple', 'orange', 'pink'],
+                   "title": "QA'd CCMs By Type",
+                   "xlabel": 'CCM Type',
+                   "ylabel": "Number of QA'd CCMs"}]
+
+        return charts
+
+    # Output stream. Creates, save pyplots to local directory.
+    # Not necessary for parsing functionality.
+    def pyplot(self, render_cache=None):
+        render_charts(self.charts(), render_cache)
 
 # Contains the data and methods used to parse and process
 # data from the CSV_Backplane file. Performs relevant output
@@ -776,12 +1575,29 @@ class Backplane:
         # IMPORTANT: see set_backplane_columns.
         self.backplane_columns = {}
 
+        # Index of the "Type" column in the CSV, which the
+        # backplane_columns indices are relative to (see get_idx()).
+        self.row_offset = 0
+
         # Counter variables for basic processing during
         # parsing.
         self.num_true_backplanes = 0
         self.num_mirror_backplanes = 0
         self.num_total_backplanes = 0
 
+        # Optional columnar store (see ColumnarStore and get_store()).
+        # When columnar is set to True, the process_* methods
+        # use vectorized reductions over the store instead of
+        # looping over the dictionaries.
+        self.columnar = False
+        self.store = None
+        self.store_version = None
+
+        # Compact records (see make_record()). The record class is
+        # made from the columns dictionary when the first board is recorded.
+        self.compact = True
+        self.record_class = None
+
     # Sets the backplane_columns dictionary.
     def set_backplane_columns(self, idx_start):
         # Set the column that will serve as the key values 
@@ -800,19 +1616,28 @@ class Backplane:
         self.backplane_columns["Assembly"] = idx_reference + 8
         self.backplane_columns["Note"] = idx_reference + 9
 
+    # Sets the backplane_columns dictionary from the CSV column indices
+    # of a layout found in the header row (see infer_layout()).
+    # The indices are stored relative to the "Type" column, where the
+    # rows stored in the dictionaries start.
+    def set_columns(self, layout):
+        self.row_offset = layout["Type"]
+        self.backplane_columns = {column: idx - self.row_offset for column, idx in layout.items()}
+        self.record_class = None
+
     # Updates the true_backplanes dictionary.
     def update_true_backplanes(self, line):
         idx_backplane = self.get_num_true_backplanes()
-        idx_start = self.get_idx("Type")
-        idx_end = self.get_idx("Note") + 1
-        self.true_backplanes[idx_backplane] = line[idx_start:idx_end]
+        idx_start = self.get_idx("Type", self.row_offset)
+        idx_end = self.get_idx("Note", self.row_offset) + 1
+        self.true_backplanes[idx_backplane] = make_record(self, "Backplane", line[idx_start:idx_end])
 
     # Updates the mirror_backplanes dictionary.
     def update_mirror_backplanes(self, line):
         idx_backplane = self.get_num_mirror_backplanes()
-        idx_start = self.get_idx("Type")
-        idx_end = self.get_idx("Note") + 1
-        self.mirror_backplanes[idx_backplane] = line[idx_start:idx_end]
+        idx_start = self.get_idx("Type", self.row_offset)
+        idx_end = self.get_idx("Note", self.row_offset) + 1
+        self.mirror_backplanes[idx_backplane] = make_record(self, "Backplane", line[idx_start:idx_end])
 
     # Increments the num_true_backplanes variable.
     def increment_num_true_backplanes(self):
@@ -828,8 +1653,9 @@ class Backplane:
 
     # Returns the value the target parameter
     # is associated with the backplane_columns dictionary.
-    def get_idx(self, target):
-        return self.backplane_columns[target]
+    # offset is added to the index (the row_offset, for a CSV line).
+    def get_idx(self, target, offset=0):
+        return self.backplane_columns[target] + offset
 
     # getter method, returns num_true_backplanes.
     def get_num_true_backplanes(self):
@@ -839,218 +1665,1451 @@ class Backplane:
     def get_num_mirror_backplanes(self):
         return self.num_mirror_backplanes
 
+    # Returns the backplane_columns dictionary.
+    def get_columns(self):
+        return self.backplane_columns
+
+    # Returns the true and mirror backplane dictionaries as (group name, dictionary) pairs.
+    def get_groups(self):
+        return [("True", self.true_backplanes), ("Mirror", self.mirror_backplanes)]
+
+    # Returns the columnar store of the true and mirror backplane dictionaries,
+    # rebuilding it if a backplane was recorded since it was last built.
+    def get_store(self):
+        version = (self.num_true_backplanes, self.num_mirror_backplanes)
+        if (self.store is None or self.store_version != version):
+            self.store = ColumnarStore(self.backplane_columns, self.get_groups(),
+                ["Type", "Variant", "Location", "Visual_Inspection", "Burn_In", "QA", "Assembly"])
+            self.store_version = version
+        return self.store
+
     # support function for pyplot method.
     def process_QA(self):
-        idx_QA = self.get_idx("QA")
-        num_true_backplanes_passed = 0
-        num_mirror_backplanes_passed = 0
-
-        for value in self.true_backplanes.values():
-            if (check_yes(value[idx_QA])):
-                num_true_backplanes_passed += 1
-        
-        for value in self.mirror_backplanes.values():
-            if (check_yes(value[idx_QA])):
-                num_mirror_backplanes_passed += 1
+        passed = self.process_QA_stage("QA")
+        num_true_backplanes_passed = passed["True"]
+        num_mirror_backplanes_passed = passed["Mirror"]
 
         return [num_true_backplanes_passed, self.get_num_true_backplanes() - num_true_backplanes_passed,
                 num_mirror_backplanes_passed, self.get_num_mirror_backplanes() - num_mirror_backplanes_passed]
 
-    # output function, creates, saves figures
-    # based on parsed data to local directory.
+    # Counts the backplanes passing a stage of QA_RULES["Backplane"]
+    # (i.e. "Burned_In", "QA", "Assembled").
+    # Returns {"True": n, "Mirror": n}.
+    # Not required for parsing functionality.
+    def process_QA_stage(self, stage):
+        return count_QA_stage(self, "Backplane", stage, self.backplane_columns)
+
+    # Describes the backplane figures (see render_charts()).
     # Not necessary for parsing functionality.
-    def pyplot(self):
-        # QA'd True Backplanes Vs. All True Backplanes
-        labels = "QA'd True Backplanes", "Other True Backplanes"
+    def charts(self):
+        charts = []
         QA_List = self.process_QA()
+
+        # QA'd True Backplanes Vs. All True Backplanes
         sizes = QA_List[0:2]
-        colors = ['blue', 'red']
-        patches, texts = plt.pie(sizes, colors=colors, shadow=True, startangle=90)
-        
-        #To suppress warning.
-        texts = texts
-
-        # Plot
-        plt.figure(figsize=(16,12))
-        plt.title("Ratio of QA'd True Backplanes\n(out of a total of " + str(self.get_num_true_backplanes()) + ' True Backplanes)')
-        plt.legend(patches, labels, loc="upper right")
-        plt.axis('equal')
-        plt.xlabel("QA'd True Backplanes: " + str(sizes[0]) + 
-        " | Other True Backplanes: " + str(sizes[1]))
-
-        plt.pie(sizes, labels=labels, colors=colors,
-        autopct='%1.1f%%', shadow=True, startangle=120)
-        plt.tight_layout()
-        plt.savefig('Backplane_True_QAPieChart.png', bbox_inches='tight', pad_inches = 0.2)
+        charts.append({"file_name": 'Backplane_True_QAPieChart.png', "kind": "pie", "figsize": (16, 12), "startangle": 120,
+                       "labels": ("QA'd True Backplanes", "Other True Backplanes"),
+                       "sizes": sizes,
+                       "colors": ['blue', 'red'],
+                       "title": "Ratio of QA'd True Backplanes\n(out of a total of " + str(self.get_num_true_backplanes()) + ' True Backplanes)',
+                       "xlabel": "QA'd True Backplanes: " + str(sizes[0]) + " | Other True Backplanes: " + str(sizes[1])})
 
         # QA'd Mirror Backplanes Vs. All other Mirror Backplanes
-        labels = "QA'd Mirror Backplanes", "Other Mirror Backplanes"
         sizes = QA_List[2:4]
-        colors = ['blue', 'red']
-        patches, texts = plt.pie(sizes, colors=colors, shadow=True, startangle=90)
-        
-        #To suppress warning.
-        texts = texts
-
-        # Plot
-        plt.figure(figsize=(16,12))
-        plt.title("Ratio of QA'd Mirror Backplanes\n(out of a total of " + str(self.get_num_true_backplanes()) + ' Mirror Backplanes)')
-        plt.legend(patches, labels, loc="upper right")
-        plt.axis('equal')
-        plt.xlabel("QA'd Mirror Backplanes: " + str(sizes[0]) + 
-        " | Other Mirror Backplanes: " + str(sizes[1]))
-
-        plt.pie(sizes, labels=labels, colors=colors,
-        autopct='%1.1f%%', shadow=True, startangle=120)
-        plt.tight_layout()
-        plt.savefig('Backplane_Mirror_QAPieChart.png', bbox_inches='tight', pad_inches = 0.2)
+        charts.append({"file_name": 'Backplane_Mirror_QAPieChart.png', "kind": "pie", "figsize": (16, 12), "startangle": 120,
+                       "labels": ("QA'd Mirror Backplanes", "Other Mirror Backplanes"),
+                       "sizes": sizes,
+                       "colors": ['blue', 'red'],
+                       "title": "Ratio of QA'd Mirror Backplanes\n(out of a total of " + str(self.get_num_true_backplanes()) + ' Mirror Backplanes)',
+                       "xlabel": "QA'd Mirror Backplanes: " + str(sizes[0]) + " | Other Mirror Backplanes: " + str(sizes[1])})
 
-# Driver for reading/parsing/writing the DCB portion of the database.
-with open('CSV_DCB.csv', 'r') as csv_file:
-    csv_reader = csv.reader(csv_file)
-    new_DCB = DCB()
-
-    #Set the indices of the dictionary.
-    new_DCB.set_DCB_columns(0)
+        return charts
 
-    for line in csv_reader:
-        if re.match(pattern_DCB, line[new_DCB.DCB_columns["Serial"]]):
-            assembled = new_DCB.process_line(line)
+    # output function, creates, saves figures
+    # based on parsed data to local directory.
+    # Not necessary for parsing functionality.
+    def pyplot(self, render_cache=None):
+        render_charts(self.charts(), render_cache)
+
+# Charts.
+# The charts() methods describe each of their charts as a dictionary:
+#
+# file_name  - PNG file the chart is saved to.
+# kind       - "pie" (with a legend and percentages), "bar" or "timeline".
+# figsize    - figure size, in inches.
+# labels     - label of each slice/bar (also used for the legend).
+# sizes      - value of each slice/bar.
+# colors     - color of each slice/bar.
+# title      - chart title.
+# xlabel     - x axis label (the counts, under a pie chart).
+# ylabel     - y axis label, for bar and timeline charts.
+# series     - timeline charts only, instead of labels/sizes/colors. List of
+#              dictionaries of label, x (datetimes) and y (values), each drawn
+#              as a step line (the value holds until the next x).
+# startangle - starting angle of a pie chart.
+# metadata   - optional. Metadata saved in the file (see Figure.savefig()).
+#              The format is given by file_name's extension (i.e. ".svg").
+#
+# and render_charts() draws and saves them, skipping the charts
+# whose inputs didn't change since they were last rendered (see RenderCache).
+# Each chart is drawn on its own Figure (not through pyplot's global state),
+# with the style settings of CHART_STYLE, so charts are independent of each
+# other and can be rendered in any order, or in worker processes.
+
+# Increment if the drawing code of the render_*_chart functions changes,
+# so the charts rendered by the previous version aren't reused.
+CHART_STYLE_VERSION = 2
+
+# matplotlib settings every chart is rendered with.
+# The hash salt makes the element IDs of SVG charts the same from run to run.
+CHART_STYLE = {'font.size': 20, 'svg.hashsalt': 'PEPI'}
+
+# Support function. Draws a pie chart on a figure.
+def render_pie_chart(figure, chart):
+    axes = figure.add_subplot()
+    axes.set_title(chart["title"])
+    axes.axis('equal')
+    axes.set_xlabel(chart["xlabel"])
+    patches, texts, autotexts = axes.pie(chart["sizes"], labels=chart["labels"], colors=chart["colors"],
+                                         autopct='%1.1f%%', shadow=True, startangle=chart["startangle"])
+    axes.legend(patches, chart["labels"], loc="upper right")
+    figure.tight_layout()
+    figure.savefig(chart["file_name"], bbox_inches='tight', pad_inches = 0.2, metadata=chart.get("metadata"))
+
+# Support function. Draws a bar chart on a figure.
+def render_bar_chart(figure, chart):
+    import numpy as np
+
+    axes = figure.add_subplot()
+    index = np.arange(len(chart["labels"]))
+    patches = axes.bar(index, chart["sizes"], color=chart["colors"])
+
+    axes.set_xlabel(chart["xlabel"])
+    axes.set_ylabel(chart["ylabel"])
+    axes.set_xticks(index, chart["labels"])
+    axes.set_title(chart["title"])
+    axes.legend(patches, chart["labels"], loc="upper right")
+    figure.savefig(chart["file_name"], metadata=chart.get("metadata"))
+
+# Support function. Draws a timeline chart on a figure.
+def render_timeline_chart(figure, chart):
+    axes = figure.add_subplot()
+    for series in chart["series"]:
+        axes.step(series["x"], series["y"], where="post", label=series["label"])
+
+    axes.set_xlabel(chart["xlabel"])
+    axes.set_ylabel(chart["ylabel"])
+    axes.set_title(chart["title"])
+    axes.legend(loc="upper right")
+    figure.autofmt_xdate()
+    figure.savefig(chart["file_name"], bbox_inches='tight', metadata=chart.get("metadata"))
+
+CHART_RENDERERS = {
+    "pie": render_pie_chart,
+    "bar": render_bar_chart,
+    "timeline": render_timeline_chart,
+}
+
+# Draws and saves one chart. Returns the time it took, in seconds.
+# The figure isn't registered with pyplot, so nothing is left
+# behind once it's saved.
+def render_chart(chart):
+    import matplotlib
+    from matplotlib.figure import Figure
+
+    start = time.perf_counter()
+    with matplotlib.rc_context(CHART_STYLE):
+        figure = Figure(figsize=chart["figsize"])
+        CHART_RENDERERS[chart["kind"]](figure, chart)
+    figure.clear()
+    return time.perf_counter() - start
+
+# Draws and saves charts (see above). With workers > 1, the charts are
+# rendered over a pool of worker processes. Charts that render_cache
+# finds up to date are skipped, and their files left untouched.
+# Returns a list of (file name, render time in seconds, or None if skipped) pairs,
+# in the order of charts.
+def render_charts(charts, render_cache=None, workers=1):
+    import matplotlib
+
+    if (render_cache is None):
+        render_cache = RenderCache(None)
+
+    with matplotlib.rc_context(CHART_STYLE):
+        style = sorted(matplotlib.rcParams.items())
+
+    keys = [render_cache.key(chart, style) for chart in charts]
+    stale = [chart for chart, key in zip(charts, keys) if not render_cache.is_current(chart["file_name"], key)]
+
+    if (workers > 1 and len(stale) > 1):
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            times = dict(zip((chart["file_name"] for chart in stale), pool.map(render_chart, stale)))
+    else:
+        times = {chart["file_name"]: render_chart(chart) for chart in stale}
+
+    for chart, key in zip(charts, keys):
+        if (chart["file_name"] in times):
+            render_cache.record(chart["file_name"], key)
+    render_cache.save()
+
+    return [(chart["file_name"], times.get(chart["file_name"])) for chart in charts]
+
+# Support function. Formats the per-chart timings returned by render_charts().
+def render_report(timings, wall_time=None):
+    result = "Chart                                Render time (s)\n"
+    for file_name, seconds in timings:
+        result += "%-36s %15s\n" % (file_name, "skipped" if seconds is None else "%.3f" % seconds)
+    result += "%-36s %15.3f\n" % ("Total", sum(seconds for file_name, seconds in timings if seconds is not None))
+    if (wall_time is not None):
+        result += "%-36s %15.3f\n" % ("Wall time", wall_time)
+    return result
+
+# Render cache for the charts.
+# Keeps a manifest (Render_Manifest.json, next to the charts) of the hash
+# of each chart's inputs and style settings when it was rendered,
+# and the size and modification time of the file it was saved to.
+# A chart is rendered again only if its hash changed, or its file
+# is missing or was modified since.
+# With output_dir set to None, there is no manifest and every chart is rendered.
+class RenderCache:
+
+    MANIFEST = "Render_Manifest.json"
+
+    def __init__(self, output_dir=".", force=False):
+        self.force = force
+        self.path = None if output_dir is None else os.path.join(output_dir, self.MANIFEST)
+        self.entries = {}
+        self.num_rendered = 0
+        self.num_skipped = 0
+
+        if (self.path is not None and os.path.exists(self.path)):
+            try:
+                with open(self.path, "r") as manifest_file:
+                    self.entries = json.load(manifest_file)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    # Hash of a chart's inputs.
+    def key(self, *inputs):
+        import matplotlib
+        return hashlib.sha1(repr((CHART_STYLE_VERSION, matplotlib.__version__, inputs)).encode("utf-8")).hexdigest()
+
+    # Returns True if file_name was rendered from inputs with this hash, and hasn't changed since.
+    def is_current(self, file_name, key):
+        entry = self.entries.get(file_name)
+        if (self.force or self.path is None or entry is None or entry["key"] != key):
+            return False
+
+        try:
+            stat = os.stat(file_name)
+        except OSError:
+            return False
+        if (stat.st_size != entry["size"] or stat.st_mtime_ns != entry["mtime_ns"]):
+            return False
+
+        self.num_skipped += 1
+        return True
 
-            if (assembled == 1):
-                new_DCB.assembled_dict_update(line)
+    # Records that file_name was just rendered from inputs with this hash.
+    def record(self, file_name, key):
+        self.num_rendered += 1
+        if (self.path is None):
+            return
+
+        stat = os.stat(file_name)
+        self.entries[file_name] = {"key": key, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    # Writes the manifest (through a temporary file, so an interrupted run doesn't corrupt it).
+    def save(self):
+        if (self.path is None):
+            return
+
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as manifest_file:
+            json.dump(self.entries, manifest_file, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+# Buffered writer for the text reports (see the stream_* methods).
+# Writes to any file-like sink (a file, sys.stdout, io.StringIO, ...):
+# the first piece is written and flushed right away, and the rest
+# is collected into chunks of about buffer_size characters,
+# so a report never has to be built in memory as a whole.
+# With close set to True, the sink is closed along with the writer.
+class ReportWriter:
+
+    def __init__(self, sink, buffer_size=65536, close=False):
+        self.sink = sink
+        self.buffer_size = buffer_size
+        self.close_sink = close
+        self.buffer = []
+        self.buffered = 0
+        self.started = False
+
+    # Writes a piece of text.
+    def write(self, text):
+        self.buffer.append(text)
+        self.buffered += len(text)
+        if (not self.started or self.buffered >= self.buffer_size):
+            self.flush()
+            self.started = True
+
+    # Writes every piece of an iterable (i.e. a stream_* generator).
+    def write_all(self, pieces):
+        for text in pieces:
+            self.write(text)
+
+    def flush(self):
+        if (self.buffer):
+            self.sink.write("".join(self.buffer))
+            self.buffer = []
+            self.buffered = 0
+        self.sink.flush()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            if (self.close_sink):
+                self.sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+# Returns a ReportWriter for a report output: a path (the file is created,
+# and closed with the writer), "-" for stdout, or a file-like object
+# (left open).
+def open_report(output, buffer_size=65536):
+    if (output == "-"):
+        return ReportWriter(sys.stdout, buffer_size)
+    if (isinstance(output, (str, os.PathLike))):
+        return ReportWriter(open(output, "w"), buffer_size, close=True)
+    return ReportWriter(output, buffer_size)
+
+# Support function. Returns the parsed state of a board object:
+# its parsing dictionaries and counter variables
+# (the columns dictionaries, row_offset and settings are left out).
+def parsed_state(board):
+    state = {}
+    for name, value in vars(board).items():
+        if (name.endswith("_columns") or name == "row_offset" or isinstance(value, bool)):
+            continue
+        if (isinstance(value, (dict, int))):
+            state[name] = value
+    return state
+
+# Support function. Identifies the column layout and spec that parsed results
+# of a board depend on, for invalidating the parse caches.
+def board_signature(board, board_type, cache_format):
+    columns = sorted((name, sorted(value.items())) for name, value in vars(board).items()
+                     if name.endswith("_columns"))
+    return repr((cache_format, columns, getattr(board, "row_offset", 0), BOARD_SPECS[board_type]))
+
+# Support function. Content hash of a parsed CSV row.
+# The row is hashed as its repr(), which quotes and escapes each cell,
+# so no two different rows (i.e. [] and [""]) hash the same content.
+def row_hash(line):
+    return hashlib.sha1(repr(list(line)).encode("utf-8")).digest()
+
+# Persistent parse cache for one board type's CSV file.
+# Saves the hash and classification of every row, the rows that were recorded,
+# and the parsed state of the board. On the next run, only the rows whose hash
+# is new are classified; rows that disappeared are taken back out,
+# and the counter variables are adjusted by the difference.
+# The cache is invalidated (and the file fully parsed) if the columns
+# dictionaries or the board's spec in BOARD_SPECS change.
+class ParseCache:
+
+    # Increment if the layout of the cache file (or row_hash()) changes.
+    cache_format = 2
+
+    def __init__(self, cache_dir, board_type):
+        self.path = os.path.join(cache_dir, board_type + ".pickle")
+        self.board_type = board_type
+        self.num_reprocessed = 0
+
+    def signature(self, board):
+        return board_signature(board, self.board_type, self.cache_format)
+
+    # Returns the saved cache, or None if there is none, or it doesn't
+    # match the board's current signature.
+    def load(self, board):
+        try:
+            with open(self.path, "rb") as cache_file:
+                cached = pickle.load(cache_file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+        if (cached.get("signature") != self.signature(board)):
+            return None
+        return cached
+
+    def save(self, board, rows, lines):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        cached = {
+            "signature": self.signature(board),
+            "rows": rows,
+            "lines": lines,
+            "state": parsed_state(board),
+        }
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as cache_file:
+            pickle.dump(cached, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.path)
+
+    # Applies a route (tuple of method names) to an empty copy of the board,
+    # returning (counter contributions, {(dictionary name, key): value}).
+    def contribution(self, board, route, line):
+        probe = copy.copy(board)
+        for name, value in parsed_state(board).items():
+            setattr(probe, name, {} if isinstance(value, dict) else 0)
+
+        dict_update, increment = route
+        getattr(probe, dict_update)(line)
+        getattr(probe, increment)()
+
+        counters = {}
+        entries = {}
+        for name, value in parsed_state(probe).items():
+            if (isinstance(value, dict)):
+                for key, entry in value.items():
+                    entries[(name, key)] = entry
+            elif (value != 0):
+                counters[name] = value
+        return counters, entries
+
+    # Returns the route names of a row, classifying it if it isn't known yet.
+    def route_names(self, classifier, known, hash_value, line):
+        if (hash_value not in known):
+            route = classifier.classify(line)
+            known[hash_value] = None if route is None else tuple(method.__name__ for method in route)
+            self.num_reprocessed += 1
+        return known[hash_value]
+
+    # Parses every row into the board in order, classifying only the
+    # rows that aren't in known, and saves the cache.
+    def replay(self, board, classifier, lines, hashes, known):
+        rows = []
+        recorded = {}
+        for line, hash_value in zip(lines, hashes):
+            names = self.route_names(classifier, known, hash_value, line)
+            if (names is not None):
+                getattr(board, names[0])(line)
+                getattr(board, names[1])()
+                recorded[hash_value] = line
+            rows.append((hash_value, names))
+
+        self.save(board, rows, recorded)
+        return self.num_reprocessed
+
+    # Parses the rows of csv_reader into the board, reusing the cache
+    # where possible, and saves the updated cache.
+    # Returns the number of rows that had to be classified.
+    def update(self, board, classifier, csv_reader):
+        lines = list(csv_reader)
+        hashes = [row_hash(line) for line in lines]
+        cached = self.load(board)
+
+        if (cached is None):
+            return self.replay(board, classifier, lines, hashes, {})
+
+        known = dict(cached["rows"])
+        old_hashes = [hash_value for hash_value, names in cached["rows"]]
+        old_count = collections.Counter(old_hashes)
+        new_count = collections.Counter(hashes)
+
+        # The rows are replayed from the cached classifications instead of updated
+        # one by one when the result depends on the order of the rows in a way
+        # the differences can't capture: boards keyed by position (the backplanes),
+        # duplicated rows being added or removed, or rows that moved.
+        changed = (old_count - new_count) + (new_count - old_count)
+        if (BOARD_SPECS[self.board_type].get("positional_keys", False)
+        or any(old_count[hash_value] > 1 or new_count[hash_value] > 1 for hash_value in changed)
+        or ([hash_value for hash_value in old_hashes if hash_value in new_count] !=
+            [hash_value for hash_value in hashes if hash_value in old_count])):
+            return self.replay(board, classifier, lines, hashes, known)
+
+        for name, value in cached["state"].items():
+            setattr(board, name, value)
+        board.store = None
+
+        recorded = cached["lines"]
+        affected = set()
+
+        # Rows that disappeared: subtract their counters.
+        for hash_value, number in (old_count - new_count).items():
+            names = known[hash_value]
+            if (names is None):
+                continue
+            counters, entries = self.contribution(board, names, recorded[hash_value])
+            for name, value in counters.items():
+                setattr(board, name, getattr(board, name) - value * number)
+            affected.update(entries)
+
+        # New rows: classify them, and add their counters.
+        line_of = dict(zip(hashes, lines))
+        for hash_value, number in (new_count - old_count).items():
+            line = line_of[hash_value]
+            names = self.route_names(classifier, known, hash_value, line)
+            if (names is None):
+                continue
+            counters, entries = self.contribution(board, names, line)
+            for name, value in counters.items():
+                setattr(board, name, getattr(board, name) + value * number)
+            affected.update(entries)
+
+        # Dictionary entries touched by a changed row are re-resolved:
+        # removed, then set again from the last remaining row that writes them.
+        for name, key in affected:
+            getattr(board, name).pop(key, None)
+
+        affected_keys = set(key for name, key in affected)
+        rows = []
+        new_recorded = {}
+        for line, hash_value in zip(lines, hashes):
+            names = known[hash_value]
+            rows.append((hash_value, names))
+            if (names is None):
+                continue
+
+            new_recorded[hash_value] = line
+            if (affected and not affected_keys.isdisjoint(line)):
+                counters, entries = self.contribution(board, names, line)
+                for entry, value in entries.items():
+                    if (entry in affected):
+                        getattr(board, entry[0])[entry[1]] = value
+
+        self.save(board, rows, new_recorded)
+        return self.num_reprocessed
+
+# Support function. Returns the length of the complete CSV records at the start of data
+# (bytes starting at a record boundary): the position after the last newline
+# that isn't inside a quoted field, or 0 if there is none.
+def complete_records_end(data):
+    end = 0
+    start = 0
+    quotes = 0
+    position = data.find(b"\n")
+    while (position != -1):
+        quotes += data.count(b'"', start, position)
+        if (quotes % 2 == 0):
+            end = position + 1
+        start = position
+        position = data.find(b"\n", position + 1)
+    return end
+
+# Support function. Checks that data (the bytes of a CSV file's last record,
+# starting at a record boundary) is a complete record: no quoted field is
+# left open, and it has num_fields fields, as many as the first record (the
+# exports have the same number in every record, so a file that is still
+# being written ends with a shorter one).
+def is_complete_record(data, num_fields):
+    if (not data.strip(b"\r\n") or data.count(b'"') % 2 != 0):
+        return False
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        return False
+    return len(next(csv.reader(io.StringIO(text, newline=None)))) == num_fields
 
-            elif (assembled == 2):
-                new_DCB.unassembled_dict_update(line) 
+# Support function. Checks that text (the contents of a CSV file) ends with a
+# complete record (see is_complete_record()).
+def is_complete_csv(text):
+    if (text.count('"') % 2 != 0):
+        return False
+    body = text.rstrip("\r\n")
+    if (not body):
+        return False
 
+    # The last record starts after the last newline outside a quoted field.
+    data = body.encode("utf-8")
+    last = data[data.rfind(b"\n") + 1:]
+    if (last.count(b'"') % 2 != 0):
+        last = data[complete_records_end(data[:len(data) - len(last)]):]
+    first = next(csv.reader(io.StringIO(body, newline=None)))
+    return is_complete_record(last, len(first))
+
+# Append-only parse state for one board type's CSV file.
+# Saves the byte offset of the end of the last complete record parsed,
+# a checksum of the parsed prefix, and the parsed state of the board.
+# A complete last record without a newline (the exports don't end with one)
+# is parsed, but left out of the saved offset and state, so it's parsed
+# again on the next run, with whatever was appended to it.
+# On the next run, if the prefix is unchanged, only the bytes after
+# the offset are read and parsed into the saved state.
+# Otherwise (the file was edited, not just appended to), the file is fully parsed.
+class TailCache:
+
+    # Increment if the layout of the cache file changes.
+    cache_format = 2
+
+    # Bytes hashed at a time by prefix_hash().
+    read_size = 1 << 20
+
+    def __init__(self, cache_dir, board_type):
+        self.path = os.path.join(cache_dir, board_type + ".tail")
+        self.board_type = board_type
+        self.num_new_rows = 0
+
+    def signature(self, board):
+        return board_signature(board, self.board_type, self.cache_format)
+
+    # Hash of the first offset bytes of the (binary) csv_file, all of them,
+    # so an edit anywhere in the prefix is detected. The hash object is
+    # returned so the bytes parsed after the offset can be added to it.
+    def prefix_hash(self, csv_file, offset):
+        check = hashlib.sha1()
+        csv_file.seek(0)
+        while (offset > 0):
+            data = csv_file.read(min(offset, self.read_size))
+            if (not data):
+                break
+            check.update(data)
+            offset -= len(data)
+        return check
+
+    def load(self, board):
+        try:
+            with open(self.path, "rb") as cache_file:
+                cached = pickle.load(cache_file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+        if (cached.get("signature") != self.signature(board)):
+            return None
+        return cached
+
+    def save(self, board, offset, check):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        cached = {
+            "signature": self.signature(board),
+            "offset": offset,
+            "check": check,
+            "state": parsed_state(board),
+        }
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as cache_file:
+            pickle.dump(cached, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.path)
+
+    # Support function. Number of fields of the first record of the
+    # (binary) csv_file, or 0 if it has none.
+    def first_record_fields(self, csv_file):
+        csv_file.seek(0)
+        data = csv_file.read(self.read_size)
+        end = complete_records_end(data) or len(data)
+        try:
+            text = data[:end].decode("utf-8")
+        except UnicodeDecodeError:
+            return 0
+        return len(next(csv.reader(io.StringIO(text, newline=None)), []))
+
+    # Parses the rows of data (decoded the way open() would) into the board.
+    def parse_bytes(self, classifier, data):
+        text = data.decode("utf-8")
+        for line in csv.reader(io.StringIO(text, newline=None)):
+            classifier.update(line)
+            self.num_new_rows += 1
+
+    # Parses the CSV file at path into the board, resuming after the
+    # saved offset when the prefix is unchanged, and saves the new offset.
+    # With data (the bytes of the file, already read), the file isn't read again.
+    # Returns True if the saved state was resumed, False for a full parse.
+    def update(self, board, classifier, path, data=None):
+        cached = self.load(board)
+        resumed = False
+
+        with (open(path, "rb") if (data is None) else io.BytesIO(data)) as csv_file:
+            offset = 0
+            check = hashlib.sha1()
+            size = csv_file.seek(0, os.SEEK_END)
+            if (cached is not None and cached["offset"] <= size):
+                prefix_check = self.prefix_hash(csv_file, cached["offset"])
+                if (prefix_check.digest() == cached["check"]):
+                    for name, value in cached["state"].items():
+                        setattr(board, name, value)
+                    board.store = None
+                    offset = cached["offset"]
+                    check = prefix_check
+                    resumed = True
+
+            csv_file.seek(offset)
+            data = csv_file.read()
+
+            # Only complete records are parsed. A partial last record
+            # (i.e. the scraper is still writing it) is left for the next
+            # run, when it's complete.
+            end = complete_records_end(data)
+            self.parse_bytes(classifier, data[:end])
+            # The hash of the new prefix continues the one of the old prefix.
+            check.update(data[:end])
+            self.save(board, offset + end, check.digest())
+
+            # A complete last record without a newline is parsed after
+            # the state is saved, so the saved offset stays before it.
+            if (end < len(data) and is_complete_record(data[end:], self.first_record_fields(csv_file))):
+                self.parse_bytes(classifier, data[end:])
+
+        return resumed
+
+# Byte-level prefilter (see --mmap-prefilter).
+# Most rows of a sparse CSV file are placeholders (",A1,,,,,,") that can't
+# be valid boards, yet csv.reader decodes every one of them before the
+# classifier rejects it. A row can only be classified as a board if it
+# contains one of the prefixes of its board type's spec (the key column
+# has to start with one), so the file is memory-mapped, the lines without
+# a prefix are dropped as bytes, and only the rest is decoded.
+# Records spanning several lines (quoted cells containing newlines) are
+# found first, and kept or dropped whole, so they still parse correctly.
+
+# Bytes of single-line records split into lines at a time.
+PREFILTER_CHUNK_SIZE = 1 << 24
+
+# Support function. Returns the (field start, field end) offsets of the quoted
+# fields of data that contain a newline, in order. The quotes are paired from
+# the start of data (as in complete_records_end(), a field is open while an
+# odd number of quotes has been seen; an escaped quote "" closes and reopens
+# it), and an unterminated quote runs to the end of data.
+def multiline_fields(data):
+    fields = []
+    position = data.find(b'"')
+    while (position != -1):
+        close = data.find(b'"', position + 1)
+        if (close == -1):
+            fields.append((position, len(data)))
+            break
+        if (data.find(b"\n", position, close) != -1):
+            fields.append((position, close + 1))
+        position = data.find(b'"', close + 1)
+    return fields
+
+# Support function. Returns the (start, end) offsets of the records of data
+# that span several lines, in order.
+def multiline_records(data):
+    records = []
+    for field_start, field_end in multiline_fields(data):
+        start = data.rfind(b"\n", 0, field_start) + 1
+        end = data.find(b"\n", field_end)
+        end = len(data) if (end == -1) else end + 1
+
+        # Another multi-line field of the previous record.
+        if (records and start < records[-1][1]):
+            records[-1] = (records[-1][0], max(end, records[-1][1]))
+        else:
+            records.append((start, end))
+    return records
+
+# Support function. Returns the lines of data[start:end] (single-line records)
+# that pattern finds a prefix in, as bytes ending in newlines.
+def prefilter_lines(data, pattern, start, end):
+    pieces = []
+    while (start < end):
+        stop = end
+        if (end - start > PREFILTER_CHUNK_SIZE):
+            stop = data.rfind(b"\n", start, start + PREFILTER_CHUNK_SIZE) + 1 or end
+        lines = list(filter(pattern.search, data[start:stop].split(b"\n")))
+        if (lines):
+            pieces.append(b"\n".join(lines) + b"\n")
+        start = stop
+    return b"".join(pieces)
+
+# Support function. Returns the records of data (the bytes of a CSV file)
+# that contain one of the board type's prefixes, as bytes.
+def prefilter_records(data, board_type):
+    pattern = re.compile(b"|".join(re.escape(prefix.encode("utf-8")) for prefix in BOARD_SPECS[board_type]["prefixes"]))
+    pieces = []
+    position = 0
+    for start, end in multiline_records(data) + [(len(data), len(data))]:
+        pieces.append(prefilter_lines(data, pattern, position, start))
+        if (pattern.search(data, start, end)):
+            pieces.append(data[start:end])
+        position = end
+    return b"".join(pieces)
+
+# Yields the rows of the CSV file at path that contain one of the board type's
+# prefixes (in order, as arrays of strings, decoded the way open() would).
+# Every row the board type's classifier would accept is among them.
+# With data (the bytes of the file, already read), the file isn't read again;
+# otherwise it's memory-mapped.
+def prefiltered_rows(path, board_type, data=None):
+    if (data is not None):
+        text = prefilter_records(data, board_type).decode("utf-8")
+    else:
+        with open(path, "rb") as csv_file:
+            if (os.fstat(csv_file.fileno()).st_size == 0):
+                return
+            with mmap.mmap(csv_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                text = prefilter_records(mapped, board_type).decode("utf-8")
+
+    yield from csv.reader(io.StringIO(text, newline=None))
+
+# Returns the boards of a parsed board object as a dictionary of
+# record key -> (group name, row), where the record key is built from the
+# board type's record_key columns in BOARD_SPECS (i.e. the DCB serial).
+# Boards with a blank record key (backplanes without an SN) are keyed by
+# their record_fallback columns and their number among those boards instead,
+# i.e. "True/F/#2".
+def board_records(board, board_type):
+    spec = BOARD_SPECS[board_type]
+    columns = board.get_columns()
+    records = {}
+    numbers = collections.Counter()
+
+    for group, dictionary in board.get_groups():
+        for row in dictionary.values():
+            parts = [row[columns[column]] for column in spec["record_key"]]
+            if (not all(parts) and "record_fallback" in spec):
+                fallback = "/".join(row[columns[column]] for column in spec["record_fallback"])
+                numbers[fallback] += 1
+                key = fallback + "/#" + str(numbers[fallback])
             else:
-                new_DCB.other_dict_update(line)
-            
-            new_DCB.increment_total()
+                key = "/".join(parts)
+            records[key] = (group, row)
+    return records
+
+# Instrumentation of the board pipelines (see --profile).
+# While a PipelineStats is active (see start_stats()), the parsing functions
+# time each stage of each board type and count the rows it sees, matches
+# and routes to each dictionary update method. When it isn't, the only cost
+# is a check of PIPELINE_STATS per file and per QA summary.
+# Stages:
+# - layout          - finding the header row (see apply_layout()).
+# - read            - decoding the CSV rows.
+# - classify        - checking the rows against the board's spec.
+# - dict_update     - the dictionary update and counter methods.
+# - parse_cached    - parsing through a parse or tail cache (not split into the above).
+# - QA_aggregation  - the process_* summaries.
+# - text_output     - writing the text report.
+# - plotting        - rendering the charts.
+PIPELINE_STATS = None
+
+# Context manager that does nothing, used while no PipelineStats is active.
+NULL_TIMER = contextlib.nullcontext()
+
+class PipelineStats:
 
-    new_DCB.pyplot()
-    
-    output_stream = open("Text_Output_DCB.txt","w")
-    if (output_stream):
-        result = new_DCB.output_stream()
-        result += "\n" + new_DCB.output_stream_assembled_individual_stats()
-        result += "\n" + new_DCB.output_stream_unassembled_individual_stats()
-        result += "\n" + new_DCB.output_stream_other_individual_stats()
-        output_stream.write(result)
+    def __init__(self):
+        # (board type, stage) -> [number of calls, seconds].
+        self.timers = collections.defaultdict(lambda: [0, 0.0])
+        # (board type, counter) -> count.
+        self.counters = collections.Counter()
+        self.start_time = time.perf_counter()
+
+    # Adds seconds to a stage's timer.
+    def add_time(self, board_type, stage, seconds, calls=1):
+        timer = self.timers[(board_type, stage)]
+        timer[0] += calls
+        timer[1] += seconds
+
+    # Context manager timing the code it wraps as a stage of a board type.
+    @contextlib.contextmanager
+    def timer(self, board_type, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(board_type, stage, time.perf_counter() - start)
+
+    def count(self, board_type, counter, number=1):
+        self.counters[(board_type, counter)] += number
+
+    # Instrumented version of the parsing loop of parse_board(),
+    # timing the reading, classification and dictionary updates of each row.
+    def parse_rows(self, board_type, classifier, csv_reader):
+        clock = time.perf_counter
+        read_time = classify_time = update_time = 0.0
+        num_rows = 0
+        routed = collections.Counter()
+
+        end = clock()
+        for line in csv_reader:
+            start = clock()
+            read_time += start - end
+            route = classifier.classify(line)
+            classified = clock()
+            classify_time += classified - start
+
+            num_rows += 1
+            if (route is not None):
+                dict_update, increment = route
+                dict_update(line)
+                increment()
+                routed[dict_update.__name__] += 1
+            end = clock()
+            update_time += end - classified
+        read_time += clock() - end
+
+        self.add_time(board_type, "read", read_time)
+        self.add_time(board_type, "classify", classify_time)
+        self.add_time(board_type, "dict_update", update_time)
+        self.count(board_type, "rows", num_rows)
+        self.count(board_type, "rows_matched", sum(routed.values()))
+        for name, number in routed.items():
+            self.count(board_type, "routed:" + name, number)
+
+    # The timers and counters as a dictionary (for JSON).
+    def as_dict(self):
+        result = {"wall_time": time.perf_counter() - self.start_time, "timers": {}, "counters": {}}
+        for (board_type, stage), (calls, seconds) in self.timers.items():
+            result["timers"].setdefault(board_type, {})[stage] = {"calls": calls, "seconds": seconds}
+        for (board_type, counter), number in self.counters.items():
+            result["counters"].setdefault(board_type, {})[counter] = number
+        return result
+
+    # The timers and counters as a text report.
+    def report(self):
+        result = "Board      Stage                  Calls      Seconds\n"
+        for (board_type, stage), (calls, seconds) in self.timers.items():
+            result += "%-10s %-18s %9d %12.6f\n" % (board_type, stage, calls, seconds)
+        result += "%-10s %-18s %9s %12.6f\n" % ("", "Wall time", "", time.perf_counter() - self.start_time)
+        result += "\nBoard      Counter                                 Count\n"
+        for (board_type, counter), number in self.counters.items():
+            result += "%-10s %-36s %9d\n" % (board_type, counter, number)
+        return result
+
+# Activates a new PipelineStats, and returns it.
+def start_stats():
+    global PIPELINE_STATS
+    PIPELINE_STATS = PipelineStats()
+    return PIPELINE_STATS
+
+# Deactivates the PipelineStats, and returns it.
+def stop_stats():
+    global PIPELINE_STATS
+    stats = PIPELINE_STATS
+    PIPELINE_STATS = None
+    return stats
+
+# Returns a context manager timing a stage of a board type
+# if a PipelineStats is active, or one doing nothing otherwise.
+def stage_timer(board_type, stage):
+    if (PIPELINE_STATS is None):
+        return NULL_TIMER
+    return PIPELINE_STATS.timer(board_type, stage)
+
+# Number of rows searched for the header row (see infer_layout()).
+HEADER_SCAN_ROWS = 100
+
+# Raised when a CSV's header row can't be found, or its columns can't be
+# matched to the board type's header spec in BOARD_SPECS.
+class LayoutError(ValueError):
+    pass
+
+# Support function. Normalizes a header cell for matching (case, whitespace).
+def normalize_header(cell):
+    return " ".join(cell.lower().split())
+
+# Support function. Matches a row against a board type's header spec.
+# Returns (dictionary of column -> CSV index, list of the columns that didn't match).
+# The columns have to appear in the order of the spec.
+def match_header(header, row):
+    cells = [normalize_header(cell) for cell in row]
+    layout = {}
+    missing = []
+    pos = 0
+    for column, text in header:
+        if (text is None):
+            continue
+        pattern = re.compile(re.escape(text) + "(?![a-z0-9])")
+        for idx in range(pos, len(cells)):
+            if (pattern.match(cells[idx])):
+                layout[column] = idx
+                pos = idx + 1
+                break
+        else:
+            missing.append(column)
+
+    # Columns without header text sit just before the next column.
+    for number in range(len(header) - 1, -1, -1):
+        column, text = header[number]
+        if (text is None and not missing):
+            following = [layout[name] for name, text in header[number + 1:] if name in layout]
+            if (not following or following[0] == 0):
+                missing.append(column)
+            else:
+                layout[column] = following[0] - 1
+    return layout, missing
+
+# Finds the header row of a board type's CSV among its first rows, and
+# builds the layout of the columns from the header text (see "header" in BOARD_SPECS).
+# Returns (index of the header row, fingerprint of the header row, dictionary of column -> CSV index).
+# Throws a LayoutError if no row has every column.
+def infer_layout(board_type, rows):
+    header = BOARD_SPECS[board_type]["header"]
+    closest = None
+    for number, row in enumerate(itertools.islice(rows, HEADER_SCAN_ROWS)):
+        layout, missing = match_header(header, row)
+        if (not missing):
+            return number, row_hash(row).hex(), layout
+        if (closest is None or len(missing) < len(closest)):
+            closest = missing
+
+    raise LayoutError("No header row found in the first " + str(HEADER_SCAN_ROWS) + " rows of the " + board_type +
+                      " CSV (the closest row is missing: " + ", ".join(closest or [column for column, text in header]) + ")")
+
+# Cache of the layouts inferred from the header rows, in a JSON file.
+# Each board type's entry holds the index and fingerprint of its header row,
+# and the layout. On the next run, if the row at that index still has the
+# same fingerprint, the layout is reused without searching for the header;
+# otherwise the header is searched for again, and the entry replaced if
+# the columns are all found (the run fails with a LayoutError if they aren't).
+class LayoutCache:
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if (os.path.exists(path)):
+            try:
+                with open(path, "r") as cache_file:
+                    self.entries = json.load(cache_file)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    # Returns the layout of the rows of a board type's CSV (see infer_layout()).
+    def layout(self, board_type, rows):
+        entry = self.entries.get(board_type)
+        rows = iter(rows)
+        seen = []
+        if (entry is not None and entry["header"] == BOARD_SPECS[board_type]["header"]):
+            seen = list(itertools.islice(rows, entry["row"] + 1))
+            if (len(seen) == entry["row"] + 1 and row_hash(seen[-1]).hex() == entry["fingerprint"]):
+                return entry["layout"]
+
+        number, fingerprint, layout = infer_layout(board_type, itertools.chain(seen, rows))
+        self.entries[board_type] = {"row": number, "fingerprint": fingerprint, "layout": layout,
+                                    "header": BOARD_SPECS[board_type]["header"]}
+        self.save()
+        return layout
+
+    def save(self):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as cache_file:
+            json.dump(self.entries, cache_file, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+# Sets the board's columns dictionary from the header row of the CSV at path
+# (see infer_layout()), through the layout cache file if one is given.
+# With text (the contents of the file, already read), the file isn't read again.
+def apply_layout(board, board_type, path, layout_cache=None, text=None):
+    with (open(path, 'r') if (text is None) else io.StringIO(text, newline=None)) as csv_file:
+        rows = csv.reader(csv_file)
+        if (layout_cache is not None):
+            board.set_columns(LayoutCache(layout_cache).layout(board_type, rows))
+        else:
+            board.set_columns(infer_layout(board_type, rows)[2])
+    return board
+
+# Creates a board object of the given type ("DCB", "LVR", "CCM" or "Backplane"),
+# with its columns dictionary set the same way as in the drivers.
+def new_board(board_type, columnar=False):
+    if (board_type == "DCB"):
+        board = DCB()
+        board.set_DCB_columns(0)
+    elif (board_type == "LVR"):
+        board = LVR()
+        board.set_LVR_columns(6)
+    elif (board_type == "CCM"):
+        board = CCM()
+        board.set_CCM_columns(0)
     else:
-        print("Output stream failed to open.")
+        board = Backplane()
+        board.set_backplane_columns(0)
+
+    board.columnar = columnar
+    return board
+
+# Opens the board's CSV file at path, and parses it into the board object.
+# The board's columns are first set from the file's header row (see apply_layout()).
+# With a tail_cache directory, only the rows appended since the last run
+# are parsed (see TailCache). Otherwise, see parse_board(); with prefilter
+# set, only the rows containing one of the board type's prefixes are
+# decoded and parsed (see prefiltered_rows()).
+# With data (the bytes of the file, already read, i.e. to check that it's
+# completely written), those are parsed instead of reading the file again.
+def parse_board_file(board, board_type, path, parse_cache=None, tail_cache=None, layout_cache=None,
+                     prefilter=False, data=None):
+    text = None if (data is None) else data.decode("utf-8")
+    with stage_timer(board_type, "layout"):
+        apply_layout(board, board_type, path, layout_cache, text)
+
+    if (tail_cache is not None):
+        classifier = BoardClassifier(board, BOARD_SPECS[board_type])
+        with stage_timer(board_type, "parse_cached"):
+            TailCache(tail_cache, board_type).update(board, classifier, path, data)
+        return board
+
+    if (prefilter):
+        return parse_board(board, board_type, prefiltered_rows(path, board_type, data), parse_cache)
+
+    with (open(path, 'r') if (text is None) else io.StringIO(text, newline=None)) as csv_file:
+        csv_reader = csv.reader(csv_file)
+        return parse_board(board, board_type, csv_reader, parse_cache)
+
+# Parses the rows of a csv_reader into the board object.
+# The classifier (see BoardClassifier) checks each row against the board's spec,
+# and routes the valid rows to the board's dictionary update methods.
+# With a parse_cache directory, only the rows that changed since the last run
+# are classified (see ParseCache). While a PipelineStats is active, the
+# parsing is timed and counted (see PipelineStats.parse_rows()).
+def parse_board(board, board_type, csv_reader, parse_cache=None):
+    classifier = BoardClassifier(board, BOARD_SPECS[board_type])
+
+    if (parse_cache is not None):
+        with stage_timer(board_type, "parse_cached"):
+            ParseCache(parse_cache, board_type).update(board, classifier, csv_reader)
+        return board
+
+    if (PIPELINE_STATS is not None):
+        PIPELINE_STATS.parse_rows(board_type, classifier, csv_reader)
+        return board
 
-# Driver for reading/parsing/writing the LVR portion of the database.
-with open('CSV_LVR.csv', 'r') as csv_file:
-    csv_reader = csv.reader(csv_file)
-    new_LVR = LVR()
-    new_LVR.set_LVR_columns(6)
-    idx_serial = new_LVR.get_idx("Serial", 4)
-
-    # The csv_reader iterator returns a string array
-    # corresponding to each row in the CSV file, which 
-    # is named "line" here.
     for line in csv_reader:
+        classifier.update(line)
+    return board
+
+# CSV file of each board type, in the input directory.
+BOARD_FILES = {
+    "DCB": "CSV_DCB.csv",
+    "LVR": "CSV_LVR.csv",
+    "CCM": "CSV_CCM.csv",
+    "Backplane": "CSV_Backplane.csv",
+}
+
+# Splits a comma separated --boards value of the scripts into a list of
+# board types (keys of BOARD_FILES, in any case).
+# Throws an argparse error for unknown names.
+def parse_board_types(value):
+    board_types = []
+    for name in value.split(","):
+        matches = [board_type for board_type in BOARD_FILES if board_type.lower() == name.strip().lower()]
+        if (not matches):
+            raise argparse.ArgumentTypeError("unknown board '" + name + "' (choose from " + ", ".join(BOARD_FILES) + ")")
+        board_types.extend(matches)
+    return board_types
+
+# Parses the CSV files of a scrape directory, without any output.
+# Returns a dictionary of board type -> parsed board object.
+def load_snapshot(input_dir, board_types=None):
+    boards = {}
+    for board_type in (board_types or BOARD_FILES):
+        board = new_board(board_type)
+        parse_board_file(board, board_type, os.path.join(input_dir, BOARD_FILES[board_type]))
+        boards[board_type] = board
+    return boards
 
-        # If the serial number matches any 
-        # of the accepted patterns,
-        # it's a valid LVR that can be recorded.
-        if (re.match(pattern_LVR_CZ, line[idx_serial])
-        or re.match(pattern_LVR_EN, line[idx_serial])
-        or re.match(pattern_LVR_ER, line[idx_serial])
-        or re.match(pattern_LVR_ES, line[idx_serial])):
-            subtype_code = new_LVR.process_line(line)
-
-            # if-else chain updates LVR dictionaries
-            # as appropriate, by passing the line
-            # to the appropriate LVR class method.
-            if (subtype_code == 1):
-                new_LVR.dict_update_LVR_12A(line)
-
-            elif (subtype_code == 2):
-                new_LVR.dict_update_LVR_25A(line)
-
-            elif (subtype_code == 3):
-                new_LVR.dict_update_LVR_15MS(line)
-            
-            else:
-                new_LVR.dict_update_LVR_other(line)
+# Driver for reading/parsing/writing the DCB portion of the database.
+# The text report is written to report_output (a path, "-" for stdout,
+# or a file-like object; None skips it).
+# Returns the DCB object, so the parsed dictionaries can be used
+# when this file is imported as a library.
+def run_dcb(input_dir=".", plots=True, columnar=False, parse_cache=None, tail_cache=None, render_cache=None,
+            report_output="Text_Output_DCB.txt", layout_cache=None, prefilter=False):
+
+    # Creates the DCB object, and sets the indices of the dictionary.
+    new_DCB = new_board("DCB", columnar)
+
+    # The classifier checks the serial number against
+    # the DCB spec, and routes the line to the assembled,
+    # unassembled or other dictionary.
+    parse_board_file(new_DCB, "DCB", os.path.join(input_dir, BOARD_FILES["DCB"]), parse_cache, tail_cache,
+                     layout_cache, prefilter)
+
+    if (plots):
+        new_DCB.pyplot(render_cache)
+    
+    # The report is written one DCB at a time.
+    if (report_output is not None):
+        with stage_timer("DCB", "text_output"), open_report(report_output) as report:
+            report.write_all(new_DCB.stream_report())
 
-            # If the regex matched, it's an existing LVR,
-            # so increment the total count.
-            new_LVR.increment_total()
+    return new_DCB
+
+# Driver for reading/parsing/writing the LVR portion of the database.
+# Returns the LVR object.
+def run_lvr(input_dir=".", plots=True, columnar=False, parse_cache=None, tail_cache=None, render_cache=None,
+            layout_cache=None, prefilter=False):
+    new_LVR = new_board("LVR", columnar)
+
+    # If the serial number matches any
+    # of the accepted prefixes, it's a valid LVR,
+    # and the classifier passes it to the dictionary
+    # update method of its LVR type.
+    parse_board_file(new_LVR, "LVR", os.path.join(input_dir, BOARD_FILES["LVR"]), parse_cache, tail_cache,
+                     layout_cache, prefilter)
 
     # Calls output function to create and save graphs to local directory.
-    new_LVR.pyplot()
+    if (plots):
+        new_LVR.pyplot(render_cache)
     """
-    output_stream = open("Demonstration_Output_LVR.txt","w")
-    if (output_stream):
-        output_stream.write(new_LVR.output_stream())
-        output_stream.write("\n")
-        output_stream.write(new_LVR.output_stream_individual_stats())
-    else:
-        print("Output stream failed to open.")     
+    with open_report("Demonstration_Output_LVR.txt") as report:
+        report.write_all(new_LVR.stream_general_stats())
+        report.write("\n")
+        report.write_all(new_LVR.stream_individual_stats())
     """
-        
+
+    return new_LVR
+
 #Driver for reading/parsing/writing the CCM portion of the database.
-with open('CSV_CCM.csv', 'r') as csv_file:
+# Returns the CCM object.
+def run_ccm(input_dir=".", plots=True, columnar=False, parse_cache=None, tail_cache=None, render_cache=None,
+            layout_cache=None, prefilter=False):
+    new_CCM = new_board("CCM", columnar)
 
-    # Setup. Creates CCM object, and a csv_iterator.
-    csv_reader = csv.reader(csv_file)
-    new_CCM = CCM()
-    new_CCM.set_CCM_columns(0)
-    idx_roll = new_CCM.get_idx("Good_Count")
-    idx_id = new_CCM.get_idx("Roll_ID") 
+    # A roll was placed into the database if and only if
+    # the good CCM column entry was filled out.
+    # The classifier checks that, then routes the roll
+    # to the dictionary of its type by the Roll ID's prefix.
+    parse_board_file(new_CCM, "CCM", os.path.join(input_dir, BOARD_FILES["CCM"]), parse_cache, tail_cache,
+                     layout_cache, prefilter)
 
-    # The CSV_reader outputs an array of strings representing 
-    # the CSV's row.
-    for line in csv_reader:
+    if (plots):
+        new_CCM.pyplot(render_cache)
 
-        # A roll was placed into the database if and only if
-        # the good CCM column entry was filled out.
-        # If it is filled out, we place the CCM into one of the dictionaries.
-        if (line[idx_roll] != ''):
-            if (re.match(pattern_CCM_12A, line[idx_id])):
-                new_CCM.dict_update_12A(line)
-                new_CCM.increment_total()
-                
-            elif(re.match(pattern_CCM_12M, line[idx_id])):
-                new_CCM.dict_update_12M(line)
-                new_CCM.increment_total()
-            
-            elif(re.match(pattern_CCM_12S, line[idx_id])):
-                new_CCM.dict_update_12S(line)
-                new_CCM.increment_total()
-
-            elif(re.match(pattern_CCM_15M, line[idx_id])):
-                new_CCM.dict_update_15M(line)
-                new_CCM.increment_total()
-
-            elif(re.match(pattern_CCM_15S, line[idx_id])):
-                new_CCM.dict_update_15S(line)
-                new_CCM.increment_total()
-
-            elif(re.match(pattern_CCM_25A, line[idx_id])):
-                new_CCM.dict_update_25A(line)
-                new_CCM.increment_total()
-                
-    new_CCM.pyplot()
+    return new_CCM
 
 #Driver for reading/parsing//writing the Backplane portion of the database.
-with open('CSV_Backplane.csv', 'r') as csv_file:
-
-    csv_reader = csv.reader(csv_file)
-    new_backplane = Backplane()
-    new_backplane.set_backplane_columns(0)
-    idx_type = new_backplane.get_idx("Type")
+# Returns the Backplane object.
+def run_backplane(input_dir=".", plots=True, columnar=False, parse_cache=None, tail_cache=None, render_cache=None,
+                  layout_cache=None, prefilter=False):
+    new_backplane = new_board("Backplane", columnar)
+    parse_board_file(new_backplane, "Backplane", os.path.join(input_dir, BOARD_FILES["Backplane"]),
+                     parse_cache, tail_cache, layout_cache, prefilter)
+
+    if (plots):
+        new_backplane.pyplot(render_cache)
+
+    return new_backplane
+
+# Driver of each board type (the keys of BOARD_FILES, see run_dcb() etc.),
+# in the order they are run.
+BOARD_DRIVERS = {board_type: globals()["run_" + board_type.lower()] for board_type in BOARD_FILES}
+
+# Support function. Signature of a file for the watch mode: its modification
+# time and size, or None if it can't be read.
+def file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+# Polls the CSV files of the boards for changes (see --watch).
+# A changed file is reported once its signature has been stable for
+# settle seconds, so a file the scraper is still writing (or rewrites
+# several times in a row) is parsed once, after the last write.
+class CSVWatcher:
+
+    # paths is a dictionary of board type -> CSV file.
+    def __init__(self, paths, settle=5.0):
+        self.paths = paths
+        self.settle = settle
+        # Signature of each file when it was last parsed.
+        self.processed = {board: file_signature(path) for board, path in paths.items()}
+        # Board type -> (new signature, time it was first seen).
+        self.changes = {}
+
+    # Returns the boards whose files changed and have settled, as (board type, signature) pairs.
+    # now is a time.monotonic() value.
+    def poll(self, now):
+        ready = []
+        for board, path in self.paths.items():
+            signature = file_signature(path)
+            if (signature is None or signature == self.processed[board]):
+                self.changes.pop(board, None)
+            elif (board not in self.changes or self.changes[board][0] != signature):
+                self.changes[board] = (signature, now)
+            elif (now - self.changes[board][1] >= self.settle):
+                ready.append((board, signature))
+        return ready
+
+    # Records that a board's file was parsed with this signature.
+    def done(self, board, signature):
+        self.processed[board] = signature
+        self.changes.pop(board, None)
+
+    # Checks a board's file again after another settle period (i.e. it isn't complete yet).
+    def defer(self, board, now):
+        self.changes[board] = (self.changes.get(board, (None, now))[0], now)
+
+# Parses a board's CSV file again for the watch mode, with the options of args
+# (as its driver does, without the outputs). The bytes that are checked for
+# completeness (see is_complete_csv()) are the bytes that are parsed, so a
+# file rewritten in between can't be half read.
+# Returns the new board object, or None if the file isn't completely written,
+# or was changed since its signature settled.
+def reload_board(args, board, path, signature):
+    try:
+        with open(path, 'rb') as csv_file:
+            data = csv_file.read()
+            stat = os.fstat(csv_file.fileno())
+        complete = is_complete_csv(data.decode("utf-8"))
+    except (OSError, UnicodeDecodeError):
+        return None
+    if (not complete or (stat.st_mtime_ns, stat.st_size) != signature):
+        return None
+
+    return parse_board_file(new_board(board, args.columnar), board, path, parse_cache=args.parse_cache,
+                            tail_cache=args.tail_cache, layout_cache=args.layout_cache,
+                            prefilter=args.mmap_prefilter, data=data)
+
+# Writes the outputs of one board: the text report (DCB only) and the charts.
+def write_board_output(args, board, board_object):
+    if (board == "DCB" and args.report is not None):
+        with stage_timer("DCB", "text_output"), open_report(args.report) as report:
+            report.write_all(board_object.stream_report())
+    if (not args.no_plots):
+        render_charts(board_object.charts(), RenderCache(".", force=args.force_render), args.render_workers)
+
+# Watch mode. Polls the CSV files of the selected boards every poll_interval
+# seconds, and when one of them changed and is completely written, parses
+# it again and writes that board's text report and charts. The other boards'
+# objects in results are kept as they are. Runs until interrupted (Ctrl-C).
+# Returns results, updated with the reparsed board objects.
+def watch_boards(args, results, watcher):
+    print("Watching " + ", ".join(watcher.paths.values()) + " (Ctrl-C to stop)", flush=True)
+    try:
+        while (True):
+            time.sleep(args.poll_interval)
+            for board, signature in watcher.poll(time.monotonic()):
+                path = watcher.paths[board]
+                start = time.perf_counter()
+                try:
+                    board_object = reload_board(args, board, path, signature)
+                except LayoutError as error:
+                    print(time.strftime("%H:%M:%S") + " " + str(error) + ", keeping the previous " + board, flush=True)
+                    watcher.done(board, signature)
+                    continue
+
+                if (board_object is None):
+                    print(time.strftime("%H:%M:%S") + " " + path + " is still being written, waiting", flush=True)
+                    watcher.defer(board, time.monotonic())
+                    continue
+
+                results[board] = board_object
+                write_board_output(args, board, board_object)
+                watcher.done(board, signature)
+                print(time.strftime("%H:%M:%S") + " Updated " + board + " from " + path +
+                      " (%.2f s)" % (time.perf_counter() - start), flush=True)
+    except KeyboardInterrupt:
+        pass
+    return results
+
+# Command line arguments.
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Parses and analyzes the PEPI/LVR database CSV files.")
+    parser.add_argument("--boards", type=parse_board_types, default=list(BOARD_FILES),
+                        help="comma separated board types to run, in any case (default: " + ",".join(BOARD_FILES) + ")")
+    parser.add_argument("--no-plots", action="store_true",
+                        help="skip the pyplot() output (matplotlib isn't imported)")
+    parser.add_argument("--columnar", action="store_true",
+                        help="compute the QA summaries from the NumPy columnar store")
+    cache_group = parser.add_mutually_exclusive_group()
+    cache_group.add_argument("--parse-cache", metavar="DIR", default=None,
+                             help="keep a parse cache in DIR, and only reprocess the rows that changed since the last run")
+    cache_group.add_argument("--tail-cache", metavar="DIR", default=None,
+                             help="keep the parsed state in DIR, and only parse the rows appended since the last run")
+    parser.add_argument("--force-render", action="store_true",
+                        help="render every chart, even those the render cache (Render_Manifest.json) finds up to date")
+    parser.add_argument("--render-workers", type=int, default=1, metavar="N",
+                        help="render the charts over N worker processes (default: 1, in this process)")
+    parser.add_argument("--render-timings", action="store_true",
+                        help="print the render time of each chart")
+    parser.add_argument("--report", metavar="PATH", default="Text_Output_DCB.txt",
+                        help="where the DCB text report is written ('-' for stdout, default: Text_Output_DCB.txt)")
+    parser.add_argument("--layout-cache", metavar="PATH", default=None,
+                        help="keep the column layouts inferred from the header rows in PATH, "
+                             "and reuse them while the header rows are unchanged")
+    parser.add_argument("--mmap-prefilter", action="store_true",
+                        help="memory-map the CSV files, and only decode the rows containing a board prefix "
+                             "(ignored with --tail-cache)")
+    parser.add_argument("--profile", metavar="PATH", nargs="?", const="-", default=None,
+                        help="time each stage of each board's pipeline and count the rows routed, and print the "
+                             "report (or write it to PATH as JSON)")
+    parser.add_argument("--cprofile", metavar="PATH", default=None,
+                        help="run under cProfile, and save the statistics to PATH (see python -m pstats)")
+    parser.add_argument("--watch", action="store_true",
+                        help="after the first run, keep polling the CSV files, and when one changes, parse it again "
+                             "and write only that board's report and charts (Ctrl-C to stop)")
+    parser.add_argument("--poll-interval", type=float, default=2.0, metavar="SECONDS",
+                        help="seconds between the polls of --watch (default: 2)")
+    parser.add_argument("--settle", type=float, default=5.0, metavar="SECONDS",
+                        help="seconds a changed file's size and modification time have to stay the same "
+                             "before --watch parses it (default: 5)")
+    parser.add_argument("--input-dir", default=".",
+                        help="directory containing the CSV_*.csv files (default: current directory)")
+    return parser
+
+# Runs the drivers of the selected boards, then renders all of their charts
+# (over --render-workers processes). With --watch, then keeps updating the
+# boards whose CSV files change (see watch_boards()).
+# Returns a dictionary of board type -> board object.
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+
+    # The files are watched from before the first run, so changes made during it are picked up.
+    watcher = None
+    if (args.watch):
+        watcher = CSVWatcher({board: os.path.join(args.input_dir, BOARD_FILES[board])
+                              for board in BOARD_DRIVERS if board in args.boards}, args.settle)
+
+    if (args.cprofile is not None):
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            results = profiler.runcall(run_main, args)
+        finally:
+            profiler.dump_stats(args.cprofile)
+    else:
+        results = run_main(args)
+
+    if (watcher is not None):
+        watch_boards(args, results, watcher)
+    return results
+
+# Support function for main(), with the parsed arguments.
+def run_main(args):
+    stats = start_stats() if (args.profile is not None) else None
+    try:
+        results = {}
+        for board in BOARD_DRIVERS:
+            if (board in args.boards):
+                options = {"report_output": args.report} if (board == "DCB") else {}
+                try:
+                    results[board] = BOARD_DRIVERS[board](args.input_dir, plots=False,
+                                                          columnar=args.columnar, parse_cache=args.parse_cache,
+                                                          tail_cache=args.tail_cache, layout_cache=args.layout_cache,
+                                                          prefilter=args.mmap_prefilter, **options)
+                except LayoutError as error:
+                    sys.exit(str(error))
+
+        if (not args.no_plots):
+            charts = []
+            chart_boards = []
+            for board in results.values():
+                for chart in board.charts():
+                    charts.append(chart)
+                    chart_boards.append(type(board).__name__)
+            start = time.perf_counter()
+            timings = render_charts(charts, RenderCache(".", force=args.force_render), args.render_workers)
+            if (args.render_timings):
+                print(render_report(timings, time.perf_counter() - start), end="")
+            if (stats is not None):
+                for board_type, (file_name, seconds) in zip(chart_boards, timings):
+                    if (seconds is not None):
+                        stats.add_time(board_type, "plotting", seconds)
+    finally:
+        stop_stats()
+
+    if (stats is not None):
+        if (args.profile == "-"):
+            print(stats.report(), end="")
+        else:
+            with open(args.profile, "w") as profile_file:
+                json.dump(stats.as_dict(), profile_file, indent=1)
 
-    for line in csv_reader:
-        if (line[idx_type] == "True"):
-            new_backplane.update_true_backplanes(line)
-            new_backplane.increment_num_true_backplanes()
+    return results
 
-        elif (line[idx_type] == "Mirror"):
-            new_backplane.update_mirror_backplanes(line)
-            new_backplane.increment_num_mirror_backplanes()
-        
-    new_backplane.pyplot()
\ No newline at end of file
+if (__name__ == "__main__"):
+    main()
\ No newline at end of file
@@ -0,0 +1,93 @@
+# Fake CSV scraper, for testing Stream_Ingest.py.
+# Replays the CSV files of a directory as the scraper's output, at a given
+# number of rows per second:
+# - on stdout, one board after the other, each after a section marker
+#   ("==> CSV_DCB.csv <==", after a newline from the second one on, as
+#   "tail" prints them), or
+# - with --fifo-dir, into one named pipe per board (DIR/CSV_DCB.csv, ...,
+#   created if they don't exist), all boards at the same time.
+# i.e.
+#   python Fake_Scraper.py --rate 2000 | python Stream_Ingest.py
+#   python Fake_Scraper.py --input-dir path/to/generated/csvs | python Stream_Ingest.py   (see Synthetic_Database.py)
+#   python Fake_Scraper.py --fifo-dir pipes &
+#   python Stream_Ingest.py --pipe DCB=pipes/CSV_DCB.csv --pipe LVR=pipes/CSV_LVR.csv ...
+
+import argparse
+import os
+import stat
+import sys
+import threading
+import time
+
+from Database_Parser_and_Analyzer import BOARD_FILES, parse_board_types
+
+# Rows written at a time.
+BATCH_ROWS = 100
+
+# Writes the lines of a CSV file to output (a binary file object),
+# rate lines per second (0 for as fast as possible).
+# Returns the number of lines written.
+def replay(path, output, rate=0):
+    with open(path, "rb") as csv_file:
+        lines = csv_file.read().splitlines(keepends=True)
+
+    start = time.perf_counter()
+    num_written = 0
+    for batch_start in range(0, len(lines), BATCH_ROWS):
+        batch = lines[batch_start:batch_start + BATCH_ROWS]
+        output.write(b"".join(batch))
+        output.flush()
+        num_written += len(batch)
+        if (rate > 0):
+            delay = start + num_written / rate - time.perf_counter()
+            if (delay > 0):
+                time.sleep(delay)
+    return num_written
+
+# Support function. Writes a board's CSV file into its named pipe (opening it waits for the reader).
+def replay_into_pipe(path, pipe_path, rate):
+    with open(pipe_path, "wb") as pipe:
+        replay(path, pipe, rate)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replays CSV files as the CSV scraper's output, for Stream_Ingest.py.")
+    parser.add_argument("--input-dir", default=".", help="directory containing the CSV_*.csv files (default: current directory)")
+    parser.add_argument("--boards", type=parse_board_types, default=list(BOARD_FILES),
+                        help="comma separated board types to replay (default: " + ",".join(BOARD_FILES) + ")")
+    parser.add_argument("--rate", type=float, default=0, help="rows per second, per board (default: 0, as fast as possible)")
+    parser.add_argument("--fifo-dir", metavar="DIR", default=None,
+                        help="write each board into the named pipe DIR/CSV_*.csv instead of stdout")
+    args = parser.parse_args(argv)
+
+    board_types = args.boards
+    paths = {board_type: os.path.join(args.input_dir, BOARD_FILES[board_type]) for board_type in board_types}
+
+    if (args.fifo_dir is None):
+        output = sys.stdout.buffer
+        try:
+            for number, board_type in enumerate(paths):
+                # The newline before a marker separates the sections, so a file's
+                # last line is sent as it is, with or without a newline.
+                output.write((b"\n" if number else b"") + b"==> " + BOARD_FILES[board_type].encode("utf-8") + b" <==\n")
+                replay(paths[board_type], output, args.rate)
+        except BrokenPipeError:
+            sys.exit(1)
+        return
+
+    os.makedirs(args.fifo_dir, exist_ok=True)
+    threads = []
+    for board_type, path in paths.items():
+        pipe_path = os.path.join(args.fifo_dir, BOARD_FILES[board_type])
+        if (not os.path.exists(pipe_path)):
+            os.mkfifo(pipe_path)
+        elif (not stat.S_ISFIFO(os.stat(pipe_path).st_mode)):
+            sys.exit(pipe_path + " exists and isn't a named pipe")
+        threads.append(threading.Thread(target=replay_into_pipe, args=(path, pipe_path, args.rate)))
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+if (__name__ == "__main__"):
+    main()
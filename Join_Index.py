@@ -0,0 +1,199 @@
+# Cross-board join index.
+# The LVR CSV records which CCM rolls went into each LVR (the CCM column,
+# "Serial - CCMs (Note QTY)", i.e. "12A5", "15M5/15S5" or "25A09 (x2)"),
+# and the CCM CSV records each roll's Good_Count. CrossBoardIndex parses the
+# LVR references into roll keys and builds dictionaries from each CCM roll
+# to the LVRs that consumed it (and back), and from each Location to the
+# boards of every type there, so every lookup is a single dictionary access.
+# It also flags inconsistencies between the two files: rolls referenced by
+# more LVRs than their Good_Count, references to rolls that aren't in the CCM
+# CSV, and references that can't be parsed.
+
+import argparse
+import collections
+import json
+import re
+import sys
+
+from Database_Parser_and_Analyzer import BOARD_FILES, BOARD_SPECS, board_records, load_snapshot
+
+# A roll reference: a CCM prefix, the roll number, and an optional quantity
+# ("(4)", "(x4)" or "x4").
+pattern_CCM_reference = re.compile('(' + '|'.join(BOARD_SPECS["CCM"]["prefixes"]) + ')(\\d+)'
+                                   '(?:\\s*\\(\\s*x?\\s*(\\d+)\\s*\\)|\\s*x\\s*(\\d+))?', re.IGNORECASE)
+
+# Separators allowed between the references of an LVR.
+pattern_reference_separator = re.compile('[\\s/,;&+]*')
+
+# Number of CCMs an LVR is counted as taking from a roll it references,
+# when the reference doesn't note a quantity.
+DEFAULT_CCM_QUANTITY = 1
+
+# Support function. Key of a roll, independent of zero padding
+# (the CCM CSV has "25A01", the LVR CSV could have "25A1").
+def roll_key(prefix, number):
+    return prefix.upper() + str(int(number))
+
+# Parses the CCM column of an LVR.
+# Returns (list of (roll key, quantity), the parts of the text that aren't references).
+def parse_CCM_references(text):
+    references = []
+    unparsed = []
+    pos = 0
+    for match in pattern_CCM_reference.finditer(text):
+        leftover = text[pos:match.start()]
+        if (not pattern_reference_separator.fullmatch(leftover)):
+            unparsed.append(leftover.strip())
+        quantity = match.group(3) or match.group(4)
+        references.append((roll_key(match.group(1), match.group(2)), int(quantity) if quantity else DEFAULT_CCM_QUANTITY))
+        pos = match.end()
+
+    if (not pattern_reference_separator.fullmatch(text[pos:])):
+        unparsed.append(text[pos:].strip())
+    return references, unparsed
+
+class CrossBoardIndex:
+
+    # boards is a dictionary of board type -> parsed board object (see load_snapshot()).
+    def __init__(self, boards):
+        # Roll key -> Roll_ID, and Roll_ID -> CCM row.
+        self.roll_ids = {}
+        self.rolls = {}
+
+        # Roll_ID -> list of (LVR ID, quantity), and LVR ID -> list of (Roll_ID, quantity).
+        # References to unknown rolls are kept under their roll key.
+        self.roll_consumers = collections.defaultdict(list)
+        self.LVR_rolls = collections.defaultdict(list)
+
+        # Location -> list of (board type, record key).
+        self.locations = collections.defaultdict(list)
+
+        self.issues = []
+
+        for board_type, board in boards.items():
+            columns = board.get_columns()
+            for key, (group, row) in board_records(board, board_type).items():
+                location = row[columns["Location"]].strip()
+                if (location):
+                    self.locations[location].append((board_type, key))
+
+        if ("CCM" in boards):
+            columns = boards["CCM"].get_columns()
+            for roll_id, (group, row) in board_records(boards["CCM"], "CCM").items():
+                match = pattern_CCM_reference.fullmatch(roll_id.strip())
+                if (match):
+                    self.roll_ids[roll_key(match.group(1), match.group(2))] = roll_id
+                self.rolls[roll_id] = row
+
+        if ("LVR" in boards):
+            self.index_LVRs(boards["LVR"], "CCM" in boards)
+
+        if ("CCM" in boards):
+            self.check_consumption(boards["CCM"].get_columns())
+
+    def index_LVRs(self, board, check_rolls):
+        columns = board.get_columns()
+        for LVR_id, (group, row) in board_records(board, "LVR").items():
+            text = row[columns["CCM"]]
+            references, unparsed = parse_CCM_references(text)
+            for part in unparsed:
+                self.issues.append({"issue": "unparsed_reference", "LVR": LVR_id, "reference": text, "text": part})
+
+            for key, quantity in references:
+                roll_id = self.roll_ids.get(key)
+                if (roll_id is None):
+                    roll_id = key
+                    if (check_rolls):
+                        self.issues.append({"issue": "unknown_roll", "LVR": LVR_id, "reference": text, "roll": key})
+                self.roll_consumers[roll_id].append((LVR_id, quantity))
+                self.LVR_rolls[LVR_id].append((roll_id, quantity))
+
+    def check_consumption(self, columns):
+        for roll_id, row in self.rolls.items():
+            consumed = self.consumed(roll_id)
+            try:
+                good_count = int(row[columns["Good_Count"]])
+            except ValueError:
+                continue
+            if (consumed > good_count):
+                self.issues.append({"issue": "overconsumed_roll", "roll": roll_id, "good_count": good_count,
+                                    "consumed": consumed, "LVRs": [LVR_id for LVR_id, quantity in self.roll_consumers[roll_id]]})
+
+    # Number of CCMs taken from a roll by the LVRs referencing it.
+    def consumed(self, roll_id):
+        return sum(quantity for LVR_id, quantity in self.roll_consumers.get(roll_id, []))
+
+    # LVRs that consumed a roll, as (LVR ID, quantity) pairs.
+    # Accepts the Roll_ID or any spelling of it ("25A9" for "25A09").
+    def consumers(self, roll):
+        match = pattern_CCM_reference.fullmatch(roll.strip())
+        if (match):
+            key = roll_key(match.group(1), match.group(2))
+            roll = self.roll_ids.get(key, key)
+        return list(self.roll_consumers.get(roll, []))
+
+    # Rolls an LVR consumed, as (Roll_ID, quantity) pairs.
+    def rolls_of(self, LVR_id):
+        return list(self.LVR_rolls.get(LVR_id, []))
+
+    # Boards at a location, as (board type, record key) pairs.
+    def boards_at(self, location):
+        return list(self.locations.get(location.strip(), []))
+
+    # The index as a dictionary (for JSON).
+    def as_dict(self):
+        return {"roll_consumers": {roll_id: [[LVR_id, quantity] for LVR_id, quantity in consumers]
+                                   for roll_id, consumers in self.roll_consumers.items()},
+                "LVR_rolls": {LVR_id: [[roll_id, quantity] for roll_id, quantity in rolls]
+                              for LVR_id, rolls in self.LVR_rolls.items()},
+                "locations": {location: [list(board) for board in boards] for location, boards in self.locations.items()},
+                "issues": self.issues}
+
+# Support function. Formats an issue for the text report.
+def describe_issue(issue):
+    if (issue["issue"] == "overconsumed_roll"):
+        return ("Roll " + issue["roll"] + ": " + str(issue["consumed"]) + " CCMs consumed, Good_Count is " +
+                str(issue["good_count"]) + " (LVRs " + ", ".join(issue["LVRs"]) + ")")
+    if (issue["issue"] == "unknown_roll"):
+        return "LVR " + issue["LVR"] + ": roll " + issue["roll"] + " isn't in the CCM CSV (" + issue["reference"] + ")"
+    return "LVR " + issue["LVR"] + ": can't parse '" + issue["text"] + "' in '" + issue["reference"] + "'"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Joins the LVRs to the CCM rolls they consumed, and the boards to their locations.")
+    parser.add_argument("--input-dir", default=".", help="directory containing the CSV_*.csv files (default: current directory)")
+    parser.add_argument("--roll", action="append", default=[], help="show the LVRs that consumed a roll")
+    parser.add_argument("--lvr", action="append", default=[], help="show the rolls an LVR consumed")
+    parser.add_argument("--location", action="append", default=[], help="show the boards at a location")
+    parser.add_argument("--json", metavar="PATH", help="write the whole index as JSON to PATH ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    index = CrossBoardIndex(load_snapshot(args.input_dir, list(BOARD_FILES)))
+
+    if (args.json == "-"):
+        json.dump(index.as_dict(), sys.stdout, indent=1)
+        sys.stdout.write("\n")
+        return index
+    if (args.json):
+        with open(args.json, "w") as json_file:
+            json.dump(index.as_dict(), json_file, indent=1)
+
+    for roll in args.roll:
+        consumers = index.consumers(roll)
+        print("Roll " + roll + ": " + (", ".join("LVR " + LVR_id + " (" + str(quantity) + ")" for LVR_id, quantity in consumers) or "no LVRs"))
+    for LVR_id in args.lvr:
+        rolls = index.rolls_of(LVR_id)
+        print("LVR " + LVR_id + ": " + (", ".join(roll_id + " (" + str(quantity) + ")" for roll_id, quantity in rolls) or "no rolls"))
+    for location in args.location:
+        boards = index.boards_at(location)
+        print(location + ": " + (", ".join(board_type + " " + key for board_type, key in boards) or "no boards"))
+
+    if (not (args.roll or args.lvr or args.location)):
+        print(str(len(index.roll_consumers)) + " rolls referenced by " + str(len(index.LVR_rolls)) + " LVRs, " +
+              str(len(index.locations)) + " locations")
+        print(str(len(index.issues)) + " issues")
+        for issue in index.issues:
+            print("- " + describe_issue(issue))
+    return index
+
+if (__name__ == "__main__"):
+    main()
@@ -0,0 +1,259 @@
+# Content-addressed archive of database snapshots.
+# Consecutive scrapes are mostly identical row for row, so instead of
+# keeping every CSV file in full, the archive (a single SQLite file)
+# stores each unique row once, addressed by its hash (see row_hash()),
+# and each snapshot as a manifest: per board type, the list of the hashes
+# of its rows, in order. The manifests are deduplicated the same way: the
+# list is cut into chunks at boundaries that depend on the rows themselves,
+# each unique chunk is stored once, addressed by its hash, and a manifest
+# is the list of its chunks' hashes. A snapshot is rehydrated as a stream
+# of rows that is parsed straight into the board objects (see parse_board()).
+
+import argparse
+import csv
+import hashlib
+import io
+import itertools
+import os
+import sqlite3
+import sys
+
+from Database_Parser_and_Analyzer import BOARD_FILES, HEADER_SCAN_ROWS, infer_layout, new_board, parse_board, row_hash
+
+# Length of a row or chunk hash (SHA-1) in a chunk or manifest.
+HASH_SIZE = 20
+
+# Rows per chunk of a manifest, on average, after the first CHUNK_MIN_ROWS.
+# A chunk ends after a row whose hash is a multiple of CHUNK_ROWS, so
+# inserting, removing or editing a row only changes the chunk it's in,
+# and the other chunks of the snapshot are the same as in the previous one.
+CHUNK_ROWS = 32
+CHUNK_MIN_ROWS = 16
+
+# Number of rows fetched per query when rehydrating.
+FETCH_SIZE = 500
+
+# Support function. Encodes a parsed row as a single CSV record.
+# The writer's line terminator is what makes it quote fields containing
+# newlines, so it is written and then stripped.
+def encode_row(line, lineterminator="\n"):
+    output = io.StringIO()
+    csv.writer(output, lineterminator=lineterminator).writerow(line)
+    return output.getvalue()[:-len(lineterminator)]
+
+# Support function. Decodes a row encoded by encode_row().
+def decode_row(data):
+    return next(csv.reader(io.StringIO(data, newline="")), [])
+
+# Support function. Splits a list of row hashes into chunks (see CHUNK_ROWS),
+# each one the concatenation of its hashes.
+def split_chunks(hashes):
+    chunks = []
+    start = 0
+    for idx, hash_value in enumerate(hashes):
+        if (idx + 1 - start >= CHUNK_MIN_ROWS and int.from_bytes(hash_value[:4], "big") % CHUNK_ROWS == 0):
+            chunks.append(b"".join(hashes[start:idx + 1]))
+            start = idx + 1
+    if (start < len(hashes)):
+        chunks.append(b"".join(hashes[start:]))
+    return chunks
+
+# Support function. Splits a concatenation of hashes into a list of hashes.
+def split_hashes(data):
+    return [data[start:start + HASH_SIZE] for start in range(0, len(data), HASH_SIZE)]
+
+# Support function. Returns the line terminator of the CSV file at path
+# ("\r\n" or "\n", the one ending its first line), and whether the file
+# ends with one, so export_snapshot() writes the file back the same way.
+def line_endings(path):
+    with open(path, "rb") as csv_file:
+        head = csv_file.read(1 << 16)
+        if (not head):
+            return "\n", False
+        csv_file.seek(-1, os.SEEK_END)
+        final_newline = csv_file.read(1) == b"\n"
+    end = head.find(b"\n")
+    return ("\r\n" if (end > 0 and head[end - 1:end] == b"\r") else "\n"), final_newline
+
+class RowArchive:
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS rows "
+                                "(hash BLOB PRIMARY KEY, data TEXT NOT NULL) WITHOUT ROWID")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS chunks "
+                                "(hash BLOB PRIMARY KEY, hashes BLOB NOT NULL) WITHOUT ROWID")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS manifests "
+                                "(snapshot TEXT NOT NULL, board_type TEXT NOT NULL, chunks BLOB NOT NULL, "
+                                "num_rows INTEGER NOT NULL, line_terminator TEXT NOT NULL, final_newline INTEGER NOT NULL, "
+                                "PRIMARY KEY (snapshot, board_type))")
+        self.connection.commit()
+
+    # Support function. Stores the manifest of one board file of a snapshot,
+    # from the hashes of its rows, and the chunks it needs.
+    def insert_manifest(self, name, board_type, hashes, line_terminator, final_newline):
+        chunk_hashes = []
+        for chunk in split_chunks(hashes):
+            chunk_hash = hashlib.sha1(chunk).digest()
+            chunk_hashes.append(chunk_hash)
+            self.connection.execute("INSERT OR IGNORE INTO chunks VALUES (?, ?)", (chunk_hash, chunk))
+        self.connection.execute("INSERT OR REPLACE INTO manifests VALUES (?, ?, ?, ?, ?, ?)",
+                                (name, board_type, b"".join(chunk_hashes), len(hashes), line_terminator, final_newline))
+
+    def close(self):
+        self.connection.close()
+
+    # Imports the CSV files of a snapshot directory under the given name,
+    # replacing a snapshot of the same name. Board files missing from the
+    # directory are skipped. Returns (number of rows, number of new unique rows).
+    def import_snapshot(self, name, snapshot_dir):
+        num_rows = 0
+        num_new_rows = 0
+
+        with self.connection:
+            for board_type, file_name in BOARD_FILES.items():
+                path = os.path.join(snapshot_dir, file_name)
+                if (not os.path.exists(path)):
+                    continue
+
+                hashes = []
+                with open(path, 'r') as csv_file:
+                    for line in csv.reader(csv_file):
+                        hash_value = row_hash(line)
+                        hashes.append(hash_value)
+                        cursor = self.connection.execute("INSERT OR IGNORE INTO rows VALUES (?, ?)",
+                                                         (hash_value, encode_row(line)))
+                        num_new_rows += cursor.rowcount
+
+                num_rows += len(hashes)
+                self.insert_manifest(name, board_type, hashes, *line_endings(path))
+
+        return num_rows, num_new_rows
+
+    # Returns the names of the archived snapshots, sorted.
+    def snapshots(self):
+        return [row[0] for row in self.connection.execute("SELECT DISTINCT snapshot FROM manifests ORDER BY snapshot")]
+
+    # Returns the board types archived for a snapshot.
+    def board_types(self, name):
+        return [row[0] for row in self.connection.execute("SELECT board_type FROM manifests WHERE snapshot = ?",
+                                                          (name,))]
+
+    # Support function. Returns the manifest of one board file of a snapshot:
+    # (chunk hashes, line terminator, final newline).
+    def manifest(self, name, board_type):
+        manifest = self.connection.execute("SELECT chunks, line_terminator, final_newline FROM manifests "
+                                           "WHERE snapshot = ? AND board_type = ?", (name, board_type)).fetchone()
+        if (manifest is None):
+            raise KeyError("No " + board_type + " rows archived for snapshot " + name)
+        return split_hashes(manifest[0]), manifest[1], bool(manifest[2])
+
+    # Yields the rows of one board file of a snapshot, in order,
+    # as arrays of strings (like csv.reader).
+    def iter_rows(self, name, board_type):
+        hashes = []
+        for chunk_hash in self.manifest(name, board_type)[0]:
+            chunk = self.connection.execute("SELECT hashes FROM chunks WHERE hash = ?", (chunk_hash,)).fetchone()
+            hashes.extend(split_hashes(chunk[0]))
+
+        for start in range(0, len(hashes), FETCH_SIZE):
+            chunk = hashes[start:start + FETCH_SIZE]
+            unique = list(set(chunk))
+            query = "SELECT hash, data FROM rows WHERE hash IN (" + ",".join("?" * len(unique)) + ")"
+            data = dict(self.connection.execute(query, unique))
+            for hash_value in chunk:
+                yield decode_row(data[hash_value])
+
+    # Parses an archived snapshot into board objects, without any output.
+    # Returns a dictionary of board type -> parsed board object.
+    def load_snapshot(self, name, board_types=None):
+        boards = {}
+        for board_type in (board_types or self.board_types(name)):
+            board = new_board(board_type)
+            # The columns are set from the header row, as for a CSV file (see apply_layout()).
+            rows = self.iter_rows(name, board_type)
+            head = list(itertools.islice(rows, HEADER_SCAN_ROWS))
+            board.set_columns(infer_layout(board_type, head)[2])
+            parse_board(board, board_type, itertools.chain(head, rows))
+            boards[board_type] = board
+        return boards
+
+    # Writes the CSV files of an archived snapshot into output_dir, with the
+    # line terminator they were imported with, and a newline after the last
+    # row only if they had one. The cells are quoted by csv.writer (only
+    # where needed), so a file whose cells were quoted otherwise, or whose
+    # quoted cells contained "\r\n", isn't written back byte for byte.
+    def export_snapshot(self, name, output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+        for board_type in self.board_types(name):
+            line_terminator, final_newline = self.manifest(name, board_type)[1:]
+            with open(os.path.join(output_dir, BOARD_FILES[board_type]), 'w', newline='') as csv_file:
+                writer = csv.writer(csv_file, lineterminator=line_terminator)
+                previous = None
+                for line in self.iter_rows(name, board_type):
+                    if (previous is not None):
+                        writer.writerow(previous)
+                    previous = line
+                if (previous is not None):
+                    if (final_newline):
+                        writer.writerow(previous)
+                    else:
+                        csv_file.write(encode_row(previous, line_terminator))
+
+    # Returns (number of snapshots, number of row references, number of unique rows, bytes of row data,
+    # bytes of manifests and chunks).
+    def stats(self):
+        num_snapshots = len(self.snapshots())
+        num_references, num_manifest_bytes = self.connection.execute(
+            "SELECT COALESCE(SUM(num_rows), 0), COALESCE(SUM(LENGTH(chunks)), 0) FROM manifests").fetchone()
+        num_unique, num_bytes = self.connection.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM rows").fetchone()
+        num_chunk_bytes = self.connection.execute("SELECT COALESCE(SUM(LENGTH(hashes)), 0) FROM chunks").fetchone()[0]
+        return num_snapshots, num_references, num_unique, num_bytes, num_manifest_bytes + num_chunk_bytes
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Content-addressed archive of database snapshots.")
+    parser.add_argument("archive", help="archive file (created if it doesn't exist)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_command = commands.add_parser("import", help="import snapshot directories (named after the directory)")
+    import_command.add_argument("snapshot_dirs", nargs="+")
+
+    commands.add_parser("list", help="list the archived snapshots")
+    commands.add_parser("stats", help="show the size of the archive")
+
+    export_command = commands.add_parser("export", help="write an archived snapshot back to CSV files")
+    export_command.add_argument("snapshot")
+    export_command.add_argument("output_dir")
+
+    args = parser.parse_args(argv)
+    archive = RowArchive(args.archive)
+
+    try:
+        if (args.command == "import"):
+            for snapshot_dir in args.snapshot_dirs:
+                if (not os.path.isdir(snapshot_dir)):
+                    continue
+                name = os.path.basename(os.path.normpath(snapshot_dir))
+                num_rows, num_new_rows = archive.import_snapshot(name, snapshot_dir)
+                print(name + ": " + str(num_rows) + " rows, " + str(num_new_rows) + " new")
+
+        elif (args.command == "list"):
+            for name in archive.snapshots():
+                print(name)
+
+        elif (args.command == "stats"):
+            num_snapshots, num_references, num_unique, num_bytes, num_manifest_bytes = archive.stats()
+            print("Snapshots: " + str(num_snapshots))
+            print("Rows referenced: " + str(num_references))
+            print("Unique rows stored: " + str(num_unique) + " (" + str(num_bytes) + " bytes)")
+            print("Manifests and chunks: " + str(num_manifest_bytes) + " bytes")
+
+        else:
+            if (args.snapshot not in archive.snapshots()):
+                sys.exit("No snapshot named " + args.snapshot)
+            archive.export_snapshot(args.snapshot, args.output_dir)
+    finally:
+        archive.close()
+
+if (__name__ == "__main__"):
+    main()
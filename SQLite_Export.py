@@ -0,0 +1,152 @@
+# SQLite export of the parsed boards.
+# Writes each board type into its own table of a local SQLite database
+# (dcb, lvr, ccm, backplane), one row per board, with a column per entry of
+# the board's columns dictionary (DCB_columns, ...), the dictionary it was
+# parsed into (board_group, i.e. "assembled" or "12A"), and whether it
+# passes each QA stage of QA_RULES (passed_Initial_QA, ...).
+# Serials, IDs, locations, types and QA statuses are indexed, so questions
+# about the database are answered with a query instead of a full run.
+#
+# Every export runs in a single transaction. Re-exports compare the hash of
+# each board's row with the one stored, and only insert, update or delete
+# the boards that changed. A table is recreated if the board's columns
+# dictionary, its spec in BOARD_SPECS or its QA_RULES changed since it
+# was created (the passed_* columns are computed from the rules).
+
+import argparse
+import os
+import sqlite3
+import sys
+
+from Database_Parser_and_Analyzer import (BOARD_FILES, QA_RULES, board_records, board_signature,
+                                          get_QA_rule, load_snapshot, parse_board_types, row_hash)
+
+# Increment if the layout of the tables changes.
+EXPORT_FORMAT = 1
+
+# Columns stored as integers (blank entries are stored as NULL).
+NUMERIC_COLUMNS = {
+    "CCM": ["Original_Count", "Good_Count"],
+}
+
+# Columns that get an index, if the board type has them
+# (along with board_group and the passed_* columns).
+INDEX_COLUMNS = ["Serial", "ID", "SN", "Roll_ID", "Location", "Type", "Variant", "LVR_Type", "CCM_Type", "Subtype"]
+
+# Support function. Quotes a table or column name (i.e. "1.5V").
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+# Support function. Columns of a board type's table, as (name, SQL type) pairs, in order.
+def table_columns(board_type, columns):
+    result = [("record_key", "TEXT PRIMARY KEY"), ("board_group", "TEXT NOT NULL"), ("row_hash", "BLOB NOT NULL")]
+    for column in sorted(columns, key=columns.get):
+        result.append((column, "INTEGER" if column in NUMERIC_COLUMNS.get(board_type, []) else "TEXT"))
+    for stage in QA_RULES.get(board_type, {}):
+        result.append(("passed_" + stage, "INTEGER NOT NULL"))
+    return result
+
+# Creates the table of a board type (dropping an existing table that was
+# created for a different layout), and its indexes.
+def create_table(connection, board_type, board):
+    table = board_type.lower()
+    signature = board_signature(board, board_type, (EXPORT_FORMAT, QA_RULES.get(board_type, {})))
+
+    existing = connection.execute("SELECT signature FROM export_tables WHERE board_type = ?", (board_type,)).fetchone()
+    if (existing is not None and existing[0] == signature):
+        return
+    connection.execute("DROP TABLE IF EXISTS " + quote(table))
+
+    columns = table_columns(board_type, board.get_columns())
+    connection.execute("CREATE TABLE " + quote(table) + " (" +
+                       ", ".join(quote(name) + " " + sql_type for name, sql_type in columns) + ")")
+    for name, sql_type in columns:
+        if (name == "board_group" or name.startswith("passed_") or name in INDEX_COLUMNS):
+            connection.execute("CREATE INDEX " + quote(table + "_" + name) + " ON " + quote(table) + " (" + quote(name) + ")")
+
+    connection.execute("INSERT OR REPLACE INTO export_tables VALUES (?, ?)", (board_type, signature))
+
+# Support function. Values of a board's row in its table, in the order of table_columns().
+def table_row(board_type, columns, key, group, row, rules):
+    values = [key, group, row_hash(list(row) + [group])]
+    for column in sorted(columns, key=columns.get):
+        value = row[columns[column]] if columns[column] < len(row) else ""
+        if (column in NUMERIC_COLUMNS.get(board_type, []) and value == ""):
+            value = None
+        values.append(value)
+    for rule in rules:
+        values.append(int(bool(rule.check(row, columns))))
+    return values
+
+# Exports a parsed board object into its table.
+# Returns (number inserted, number updated, number deleted, number unchanged).
+def export_board(connection, board_type, board):
+    create_table(connection, board_type, board)
+    table = quote(board_type.lower())
+    columns = board.get_columns()
+    names = [name for name, sql_type in table_columns(board_type, columns)]
+    rules = [get_QA_rule(board_type, stage) for stage in QA_RULES.get(board_type, {})]
+
+    stored = dict(connection.execute("SELECT record_key, row_hash FROM " + table))
+    records = board_records(board, board_type)
+
+    inserted = []
+    updated = []
+    for key, (group, row) in records.items():
+        values = table_row(board_type, columns, key, group, row, rules)
+        if (key not in stored):
+            inserted.append(values)
+        elif (stored[key] != values[2]):
+            updated.append(values)
+    deleted = [(key,) for key in stored if key not in records]
+
+    connection.executemany("INSERT INTO " + table + " VALUES (" + ", ".join("?" * len(names)) + ")", inserted)
+    connection.executemany("UPDATE " + table + " SET " + ", ".join(quote(name) + " = ?" for name in names[1:]) +
+                           " WHERE record_key = ?", [values[1:] + values[:1] for values in updated])
+    connection.executemany("DELETE FROM " + table + " WHERE record_key = ?", deleted)
+
+    return len(inserted), len(updated), len(deleted), len(records) - len(inserted) - len(updated)
+
+# Exports the CSV files of input_dir into the database at path, in one transaction.
+# Returns a dictionary of board type -> the counts returned by export_board().
+def export_database(path, input_dir=".", board_types=None):
+    board_types = [board_type for board_type in (board_types or BOARD_FILES)
+                   if os.path.exists(os.path.join(input_dir, BOARD_FILES[board_type]))]
+    boards = load_snapshot(input_dir, board_types)
+
+    # The transaction is begun explicitly: in the default mode, sqlite3 only
+    # opens one before an INSERT, UPDATE or DELETE, so the DROP TABLE and
+    # CREATE TABLE of create_table() would be committed even if the export fails.
+    connection = sqlite3.connect(path, isolation_level=None)
+    try:
+        connection.execute("BEGIN")
+        try:
+            connection.execute("CREATE TABLE IF NOT EXISTS export_tables (board_type TEXT PRIMARY KEY, signature TEXT NOT NULL)")
+            result = {board_type: export_board(connection, board_type, board) for board_type, board in boards.items()}
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return result
+    finally:
+        connection.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exports the parsed boards into an indexed SQLite database.")
+    parser.add_argument("database", help="SQLite database file (created if it doesn't exist)")
+    parser.add_argument("--input-dir", default=".", help="directory containing the CSV_*.csv files (default: current directory)")
+    parser.add_argument("--boards", type=parse_board_types, default=list(BOARD_FILES),
+                        help="comma separated board types to export (default: " + ",".join(BOARD_FILES) + ")")
+    args = parser.parse_args(argv)
+
+    board_types = args.boards
+
+    result = export_database(args.database, args.input_dir, board_types)
+    if (not result):
+        sys.exit("No CSV files found in " + args.input_dir)
+    for board_type, (num_inserted, num_updated, num_deleted, num_unchanged) in result.items():
+        print("%-10s %5d inserted, %5d updated, %5d deleted, %5d unchanged" %
+              (board_type, num_inserted, num_updated, num_deleted, num_unchanged))
+
+if (__name__ == "__main__"):
+    main()
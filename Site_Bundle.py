@@ -0,0 +1,205 @@
+# Static website bundle generator.
+# Writes everything the website needs for each board type into its own
+# directory of the bundle, so the browser fetches only what a page shows
+# instead of the whole text output:
+#
+# index.json                     - board types, and the paths of their files.
+# <type>/summary.json            - counts of each dictionary and QA stage.
+# <type>/<group>/<page>.json     - paginated listing of the boards of a dictionary
+#                                  (i.e. DCB/assembled/1.json), one record per board.
+# <type>/<chart>.svg             - vector versions of the board type's charts.
+#
+# Every file also gets a pre-gzipped copy (<file>.gz) for the web server.
+# The bundle is rebuilt incrementally: a board type whose CSV file, spec
+# and QA rules didn't change since the last build isn't parsed again, and
+# files whose content didn't change are left untouched (so cached copies
+# stay valid).
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+
+from Database_Parser_and_Analyzer import (BOARD_FILES, BOARD_SPECS, CHART_STYLE, CHART_STYLE_VERSION, QA_RULES,
+                                          board_records, new_board, parse_board_file, parse_board_types, render_chart)
+
+# Increment if the layout of the bundle changes, so every board type is rebuilt.
+BUNDLE_FORMAT = 1
+
+# File the state of the last build is kept in, in the bundle directory.
+STATE_FILE = ".bundle_state.json"
+
+# Support function. Encodes a JSON file of the bundle.
+def encode_json(value):
+    return (json.dumps(value, indent=1, sort_keys=True) + "\n").encode("utf-8")
+
+# Writes data (bytes) to path, and its gzipped copy to path + ".gz",
+# unless path already has that content. Returns True if it was written.
+def write_if_changed(path, data):
+    try:
+        with open(path, "rb") as existing_file:
+            if (existing_file.read() == data and os.path.exists(path + ".gz")):
+                return False
+    except OSError:
+        pass
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as output_file:
+        output_file.write(data)
+    # mtime=0 keeps the gzipped copy the same for the same content.
+    with gzip.GzipFile(path + ".gz", "wb", compresslevel=9, mtime=0) as gzip_file:
+        gzip_file.write(data)
+    return True
+
+# Summary of a parsed board object: the number of boards in each dictionary,
+# and the number passing each QA stage (for the CCM, the good counts).
+def board_summary(board_type, board):
+    summary = {"board_type": board_type,
+               "groups": {group: len(dictionary) for group, dictionary in board.get_groups()}}
+
+    if (board_type == "CCM"):
+        summary["good_count"] = dict(zip([group for group, dictionary in board.get_groups()],
+                                         board.process_good_count()))
+    else:
+        summary["QA"] = {stage: board.process_QA_stage(stage) for stage in QA_RULES[board_type]}
+    return summary
+
+# Listing of a parsed board object: a dictionary of group -> list of records,
+# one per board, with its record key and a field per column.
+def board_listing(board_type, board):
+    columns = board.get_columns()
+    listing = {group: [] for group, dictionary in board.get_groups()}
+
+    for key, (group, row) in board_records(board, board_type).items():
+        record = {"key": key}
+        for column, idx in columns.items():
+            if (idx < len(row)):
+                record[column] = row[idx]
+        listing[group].append(record)
+    return listing
+
+# Builds the files of one board type.
+# Returns a dictionary of path (relative to the bundle directory) -> content,
+# and the summary (with the paths of the pages added).
+def build_board_files(board_type, board, page_size):
+    files = {}
+    summary = board_summary(board_type, board)
+    summary["pages"] = {}
+
+    for group, records in board_listing(board_type, board).items():
+        num_pages = max(1, (len(records) + page_size - 1) // page_size)
+        summary["pages"][group] = [board_type + "/" + group + "/" + str(page) + ".json" for page in range(1, num_pages + 1)]
+        for page in range(1, num_pages + 1):
+            files[summary["pages"][group][page - 1]] = encode_json({
+                "board_type": board_type, "group": group, "page": page, "num_pages": num_pages,
+                "num_records": len(records), "records": records[(page - 1) * page_size:page * page_size]})
+
+    summary["charts"] = []
+    for chart in board.charts():
+        summary["charts"].append(board_type + "/" + os.path.splitext(chart["file_name"])[0] + ".svg")
+
+    files[board_type + "/summary.json"] = encode_json(summary)
+    return files, summary
+
+# Renders the SVG charts of a board type into the bundle directory,
+# through a temporary file so that an unchanged chart isn't rewritten.
+def render_svg_charts(board, bundle_dir, board_type):
+    written = 0
+    for chart in board.charts():
+        path = os.path.join(bundle_dir, board_type, os.path.splitext(chart["file_name"])[0] + ".svg")
+        temp_path = os.path.splitext(path)[0] + ".tmp.svg"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # No date, so the same chart always gives the same file.
+        render_chart(dict(chart, file_name=temp_path, metadata={"Date": None}))
+        with open(temp_path, "rb") as svg_file:
+            data = svg_file.read()
+        os.remove(temp_path)
+        written += write_if_changed(path, data)
+    return written
+
+# Support function. Hash of a board type's CSV file, its spec and QA rules,
+# and the bundle settings, for deciding whether the board type has to be rebuilt.
+def input_hash(path, board_type, page_size):
+    digest = hashlib.sha1(repr((BUNDLE_FORMAT, CHART_STYLE_VERSION, CHART_STYLE, page_size,
+                                BOARD_SPECS[board_type], QA_RULES.get(board_type, {}))).encode("utf-8"))
+    with open(path, "rb") as csv_file:
+        for block in iter(lambda: csv_file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# Builds (or updates) the bundle in bundle_dir from the CSV files in input_dir.
+# Returns a dictionary of board type -> number of files written
+# (None for board types that were up to date).
+def build_bundle(input_dir, bundle_dir, board_types=None, page_size=100, force=False):
+    state_path = os.path.join(bundle_dir, STATE_FILE)
+    state = {}
+    if (os.path.exists(state_path)):
+        try:
+            with open(state_path, "r") as state_file:
+                state = json.load(state_file)
+        except (OSError, ValueError):
+            state = {}
+
+    written = {}
+    for board_type in (board_types or BOARD_FILES):
+        path = os.path.join(input_dir, BOARD_FILES[board_type])
+        if (not os.path.exists(path)):
+            continue
+
+        key = input_hash(path, board_type, page_size)
+        previous = state.get(board_type)
+        if (not force and previous is not None and previous["key"] == key and
+                all(os.path.exists(os.path.join(bundle_dir, name)) for name in previous["files"])):
+            written[board_type] = None
+            continue
+
+        board = new_board(board_type)
+        parse_board_file(board, board_type, path)
+
+        files, summary = build_board_files(board_type, board, page_size)
+        written[board_type] = sum(write_if_changed(os.path.join(bundle_dir, name), data) for name, data in files.items())
+        written[board_type] += render_svg_charts(board, bundle_dir, board_type)
+        names = sorted(files) + summary["charts"]
+
+        # Pages left over from a build with more boards.
+        for name in (previous or {}).get("files", []):
+            if (name not in names):
+                for stale in (name, name + ".gz"):
+                    if (os.path.exists(os.path.join(bundle_dir, stale))):
+                        os.remove(os.path.join(bundle_dir, stale))
+
+        state[board_type] = {"key": key, "files": names}
+
+    index = {board_type: {"summary": board_type + "/summary.json"} for board_type in BOARD_FILES if board_type in state}
+    write_if_changed(os.path.join(bundle_dir, "index.json"), encode_json(index))
+
+    os.makedirs(bundle_dir, exist_ok=True)
+    with open(state_path + ".tmp", "w") as state_file:
+        json.dump(state, state_file, indent=1, sort_keys=True)
+    os.replace(state_path + ".tmp", state_path)
+    return written
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generates the static website bundle (JSON summaries and shards, SVG charts).")
+    parser.add_argument("bundle_dir", help="directory the bundle is written to")
+    parser.add_argument("--input-dir", default=".", help="directory containing the CSV_*.csv files (default: current directory)")
+    parser.add_argument("--boards", type=parse_board_types, default=list(BOARD_FILES),
+                        help="comma separated board types to build (default: " + ",".join(BOARD_FILES) + ")")
+    parser.add_argument("--page-size", type=int, default=100, help="boards per listing page (default: 100)")
+    parser.add_argument("--force", action="store_true", help="rebuild every board type")
+    args = parser.parse_args(argv)
+
+    board_types = args.boards
+    if (args.page_size < 1):
+        parser.error("--page-size has to be at least 1")
+
+    written = build_bundle(args.input_dir, args.bundle_dir, board_types, args.page_size, args.force)
+    for board_type, num_written in written.items():
+        print(board_type + ": " + ("up to date" if num_written is None else str(num_written) + " files written"))
+    if (not written):
+        sys.exit("No CSV files found in " + args.input_dir)
+
+if (__name__ == "__main__"):
+    main()
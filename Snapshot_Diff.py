@@ -0,0 +1,143 @@
+# Snapshot diff.
+# Compares two scrapes of the database (two directories, each containing
+# the four CSV files), and reports the transitions of every board between them:
+# boards added or removed, boards that moved between dictionaries
+# (i.e. a DCB from unassembled to assembled), and changed columns
+# (i.e. an LVR's Final_QA, a CCM roll's Good_Count, a backplane's QA).
+# Boards are matched on their record keys (see board_records()),
+# with a dictionary lookup each, so the diff is linear in the number of boards.
+
+import argparse
+import json
+import sys
+
+from Database_Parser_and_Analyzer import BOARD_FILES, board_records, load_snapshot, parse_board_types
+
+# Support function. A column of a record, blank if the snapshot's
+# layout doesn't have that column.
+def field(row, columns, name):
+    idx = columns.get(name)
+    if (idx is None or idx >= len(row)):
+        return ""
+    return row[idx]
+
+# Compares the records (see board_records()) of one board type in two snapshots.
+# Each snapshot's records are read with its own columns dictionary, so
+# columns inserted, removed or moved between the scrapes are matched by name.
+# Returns {"added": [...], "removed": [...], "changed": [...]}.
+def diff_records(old_records, new_records, old_columns, new_columns):
+    names = list(new_columns) + [name for name in old_columns if name not in new_columns]
+
+    result = {"added": [], "removed": [], "changed": []}
+
+    for key, (group, row) in new_records.items():
+        if (key not in old_records):
+            result["added"].append({"key": key, "group": group})
+            continue
+
+        old_group, old_row = old_records[key]
+        transition = {"key": key, "group": group}
+        if (old_group != group):
+            transition["from_group"] = old_group
+
+        fields = {}
+        for name in names:
+            old_value = field(old_row, old_columns, name)
+            value = field(row, new_columns, name)
+            if (old_value != value):
+                fields[name] = [old_value, value]
+        if (fields):
+            transition["fields"] = fields
+
+        if (len(transition) > 2):
+            result["changed"].append(transition)
+
+    for key, (group, row) in old_records.items():
+        if (key not in new_records):
+            result["removed"].append({"key": key, "group": group})
+
+    return result
+
+# Diffs the selected board types of two scrape directories.
+# Returns a dictionary of board type -> diff_records() result.
+def diff_snapshots(old_dir, new_dir, board_types=None):
+    board_types = board_types or list(BOARD_FILES)
+    old_boards = load_snapshot(old_dir, board_types)
+    new_boards = load_snapshot(new_dir, board_types)
+
+    result = {}
+    for board_type in board_types:
+        result[board_type] = diff_records(board_records(old_boards[board_type], board_type),
+                                          board_records(new_boards[board_type], board_type),
+                                          old_boards[board_type].get_columns(), new_boards[board_type].get_columns())
+    return result
+
+# Support function. Formats a database entry for the text report.
+def show(value):
+    if (value == ""):
+        return "(blank)"
+    return repr(value.strip())
+
+# Support function. Describes the change of a column, noting
+# when a count (i.e. a CCM roll's Good_Count) dropped.
+def describe_field(name, old, new):
+    text = name + ": " + show(old) + " -> " + show(new)
+    try:
+        if (int(new) < int(old)):
+            text += " (dropped by " + str(int(old) - int(new)) + ")"
+    except ValueError:
+        pass
+    return text
+
+# Returns the diff as a human readable report.
+def text_report(result):
+    report = ""
+    for board_type, diff in result.items():
+        report += (board_type + ": " + str(len(diff["added"])) + " added, " +
+                   str(len(diff["removed"])) + " removed, " + str(len(diff["changed"])) + " changed\n")
+
+        for board in diff["added"]:
+            report += "  + " + show(board["key"]) + " (" + board["group"] + ")\n"
+        for board in diff["removed"]:
+            report += "  - " + show(board["key"]) + " (" + board["group"] + ")\n"
+        for board in diff["changed"]:
+            changes = []
+            if ("from_group" in board):
+                changes.append(board["from_group"] + " -> " + board["group"])
+            for name, (old, new) in board.get("fields", {}).items():
+                changes.append(describe_field(name, old, new))
+            report += "  ~ " + show(board["key"]) + ": " + "; ".join(changes) + "\n"
+        report += "\n"
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reports the board transitions between two scrapes of the database.")
+    parser.add_argument("old_dir", help="directory of the earlier scrape")
+    parser.add_argument("new_dir", help="directory of the later scrape")
+    parser.add_argument("--boards", type=parse_board_types, default=list(BOARD_FILES),
+                        help="comma separated board types to diff (default: " + ",".join(BOARD_FILES) + ")")
+    parser.add_argument("--json", metavar="PATH", help="write the diff as JSON to PATH ('-' for stdout)")
+    parser.add_argument("--text", metavar="PATH", help="write the text report to PATH (default: stdout)")
+    args = parser.parse_args(argv)
+
+    board_types = args.boards
+
+    result = diff_snapshots(args.old_dir, args.new_dir, board_types)
+
+    if (args.json == "-"):
+        json.dump(result, sys.stdout, indent=1)
+        sys.stdout.write("\n")
+    elif (args.json):
+        with open(args.json, "w") as json_file:
+            json.dump(result, json_file, indent=1)
+
+    if (args.text):
+        with open(args.text, "w") as text_file:
+            text_file.write(text_report(result))
+    elif (args.json != "-"):
+        sys.stdout.write(text_report(result))
+
+    return result
+
+if (__name__ == "__main__"):
+    main()
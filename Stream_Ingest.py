@@ -0,0 +1,291 @@
+# Streaming ingestion of the CSV scraper's output.
+# Instead of waiting for the scraper to write the four CSV files and reading
+# them back, the rows are parsed as they arrive, so the parsing overlaps with
+# the scrape, and the boards are ready as soon as it ends. The input is either:
+# - one stream on stdin, with a marker line before each board's CSV:
+#   "==> CSV_DCB.csv <==" (the headers "head"/"tail" print between files, so
+#   "tail -n +1 CSV_*.csv" is a valid stream; "==> DCB <==" also works), or
+# - one pipe (or file) per board, with --pipe DCB=path (i.e. named pipes
+#   made with mkfifo, which the scraper writes to).
+# Each input is read by its own asyncio task (the blocking reads run in a
+# worker thread), into a queue that the parsing side drains, so one chunk
+# is parsed while the next one is read. Only complete records are parsed
+# (see complete_records_end()); the columns are set from the header row as
+# soon as it has arrived (see infer_layout()).
+# When the inputs end, the DCB text report and the charts are written as in
+# the main script. See Fake_Scraper.py for a scraper that replays CSV files.
+
+import argparse
+import asyncio
+import csv
+import io
+import os
+import re
+import sys
+import time
+
+from Database_Parser_and_Analyzer import (BOARD_FILES, BOARD_SPECS, HEADER_SCAN_ROWS, BoardClassifier, LayoutError,
+                                          complete_records_end, infer_layout, new_board, write_board_output)
+
+# Section marker of a board on stdin: "==> CSV_DCB.csv <==", "==> path/to/CSV_DCB.csv <==" or "==> DCB <==".
+pattern_section_marker = re.compile(b'^==> *(.*?) *<==\\r?$', re.MULTILINE)
+
+# Bytes read from an input at a time.
+READ_SIZE = 1 << 16
+
+# Chunks read ahead of the parsing, per input.
+QUEUE_SIZE = 16
+
+# Support function. Board type of a section marker's name, or None.
+def marker_board_type(name):
+    name = os.path.basename(name.decode("utf-8", "replace").strip())
+    for board_type, file_name in BOARD_FILES.items():
+        if (name.lower() in (board_type.lower(), file_name.lower())):
+            return board_type
+    return None
+
+# Parses one board type's CSV rows as they arrive.
+class BoardStream:
+
+    def __init__(self, board_type, save_path=None):
+        self.board_type = board_type
+        self.board = new_board(board_type)
+        self.classifier = None
+        # Bytes received after the last complete record.
+        self.pending = b""
+        # Rows received before the header row was found.
+        self.head = []
+        self.num_rows = 0
+        self.save_file = None if save_path is None else open(save_path + ".tmp", "wb")
+        self.save_path = save_path
+
+    # Returns True if the bytes received so far, followed by data,
+    # end outside a quoted field.
+    def at_record_boundary(self, data=b""):
+        return (self.pending.count(b'"') + data.count(b'"')) % 2 == 0
+
+    # Takes the next bytes of the CSV, and parses the records they complete.
+    def feed(self, data):
+        if (self.save_file is not None):
+            self.save_file.write(data)
+        self.pending += data
+
+        end = self.pending.rfind(b"\n") + 1
+        if (self.pending.count(b'"', 0, end) % 2 != 0):
+            end = complete_records_end(self.pending)
+        if (end > 0):
+            self.parse(self.pending[:end])
+            self.pending = self.pending[end:]
+
+    # Support function. Parses complete records.
+    def parse(self, data):
+        rows = csv.reader(io.StringIO(data.decode("utf-8"), newline=None))
+        if (self.classifier is None):
+            self.head.extend(rows)
+            self.find_header(final=False)
+            return
+
+        update = self.classifier.update
+        for line in rows:
+            update(line)
+            self.num_rows += 1
+
+    # Support function. Sets the columns once the header row has arrived,
+    # and parses the rows held until then. With final set (or once
+    # HEADER_SCAN_ROWS rows have arrived), raises LayoutError if it hasn't.
+    def find_header(self, final):
+        try:
+            self.board.set_columns(infer_layout(self.board_type, self.head)[2])
+        except LayoutError:
+            if (final or len(self.head) >= HEADER_SCAN_ROWS):
+                raise
+            return
+
+        self.classifier = BoardClassifier(self.board, BOARD_SPECS[self.board_type])
+        head = self.head
+        self.head = []
+        for line in head:
+            self.classifier.update(line)
+        self.num_rows += len(head)
+
+    # Parses the last record (which may not end with a newline), and finishes the saved copy.
+    # Returns the parsed board object.
+    def close(self):
+        if (self.pending):
+            self.parse(self.pending)
+            self.pending = b""
+        if (self.classifier is None):
+            self.find_header(final=True)
+
+        if (self.save_file is not None):
+            self.save_file.close()
+            os.replace(self.save_path + ".tmp", self.save_path)
+        return self.board
+
+# Reads an input (a binary file object) in chunks into a queue, in a worker
+# thread, ending with None. The file is closed at the end.
+async def read_input(input_file, queue):
+    try:
+        while (True):
+            data = await asyncio.to_thread(input_file.read1, READ_SIZE)
+            if (not data):
+                break
+            await queue.put(data)
+    finally:
+        input_file.close()
+        await queue.put(None)
+
+# Support function. Stream of the board type, created on its first data.
+def get_stream(streams, board_type, save_dir):
+    if (board_type not in streams):
+        save_path = None if save_dir is None else os.path.join(save_dir, BOARD_FILES[board_type])
+        streams[board_type] = BoardStream(board_type, save_path)
+    return streams[board_type]
+
+# Parses a stream of sections, each starting with a marker line (see
+# pattern_section_marker), from a binary file object (i.e. sys.stdin.buffer).
+# A marker line inside a quoted field is data. The newline before a marker
+# separates the sections (as "tail" prints them, "\n==> CSV_LVR.csv <=="),
+# so a CSV file without a newline at the end is received as it was. A board
+# type may have several sections, which are parsed as one CSV.
+# Returns a dictionary of board type -> BoardStream (not closed yet).
+async def ingest_sections(input_file, save_dir=None):
+    queue = asyncio.Queue(QUEUE_SIZE)
+    reader = asyncio.create_task(read_input(input_file, queue))
+    streams = {}
+    stream = None
+    carry = b""
+    # Newline at the end of the lines fed so far, held back until it's known
+    # whether a marker follows it (and it's a separator, not data).
+    held = b""
+
+    try:
+        while (True):
+            data = await queue.get()
+            if (data is None):
+                lines = carry
+            else:
+                # Only complete lines are searched for markers.
+                data = carry + data
+                cut = data.rfind(b"\n") + 1
+                lines, carry = data[:cut], data[cut:]
+
+            position = 0
+            for match in pattern_section_marker.finditer(lines):
+                before = held + lines[position:match.start()]
+                held = b""
+                if (stream is not None):
+                    if (not stream.at_record_boundary(before)):
+                        # A marker-like line inside a quoted field.
+                        stream.feed(before + lines[match.start():match.end()])
+                        position = match.end()
+                        continue
+                    stream.feed(before[:-1] if before.endswith(b"\n") else before)
+                elif (before.strip()):
+                    raise ValueError("Data before the first section marker (i.e. '==> CSV_DCB.csv <==')")
+
+                board_type = marker_board_type(match.group(1))
+                if (board_type is None):
+                    raise ValueError("Unknown section '" + match.group(1).decode("utf-8", "replace") + "' (choose from " +
+                                     ", ".join(BOARD_FILES.values()) + ")")
+                stream = get_stream(streams, board_type, save_dir)
+                # Skips the marker line's newline.
+                position = match.end() + 1
+
+            rest = held + lines[position:]
+            held = b""
+            if (stream is not None):
+                if (data is not None and rest.endswith(b"\n")):
+                    rest, held = rest[:-1], b"\n"
+                stream.feed(rest)
+            elif (rest.strip()):
+                raise ValueError("Data before the first section marker (i.e. '==> CSV_DCB.csv <==')")
+
+            if (data is None):
+                break
+    finally:
+        reader.cancel()
+    return streams
+
+# Parses one board type's CSV from a pipe or file at path.
+# Opening a named pipe waits for the writer, so it's done in a worker thread.
+# Returns the BoardStream (not closed yet).
+async def ingest_pipe(board_type, path, save_dir=None):
+    input_file = await asyncio.to_thread(open, path, "rb")
+    queue = asyncio.Queue(QUEUE_SIZE)
+    reader = asyncio.create_task(read_input(input_file, queue))
+    stream = get_stream({}, board_type, save_dir)
+    try:
+        while (True):
+            data = await queue.get()
+            if (data is None):
+                break
+            stream.feed(data)
+            # Lets the other pipes' tasks run between chunks.
+            await asyncio.sleep(0)
+    finally:
+        reader.cancel()
+    return stream
+
+# Ingests the inputs: stdin (as sections) if pipes is empty, otherwise
+# each board type's pipe, concurrently. The boards are closed as their input ends.
+# Returns a dictionary of board type -> (parsed board object, number of rows).
+async def ingest(pipes, save_dir=None, input_file=None):
+    if (pipes):
+        streams = await asyncio.gather(*(ingest_pipe(board_type, path, save_dir) for board_type, path in pipes.items()))
+        streams = dict(zip(pipes, streams))
+    else:
+        streams = await ingest_sections(input_file or sys.stdin.buffer, save_dir)
+
+    return {board_type: (stream.close(), stream.num_rows) for board_type, stream in streams.items()}
+
+# Support function. Parses a --pipe TYPE=PATH value into (board type, path).
+def parse_pipe(value):
+    name, separator, path = value.partition("=")
+    board_type = marker_board_type(name.encode("utf-8"))
+    if (not separator or not path or board_type is None):
+        raise argparse.ArgumentTypeError("expected TYPE=PATH with TYPE one of " + ", ".join(BOARD_FILES) +
+                                         " (got '" + value + "')")
+    return board_type, path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parses the CSV scraper's output as it streams in, on stdin or pipes.")
+    parser.add_argument("--pipe", type=parse_pipe, action="append", default=[], metavar="TYPE=PATH",
+                        help="read a board type's CSV from a named pipe or file (repeatable; default: "
+                             "all board types from stdin, each after a '==> CSV_DCB.csv <==' line)")
+    parser.add_argument("--save-dir", metavar="DIR", default=None,
+                        help="also write the received CSV files into DIR (replaced once each is complete)")
+    parser.add_argument("--no-plots", action="store_true", help="don't draw the charts")
+    parser.add_argument("--force-render", action="store_true",
+                        help="render every chart, even those the render cache (Render_Manifest.json) finds up to date")
+    parser.add_argument("--render-workers", type=int, default=1, metavar="N",
+                        help="render the charts over N worker processes (default: 1, in this process)")
+    parser.add_argument("--report", metavar="PATH", default="Text_Output_DCB.txt",
+                        help="where the DCB text report is written ('-' for stdout, default: Text_Output_DCB.txt)")
+    args = parser.parse_args(argv)
+
+    pipes = dict(args.pipe)
+    if (len(pipes) != len(args.pipe)):
+        parser.error("--pipe given twice for the same board type")
+    if (args.save_dir is not None):
+        os.makedirs(args.save_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    try:
+        results = asyncio.run(ingest(pipes, args.save_dir))
+    except (ValueError, UnicodeDecodeError) as error:
+        sys.exit(str(error))
+    ingest_time = time.perf_counter() - start
+
+    for board_type, (board, num_rows) in results.items():
+        print("%-10s %7d rows, %6d boards" % (board_type, num_rows,
+                                              sum(len(dictionary) for group, dictionary in board.get_groups())),
+              file=sys.stderr)
+    print("Ingested in %.2f s" % ingest_time, file=sys.stderr)
+
+    for board_type, (board, num_rows) in results.items():
+        write_board_output(args, board_type, board)
+    return {board_type: board for board_type, (board, num_rows) in results.items()}
+
+if (__name__ == "__main__"):
+    main()
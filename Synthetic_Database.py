@@ -0,0 +1,346 @@
+# Synthetic database generator.
+# Writes CSV_DCB.csv, CSV_LVR.csv, CSV_CCM.csv and CSV_Backplane.csv
+# with the layout of the real scrapes, at any number of rows, for
+# benchmarking (see Benchmark_Pipeline.py). The files keep the quirks
+# of the real ones:
+# - title and summary rows above the header row (and, in the LVR CSV,
+#   the type summary tables side by side with the first LVR rows),
+# - sparse placeholder rows (",A1,,,,"), rows with a blank key column,
+#   and CCM rolls without a good count,
+# - "Yes"/"yes"/"Prob" spellings, "TRUE"/"FALSE", and blank cells,
+# - quoted cells containing newlines, commas and long comments.
+# The same seed always gives the same files.
+
+import argparse
+import csv
+import datetime
+import os
+import random
+import sys
+
+from Database_Parser_and_Analyzer import BOARD_FILES, board_records, load_snapshot
+
+# Fraction of the rows of each CSV that are placeholders or blank,
+# as in the real files (unless generate_database() is given another one).
+SPARSE_FRACTION = {
+    "DCB": 0.3,
+    "LVR": 0.3,
+    "CCM": 0.25,
+    "Backplane": 0.4,
+}
+
+LOCATIONS = ["UMD", "UMD", "UMD", "SYR", "CERN"]
+
+COMMENTS = [
+    "",
+    "",
+    "",
+    "",
+    "BAD",
+    "resolved",
+    "Fuse problem",
+    "Did not check ADC 2 during initial QA",
+    "TP5 to backplate had resistance of 1-2 ohms, due to extra globs of solder on back, fixed with capton tape.",
+    "bent monitor pins on upper two left.\nAlso current of CCM's decreased on both sides of the board",
+    "RMA reworked. See https://github.com/umd-lhcb/lab-notes/issues/53#issuecomment-557333122",
+]
+
+# Support function. Returns the entries of a QA checklist of num_steps steps:
+# most boards pass every step, the others are part way through or failed.
+def checklist_entries(rng, num_steps):
+    if (rng.random() < 0.6):
+        return [rng.choice(["Yes", "Yes", "yes"]) for step in range(num_steps)]
+    return [rng.choice(["Yes", "yes", "", "", "Prob", "No"]) for step in range(num_steps)]
+
+# Support function. Returns a current reading of the DCB CSV ("1.5V current [A]"),
+# blank for most boards, as in the real file.
+def current_reading(rng, nominal):
+    if (rng.random() < 0.7):
+        return ""
+    return "%.2f" % (nominal * rng.uniform(0.9, 1.1))
+
+# Support function. Returns a cell, with a trailing newline now and then
+# (the scraper leaves them in quoted cells, i.e. "SYR\n").
+def ragged(rng, value):
+    if (value and rng.random() < 0.01):
+        return value + "\n"
+    return value
+
+# Writes the DCB CSV. The header row is the 4th row,
+# and the serial column is the first (blank in the placeholder rows).
+def write_DCB(writer, rows, rng, sparse):
+    width = 15
+    writer.writerow([""] * 5 + ["DCBs (Data Control Boards)"] + [""] * (width - 6))
+    writer.writerow([""] * width)
+    writer.writerow([""] * 4 + ["Initial QA"] + [""] * 4 + ["Final QA"] + [""] * (width - 10))
+    writer.writerow(["", "ID", "Location", "Assembled", "Fused", "PRBS good", "1.5V current [A]", "2.5V current [A]",
+                     "Burned in", "Stave Test Slot JD10", "Stave Test Slot JD11", "Comments", "", "", ""])
+
+    serial = 0
+    for number in range(1, rows + 1):
+        if (rng.random() < sparse):
+            # Placeholder row, with an occasional stray newline.
+            writer.writerow(["", "A" + str(number)] + [""] * 12 + ["\n" if rng.random() < 0.01 else ""])
+            continue
+
+        serial += 1
+        assembled = rng.choice(["Yes", "Yes", "Yes", "yes", "", "", "Prob"])
+        # Fused, PRBS good, the two currents, Burned in, and the two stave tests.
+        checks = [""] * 7
+        if (assembled):
+            fused, PRBS, burned_in, JD10, JD11 = checklist_entries(rng, 5)
+            checks = [fused, PRBS, current_reading(rng, 0.5), current_reading(rng, 1.2), burned_in, JD10, JD11]
+        writer.writerow(["WVJCE-%03d" % serial, str(serial), ragged(rng, rng.choice(LOCATIONS)), assembled] + checks +
+                        [rng.choice(COMMENTS), "", "", ""])
+
+# Type summary tables kept in the first 4 columns of the LVR CSV,
+# side by side with the first LVR rows.
+LVR_SUMMARY = [
+    ["Summary", "", "", ""],
+    ["Type", "Subtype", "System", "Have"],
+    ["12A", "8ch, FF", "48", "0"],
+    ["12A", "7ch, FE", "16", "0"],
+    ["12A", "6ch, FA", "24", "0"],
+    ["12MSA", "5ch, F8", "16", "0"],
+    ["12MS", "8ch, FF", "32", "0"],
+    ["15MS", "8ch, FF", "56", "0"],
+    ["25A", "6ch, 6F\n", "8", "0"],
+    ["25A", "4ch, 0F\n", "4", "0"],
+    ["TOTALS", "", "", ""],
+    ["Type\n", "Need", "initial QA", "final"],
+    ["12A", "128", "16", "0"],
+    ["12MSA", "16", "0", "0"],
+    ["12MS", "32", "0", "0"],
+    ["15MS", "68", "12", "0"],
+    ["25A", "24", "8", "0"],
+]
+
+LVR_TYPES = ["12A", "12A", "25A", "15MS", "15MS", "12MS", "12MSA"]
+
+# CCM roll prefixes referenced by each LVR type.
+LVR_ROLLS = {
+    "12A": ["12A"],
+    "25A": ["25A"],
+    "15MS": ["15M", "15S"],
+    "12MS": ["12M", "12S"],
+    "12MSA": ["12M", "12S"],
+}
+
+# Start of the synthetic burn-ins.
+BURN_IN_START = datetime.datetime(2020, 1, 6, 9)
+
+# Support function. Formats a burn-in time like the LVR CSV ("3:00:00 PM 03/10").
+def burn_in_time(value):
+    return "%d:%02d:00 %s %02d/%02d" % ((value.hour - 1) % 12 + 1, value.minute,
+                                        "AM" if value.hour < 12 else "PM", value.month, value.day)
+
+# Writes the LVR CSV. The header row is the 5th row, and the ID column the 5th column.
+def write_LVR(writer, rows, rng, sparse):
+    width = 25
+    writer.writerow([""] * 4 + ["LVRs (Low Voltage Regulators)"] + [""] * (width - 5))
+    writer.writerow([""] * width)
+    writer.writerow([""] * width)
+    writer.writerow([""] * 9 + ["Initial QA"] + [""] * 10 + ["Burn-In"] + [""] * (width - 21))
+    writer.writerow(["", "", "", "", "ID", "Location", "Serial - LVR", "Serial - CCMs (Note QTY)",
+                     "LVR Type (12MS, 12A, 12MSA, 15MS, 25A)", "1v5, 3v3, and Op Rail", "FPGA Programmed?",
+                     "Undervolt + overtemp configged?", "Undervolt test", "Overtemp Test",
+                     "Output standby configuration", "Sense line test", "SPI Test", "QA OK", "Assembled",
+                     " in SBC crate?", "Start time", "End time", "Final QA", "Subtype", "Comments"])
+
+    serial = 0
+    for number in range(1, rows + 1):
+        summary = LVR_SUMMARY[number - 1] if (number <= len(LVR_SUMMARY)) else ["", "", "", ""]
+        if (rng.random() < sparse):
+            writer.writerow(summary + [str(number)] + [""] * (width - 5))
+            continue
+
+        serial += 1
+        LVR_type = rng.choice(LVR_TYPES)
+        rolls = "/".join(prefix + str(rng.randint(1, 30)) for prefix in LVR_ROLLS[LVR_type])
+        if (rng.random() < 0.05):
+            rolls += " (x2)"
+        checks = checklist_entries(rng, 8)
+        QA_OK = "TRUE" if all(check.lower() == "yes" for check in checks) else "FALSE"
+
+        start = end = ""
+        if (QA_OK == "TRUE" and rng.random() < 0.6):
+            # Burn-ins run one after the other through the year, for a day or two.
+            start_time = BURN_IN_START + datetime.timedelta(hours=serial * 4 + rng.randint(0, 3))
+            start = burn_in_time(start_time)
+            if (rng.random() < 0.9):
+                end = burn_in_time(start_time + datetime.timedelta(minutes=rng.randint(20, 60) * 90))
+
+        writer.writerow(summary + [str(number), rng.choice(LOCATIONS),
+                                   rng.choice(["WVJCZ-", "WVJCZ-", "WVJEN-", "WVJER-", "WVJES-"]) + "%03d" % serial,
+                                   rolls, LVR_type] + checks +
+                        [QA_OK, rng.choice(["Yes", "yes", ""]), rng.choice(["Yes", ""]), start, end,
+                         rng.choice(["Yes", ""]), "", rng.choice(COMMENTS)])
+
+CCM_PREFIXES = ["12A", "12M", "12S", "15M", "15S", "25A"]
+
+# Type, and whether the rolls are masters, slaves or alone, of each CCM prefix.
+CCM_KINDS = {
+    "12A": ("1.2", "Alone"),
+    "12M": ("1.2", "Master"),
+    "12S": ("1.2", "Slave"),
+    "15M": ("1.5", "Master"),
+    "15S": ("1.5", "Slave"),
+    "25A": ("2.5", "Alone"),
+}
+
+# Writes the CCM CSV. The summary table takes the first 9 rows,
+# and the header row is the 10th.
+def write_CCM(writer, rows, rng, sparse):
+    writer.writerow([""] + CCM_PREFIXES + ["", ""])
+    for title in ["MFG's Packing list Totals", "Total Tested", "Total Good",
+                  "Total in Storage (excluding CCMs taken out for use elsewhere)"]:
+        writer.writerow(["", title] + [""] * 7)
+        writer.writerow([""] + [str(rng.randint(0, 1000)) for prefix in CCM_PREFIXES] + ["", ""])
+    writer.writerow(["Roll ID", "Location", "CCM Type", "Master or Slave", "Original # of CCMs in Roll",
+                     "Good CCMs in Roll", "CCMs being used (LVR QA, etc)", "CCM Usage (what CCMs being used for)",
+                     "Other comments"])
+
+    roll_numbers = dict.fromkeys(CCM_PREFIXES, 0)
+    for number in range(rows):
+        if (rng.random() < sparse):
+            # Rolls not counted yet, and location-only rows.
+            if (rng.random() < 0.5):
+                writer.writerow(["", "UMD"] + [""] * 7)
+            else:
+                prefix = rng.choice(CCM_PREFIXES)
+                roll_numbers[prefix] += 1
+                writer.writerow([prefix + str(roll_numbers[prefix]), "UMD"] + [""] * 7)
+            continue
+
+        prefix = rng.choice(CCM_PREFIXES)
+        roll_numbers[prefix] += 1
+        original = rng.choice([12, 12, 12, 11, 7])
+        good = original - rng.choice([0, 0, 0, 1])
+        usage, purpose = rng.choice([("", ""), ("", ""), ("12", "LVR Burn-In"), ("4", "LVR QA"),
+                                     ("Serial #410-417", "LVR QA")])
+        CCM_type, kind = CCM_KINDS[prefix]
+        roll_id = prefix + ("%02d" % roll_numbers[prefix] if prefix == "25A" else str(roll_numbers[prefix]))
+        writer.writerow([roll_id, rng.choice(LOCATIONS), CCM_type, kind, str(original), str(good), usage, purpose, ""])
+
+# Writes the Backplane CSV. The status summary takes the first 15 rows,
+# and the header row (with a quoted newline) is the 16th.
+def write_backplane(writer, rows, rng, sparse):
+    width = 10
+    writer.writerow(["Backplanes (+ P2B2s)"] + [""] * (width - 1))
+    writer.writerow([""] * width)
+    writer.writerow(["Status Summary"] + [""] * (width - 1))
+    writer.writerow(["Type-Variant", "Burned-in", "QA'ed"] + [""] * (width - 3))
+    for kind in ["True-F", "True-P", "True-D", "Mirror-F", "Mirror-D", "Mirror-P"]:
+        writer.writerow([kind, str(rng.randint(0, 9)), str(rng.randint(0, 9))] + [""] * (width - 3))
+    writer.writerow(["Total", "", ""] + [""] * (width - 3))
+    for number in range(4):
+        writer.writerow([""] * width)
+    writer.writerow(["Type", "Variant", "SN", "ID \n(Type+Variant+unique#)", "Location", "Visual Inspection",
+                     "Burn-in", "QA", "Assembly", "Notes"])
+    writer.writerow([""] * width)
+
+    serials = {}
+    for number in range(rows):
+        kind = rng.choice(["True", "Mirror"])
+        variant = rng.choice(["F", "P", "D"])
+        if (rng.random() < sparse):
+            # Planned backplanes, without a serial number.
+            writer.writerow([kind, variant, "", "", "", rng.choice(["Yes", ""]), rng.choice(["Yes", ""]), "", "", ""])
+            continue
+
+        serials[kind] = serials.get(kind, 0) + 1
+        QA = rng.choice(["Yes", "Yes", "No", ""])
+        writer.writerow([kind, variant, "%03d-%03d" % divmod(serials[kind], 1000),
+                         kind[0] + variant + str(serials[kind]) if QA == "Yes" else "", rng.choice(LOCATIONS),
+                         "Yes", rng.choice(["Yes", "No"]), QA, rng.choice(["Yes", "No"]), rng.choice(COMMENTS)])
+
+WRITERS = {
+    "DCB": write_DCB,
+    "LVR": write_LVR,
+    "CCM": write_CCM,
+    "Backplane": write_backplane,
+}
+
+# Column of each board type's records holding the comment (from COMMENTS).
+COMMENT_COLUMNS = {
+    "DCB": "Comments",
+    "LVR": "Comment",
+    "Backplane": "Note",
+}
+
+# Checks generated CSV files (paths is a dictionary of board type -> path,
+# as returned by generate_database()): every row has as many cells as the
+# title row, and the parsed records hold a comment in their comment column.
+# Returns a list of the problems found, empty if there are none.
+def check_database(paths):
+    problems = []
+    for board_type, path in paths.items():
+        with open(path, newline="") as csv_file:
+            rows = list(csv.reader(csv_file))
+        width = len(rows[0])
+        for number, row in enumerate(rows, 1):
+            if (len(row) != width):
+                problems.append(board_type + ": row " + str(number) + " has " + str(len(row)) + " cells instead of " +
+                                str(width))
+
+    board_types = [board_type for board_type in COMMENT_COLUMNS if board_type in paths]
+    input_dirs = {os.path.dirname(paths[board_type]) for board_type in board_types}
+    for input_dir in input_dirs:
+        boards = load_snapshot(input_dir, [board_type for board_type in board_types
+                                           if os.path.dirname(paths[board_type]) == input_dir])
+        for board_type, board in boards.items():
+            idx = board.get_columns()[COMMENT_COLUMNS[board_type]]
+            for key, (group, row) in board_records(board, board_type).items():
+                if (row[idx] not in COMMENTS):
+                    problems.append(board_type + " " + key + ": " + COMMENT_COLUMNS[board_type] + " holds " +
+                                    repr(row[idx]) + ", not a comment")
+    return problems
+
+# Writes the CSV files of the board types into output_dir,
+# each with rows rows below its header (the same number for every board
+# type, or a dictionary of board type -> number of rows).
+# sparse overrides the fraction of placeholder rows (see SPARSE_FRACTION).
+# Returns a dictionary of board type -> path.
+def generate_database(output_dir, rows, seed=0, board_types=None, sparse=None):
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {}
+    for board_type in (board_types or BOARD_FILES):
+        num_rows = rows[board_type] if isinstance(rows, dict) else rows
+        # Each board type gets its own generator, so its file doesn't
+        # depend on which other board types are generated.
+        rng = random.Random(str(seed) + board_type)
+        paths[board_type] = os.path.join(output_dir, BOARD_FILES[board_type])
+        with open(paths[board_type], "w", newline="") as csv_file:
+            WRITERS[board_type](csv.writer(csv_file, lineterminator="\n"), num_rows, rng,
+                                SPARSE_FRACTION[board_type] if (sparse is None) else sparse)
+    return paths
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generates synthetic CSV files with the layout of the real database.")
+    parser.add_argument("output_dir", help="directory the CSV_*.csv files are written to")
+    parser.add_argument("--rows", type=int, default=10000, help="rows below the header of each CSV (default: 10000)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    parser.add_argument("--sparse", type=float, default=None,
+                        help="fraction of placeholder rows, from 0 to 1 (default: about that of the real files)")
+    parser.add_argument("--check", action="store_true",
+                        help="check that the rows fit the header rows and the comments parse as comments (see check_database())")
+    args = parser.parse_args(argv)
+
+    if (args.rows < 0):
+        parser.error("--rows can't be negative")
+    if (args.sparse is not None and not 0 <= args.sparse <= 1):
+        parser.error("--sparse has to be between 0 and 1")
+    paths = generate_database(args.output_dir, args.rows, args.seed, sparse=args.sparse)
+    for board_type, path in paths.items():
+        print(board_type + ": " + path + " (" + str(os.path.getsize(path)) + " bytes)")
+
+    if (args.check):
+        problems = check_database(paths)
+        for problem in problems[:20]:
+            print(problem)
+        if (problems):
+            sys.exit(str(len(problems)) + " problem(s) found")
+        print("The rows match the header rows, and the comments are in their columns")
+
+if (__name__ == "__main__"):
+    main()